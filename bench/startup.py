@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+time_transfer 启动耗时基准
+
+测量几种常见调用的端到端耗时（中位数），并给出导入耗时明细（-X importtime），
+用于发现启动路径上新增的重量级导入。
+
+--check 交替运行当前脚本与基线版本（默认为仓库的第一个提交）脚本的无参数调用，当前版本的
+中位数不比基线快时退出码为 1。脚本每次运行都要重新编译，time_transfer.py 本身需要保持足够小，
+各功能放在按需导入的 time_transfer_* 模块中。
+
+用法:
+    python bench/startup.py                 # 端到端耗时 + 导入耗时前 15 项
+    python bench/startup.py --runs 30 --top 25
+    python bench/startup.py --json          # 以 JSON 输出，便于与历史结果对比
+    python bench/startup.py --check --runs 40 --baseline-rev 7b9a7fe
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS_DIR = os.path.join(ROOT, 'src', 'tools')
+SCRIPT = os.path.join(TOOLS_DIR, 'time_transfer.py')
+
+# 场景名 -> 命令行参数
+SCENARIOS: Dict[str, List[str]] = {
+    'python -c pass': ['-c', 'pass'],
+    'no-args': [SCRIPT],
+    'no-args (-m)': ['-m', 'tools.time_transfer'],
+    '--current-time': [SCRIPT, '--current-time'],
+    'to_date': [SCRIPT, '-m', 'to_date', '-v', '1697049600000', '-t', '1'],
+    'to_timestamp': [SCRIPT, '-m', 'to_timestamp', '-v', '2023-10-11 12:34:56', '-t', '2'],
+}
+
+def _bench_env() -> Dict[str, str]:
+    """允许写入字节码缓存，并让 -m tools.time_transfer 可以找到模块"""
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    env['PYTHONPATH'] = os.path.join(ROOT, 'src') + os.pathsep + env.get('PYTHONPATH', '')
+    return env
+
+def _run_once(command: List[str], env: Dict[str, str]) -> float:
+    """运行一次命令，返回耗时（毫秒）"""
+    start = time.perf_counter()
+    subprocess.run(command, stdout=subprocess.DEVNULL, env=env, check=True)
+    return (time.perf_counter() - start) * 1000
+
+def time_command(args: List[str], runs: int, env: Dict[str, str]) -> Dict[str, float]:
+    """
+    多次运行命令，返回耗时统计（毫秒）
+
+    第一次运行只用于预热字节码缓存和文件系统缓存，不计入统计。
+    """
+    command = [sys.executable] + args
+    _run_once(command, env)
+    samples = [_run_once(command, env) for _ in range(runs)]
+    return {'median_ms': statistics.median(samples), 'min_ms': min(samples)}
+
+def root_revision() -> str:
+    """仓库的第一个提交，即改动前的基线版本"""
+    result = subprocess.run(['git', 'rev-list', '--max-parents=0', 'HEAD'], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    return result.stdout.split()[-1]
+
+def compare_no_args(revision: str, runs: int, env: Dict[str, str]) -> Dict[str, float]:
+    """
+    交替运行当前脚本与 revision 版本脚本的无参数调用，返回两者的耗时中位数（毫秒）
+
+    交替运行使两者经历相同的机器负载变化；基线脚本从 git 取出后写入临时目录，无参数调用只用到脚本本身。
+    """
+    source = subprocess.run(['git', 'show', f'{revision}:src/tools/time_transfer.py'], cwd=ROOT,
+                            capture_output=True, check=True).stdout
+    with tempfile.TemporaryDirectory() as directory:
+        baseline = os.path.join(directory, 'time_transfer.py')
+        with open(baseline, 'wb') as f:
+            f.write(source)
+        commands = {'current': [sys.executable, SCRIPT], 'baseline': [sys.executable, baseline]}
+        for command in commands.values():
+            _run_once(command, env)
+        samples: Dict[str, List[float]] = {name: [] for name in commands}
+        for _ in range(runs):
+            for name, command in commands.items():
+                samples[name].append(_run_once(command, env))
+    return {name: statistics.median(values) for name, values in samples.items()}
+
+def import_breakdown(env: Dict[str, str], top: int) -> List[Tuple[str, int, int]]:
+    """
+    解析 -X importtime 的输出
+
+    Returns:
+        按累计耗时降序的 [(模块名, 自身耗时us, 累计耗时us)]
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import time_transfer'],
+                            cwd=TOOLS_DIR, env=env, capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        # 子模块先于父模块输出，并以缩进表示层级；解释器启动阶段的顶层模块不计入
+        if not name.startswith('   ') and name.strip() != 'time_transfer':
+            rows = []
+            continue
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return rows[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description='time_transfer 启动耗时基准')
+    parser.add_argument('--runs', type=int, default=20, help='每个场景的运行次数 (默认 20)')
+    parser.add_argument('--top', type=int, default=15, help='导入耗时明细显示的条目数 (默认 15)')
+    parser.add_argument('--json', action='store_true', help='以 JSON 格式输出结果')
+    parser.add_argument('--check', action='store_true',
+                        help='只比较无参数调用与基线版本，当前版本不比基线快时退出码为 1')
+    parser.add_argument('--baseline-rev', help='--check 的基线版本 (默认为仓库的第一个提交)')
+    args = parser.parse_args()
+
+    env = _bench_env()
+    if args.check:
+        try:
+            revision = args.baseline_rev or root_revision()
+            medians = compare_no_args(revision, args.runs, env)
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f'错误: 无法从 git 取得基线版本的脚本: {e}', file=sys.stderr)
+            sys.exit(2)
+        print(f"no-args 中位数: 当前 {medians['current']:.1f} ms，基线 {revision} {medians['baseline']:.1f} ms，"
+              f"运行 {args.runs} 次")
+        if medians['current'] >= medians['baseline']:
+            print('当前版本的无参数调用不比基线快', file=sys.stderr)
+            sys.exit(1)
+        return
+
+    timings = {name: time_command(scenario, args.runs, env) for name, scenario in SCENARIOS.items()}
+    imports = import_breakdown(env, args.top)
+
+    if args.json:
+        print(json.dumps({
+            'python': sys.version.split()[0],
+            'runs': args.runs,
+            'timings': timings,
+            'imports': [{'module': name, 'self_us': self_us, 'cumulative_us': cumulative_us}
+                        for name, self_us, cumulative_us in imports],
+        }, ensure_ascii=False, indent=2))
+        return
+
+    print(f'Python {sys.version.split()[0]}，每个场景运行 {args.runs} 次')
+    print(f"{'场景':<20}{'中位数(ms)':>12}{'最小值(ms)':>12}")
+    for name, timing in timings.items():
+        print(f"{name:<20}{timing['median_ms']:>12.1f}{timing['min_ms']:>12.1f}")
+
+    print(f'\nimport time_transfer 导入耗时前 {args.top} 项:')
+    print(f"{'累计(us)':>10}{'自身(us)':>10}  模块")
+    for name, self_us, cumulative_us in imports:
+        print(f'{cumulative_us:>10}{self_us:>10}  {name}')
+
+if __name__ == '__main__':
+    main()
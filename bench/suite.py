@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+time_transfer 基准套件与性能回归检查
+
+测量以下各项的单次耗时，结果保存为 JSON 基线，之后的运行与基线比较：
+  - parse_date_string: DATE_FORMATS 中的每一种格式
+  - date_to_timestamp / timestamp_to_date: TIME_ZONES 中的每一个时区
+  - 启动耗时: bench/startup.py 中的各个场景
+
+测量时关闭结果缓存，反映的是每次都真正解析、换算的开销；预热一轮后各项交替重复多轮。
+同时测量一段固定的纯 Python 校准负载，回归检查比较的是"各轮最快耗时 / 校准负载各轮最快耗时"，
+抵消虚拟机、CPU 频率等造成的整体快慢变化。干扰只会让测量变慢，取最小值比中位数稳定。
+同一段代码在个别进程中的耗时可能整体快出一倍，只测一个进程或取最快的进程都会让基线偏快，
+因此解析与换算在 --processes 个独立的子进程中各测一遍，每项取各进程结果的中位数；初次比较
+判定为回归的项目会在 RECHECK_FACTOR 倍数量的新子进程中复测，取复测中最快的进程再判定一次：
+真正的回归会让每个进程都变慢，偶然的干扰不会。
+
+基线与机器相关，不提交到仓库（bench/baseline.json 已加入 .gitignore）。在同一台机器上先切换到
+修改前的提交保存基线，再回到修改后的代码检查:
+    git stash && python bench/suite.py --save && git stash pop
+    python bench/suite.py --check
+只依赖标准库和项目本身的依赖，可离线运行。
+
+用法:
+    python bench/suite.py --save             # 测量并写入基线 bench/baseline.json
+    python bench/suite.py --check            # 测量并与基线比较，任一项变慢超过阈值时退出码为 1
+    python bench/suite.py --check --threshold 0.1 --skip-startup
+    python bench/suite.py --json             # 以 JSON 输出本次结果
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), 'src'))
+sys.path.insert(0, BENCH_DIR)
+
+from startup import SCENARIOS, _bench_env, time_command
+from tools.time_transfer import (
+    DATE_FORMATS,
+    TIME_ZONES,
+    build_zone_tables,
+    configure_cache,
+    date_to_timestamp,
+    parse_date_string,
+    timestamp_to_date,
+)
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+DEFAULT_THRESHOLD = 0.25
+
+# 采样范围: 1970-01-01 至 2037-12-31
+RANGE_END = 2145916800
+EPOCH = datetime.datetime(1970, 1, 1)
+
+# 生成各格式样本的时刻；日取 13 号，使日/月顺序不同的格式各自命中自己的格式
+SAMPLE_MOMENT = datetime.datetime(2023, 10, 13, 14, 34, 56, 123456)
+
+# 各测量组的单位
+GROUP_UNITS = {
+    'parse_date_string': 'us',
+    'date_to_timestamp': 'us',
+    'timestamp_to_date': 'us',
+    'startup': 'ms',
+}
+
+# 判定回归时的最小绝对变化：亚微秒级的快速路径和进程启动都有固定的抖动，相对变化再大也不算回归
+MIN_DELTA = {'us': 0.5, 'ms': 5.0}
+
+# 基线格式版本：relative 的计算方式改变时递增，旧基线需要重新保存
+BASELINE_VERSION = 2
+
+# 初次比较判定为回归的项目复测时，轮数（启动场景为运行次数）是初次的多少倍
+RECHECK_FACTOR = 3
+
+# 解析与换算默认在多少个独立的子进程中测量
+DEFAULT_PROCESSES = 5
+
+def format_sample(fmt: str) -> str:
+    """按格式生成样本字符串，%Z/%z 在无时区的 datetime 上为空，用固定的缩写和偏移代替"""
+    return SAMPLE_MOMENT.strftime(fmt.replace('%Z', 'CST').replace('%z', '+0800'))
+
+def calibration_workload(n: int) -> None:
+    """校准负载：字典读写和整数格式化，与被测代码的热点相近且不依赖项目代码"""
+    counts: Dict[int, int] = {}
+    for i in range(n):
+        counts[i & 255] = counts.get(i & 255, 0) + len(str(i))
+
+def time_once(func: Callable, inputs: List[Any]) -> float:
+    """对每个输入调用一次，返回单次耗时（微秒）"""
+    start = time.perf_counter()
+    for value in inputs:
+        func(value)
+    return (time.perf_counter() - start) / len(inputs) * 1e6
+
+def build_cases(ops: int, seed: int = 20) -> List[Tuple[str, str, Callable, List[Any]]]:
+    """生成各测量项 (测量组, 项目, 函数, 输入)，第一项为校准负载"""
+    configure_cache(0)
+    build_zone_tables()
+    rng = random.Random(seed)
+    seconds = [rng.randrange(0, RANGE_END) for _ in range(ops)]
+    timestamps = [value * 1000 for value in seconds]
+    dates = [(EPOCH + datetime.timedelta(seconds=value)).strftime('%Y-%m-%d %H:%M:%S') for value in seconds]
+
+    cases: List[Tuple[str, str, Callable, List[Any]]] = [('calibration', '', calibration_workload, [100] * ops)]
+    for fmt in DATE_FORMATS:
+        cases.append(('parse_date_string', fmt, parse_date_string, [format_sample(fmt)] * ops))
+    for tz_info in TIME_ZONES.values():
+        tz = tz_info['tz']
+        cases.append(('date_to_timestamp', tz, lambda value, tz=tz: date_to_timestamp(value, tz), dates))
+        cases.append(('timestamp_to_date', tz, lambda value, tz=tz: timestamp_to_date(value, tz), timestamps))
+    return cases
+
+def bench_conversions(cases: List[Tuple[str, str, Callable, List[Any]]],
+                      repeat: int) -> Tuple[Dict[str, Dict[str, float]], Dict[str, Dict[str, float]]]:
+    """
+    测量解析与时区换算
+
+    先完整预热一轮（不计时），之后各项交替测量 repeat 轮，避免机器短时变慢只集中影响相邻的几项。
+
+    Args:
+        cases: build_cases() 生成的测量项（或其中一部分），第一项必须是校准负载
+        repeat: 测量轮数
+
+    Returns:
+        (各项最快一轮的单次耗时（微秒）, 各项最快耗时相对校准负载最快耗时的比值)
+    """
+    for _, _, func, inputs in cases:
+        time_once(func, inputs)
+    rounds = [[time_once(func, inputs) for _, _, func, inputs in cases] for _ in range(repeat)]
+
+    results: Dict[str, Dict[str, float]] = {}
+    relative: Dict[str, Dict[str, float]] = {}
+    calibration = min(timings[0] for timings in rounds)
+    for i, (group, name, _, _) in enumerate(cases[1:], 1):
+        best = min(timings[i] for timings in rounds)
+        results.setdefault(group, {})[name] = best
+        relative.setdefault(group, {})[name] = best / calibration
+    return results, relative
+
+def measure_conversions(ops: int, repeat: int, processes: int,
+                        only: Optional[List[Tuple[str, str]]] = None,
+                        reduce: Callable[[Iterable[float]], float] = statistics.median
+                        ) -> Tuple[Dict[str, Dict[str, float]], Dict[str, Dict[str, float]]]:
+    """
+    在 processes 个独立的子进程中测量解析与换算，每项按 reduce 合并各进程的结果（默认取中位数）
+
+    Args:
+        ops: 每项每轮的操作次数
+        repeat: 每个子进程中的测量轮数
+        processes: 子进程数
+        only: 只测量这些 (测量组, 项目)，默认全部
+        reduce: 合并各进程结果的函数
+
+    Returns:
+        与 bench_conversions() 相同
+    """
+    command = [sys.executable, os.path.abspath(__file__), '--measure', '--ops', str(ops), '--repeat', str(repeat)]
+    if only is not None:
+        command += ['--only', json.dumps(only, ensure_ascii=False)]
+    measured = [json.loads(subprocess.run(command, capture_output=True, text=True, check=True).stdout)
+                for _ in range(processes)]
+    results: Dict[str, Dict[str, float]] = {}
+    relative: Dict[str, Dict[str, float]] = {}
+    for group, items in measured[0][0].items():
+        for name in items:
+            results.setdefault(group, {})[name] = reduce(r[group][name] for r, _ in measured)
+            relative.setdefault(group, {})[name] = reduce(r[group][name] for _, r in measured)
+    return results, relative
+
+def bench_startup(runs: int, names: Optional[Iterable[str]] = None) -> Dict[str, float]:
+    """各启动场景（或 names 指定的场景）的耗时中位数（毫秒）"""
+    env = _bench_env()
+    return {name: time_command(SCENARIOS[name], runs, env)['median_ms'] for name in names or SCENARIOS}
+
+def recheck(report: Dict[str, Any], flagged: List[Tuple[str, str]], ops: int, repeat: int, runs: int,
+            processes: int) -> None:
+    """
+    复测初次比较判定为回归的项目，本次报告中每项取两次测量中较快的结果
+
+    解析与换算连同校准负载一起在 processes * RECHECK_FACTOR 个新的子进程中重新测量，取最快的
+    进程；启动场景重新运行 runs * RECHECK_FACTOR 次。一次偶然的变慢不会在复测中重现。
+    """
+    conversions = [(group, name) for group, name in flagged if group != 'startup']
+    updates = ([measure_conversions(ops, repeat, processes * RECHECK_FACTOR, conversions, min)]
+               if conversions else [])
+    startup = [name for group, name in flagged if group == 'startup']
+    if startup:
+        updates.append(({'startup': bench_startup(runs * RECHECK_FACTOR, startup)}, {}))
+    for results, relative in updates:
+        for group, items in results.items():
+            for name, value in items.items():
+                if group in report['relative']:
+                    if relative[group][name] < report['relative'][group][name]:
+                        report['results'][group][name] = value
+                        report['relative'][group][name] = relative[group][name]
+                else:
+                    report['results'][group][name] = min(value, report['results'][group][name])
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any],
+            threshold: float) -> List[Tuple[str, str, float, float, bool]]:
+    """
+    与基线逐项比较
+
+    解析与换算按相对校准负载的耗时比比较，换算为基线下的耗时后，变慢超过 threshold
+    且超过该组的最小绝对变化时判定为回归。启动耗时以进程为单位测量，直接比较。
+
+    Args:
+        current: 本次报告
+        baseline: 基线报告
+        threshold: 判定为回归的变慢比例
+
+    Returns:
+        [(测量组, 项目, 基线耗时, 换算到基线机器状态下的本次耗时, 是否回归)]，只包含两边都有的项目
+    """
+    rows = []
+    for group, items in current['results'].items():
+        for name, value in items.items():
+            base = baseline['results'].get(group, {}).get(name)
+            if base is None:
+                continue
+            if group != 'startup':
+                base_relative = baseline['relative'].get(group, {}).get(name)
+                if base_relative is None:
+                    continue
+                value = base * current['relative'][group][name] / base_relative
+            regressed = value > base * (1 + threshold) and value - base > MIN_DELTA[GROUP_UNITS[group]]
+            rows.append((group, name, base, value, regressed))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description='time_transfer 基准套件与性能回归检查')
+    parser.add_argument('--ops', type=int, default=2000, help='每项每轮的操作次数 (默认 2000)')
+    parser.add_argument('--repeat', type=int, default=7, help='每项重复的轮数 (默认 7)')
+    parser.add_argument('--runs', type=int, default=10, help='每个启动场景的运行次数 (默认 10)')
+    parser.add_argument('--skip-startup', action='store_true', help='不测量启动耗时')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基线文件路径 (默认 bench/baseline.json)')
+    parser.add_argument('--save', action='store_true', help='把本次结果写入基线文件')
+    parser.add_argument('--check', action='store_true', help='与基线比较，有回归时退出码为 1')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'判定为回归的变慢比例 (默认 {DEFAULT_THRESHOLD}，即慢 25%%)')
+    parser.add_argument('--processes', type=int, default=DEFAULT_PROCESSES,
+                        help=f'解析与换算在多少个子进程中测量，每项取中位数 (默认 {DEFAULT_PROCESSES})')
+    parser.add_argument('--json', action='store_true', help='以 JSON 格式输出本次结果')
+    # 子进程模式：在当前进程中测量解析与换算，以 JSON 输出 [results, relative]
+    parser.add_argument('--measure', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--only', type=json.loads, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        cases = build_cases(args.ops)
+        if args.only is not None:
+            only = {tuple(item) for item in args.only}
+            cases = cases[:1] + [case for case in cases[1:] if (case[0], case[1]) in only]
+        print(json.dumps(bench_conversions(cases, args.repeat), ensure_ascii=False))
+        return
+
+    results, relative = measure_conversions(args.ops, args.repeat, args.processes)
+    if not args.skip_startup:
+        results['startup'] = bench_startup(args.runs)
+    report = {
+        'version': BASELINE_VERSION,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'ops': args.ops,
+        'repeat': args.repeat,
+        'processes': args.processes,
+        'units': {group: GROUP_UNITS[group] for group in results},
+        'results': results,
+        'relative': relative,
+    }
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.save:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f'基线已写入 {args.baseline}', file=sys.stderr)
+
+    if args.check:
+        try:
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        except OSError as e:
+            print(f'错误: 无法读取基线文件，请先在修改前的代码上运行 --save: {e}', file=sys.stderr)
+            sys.exit(2)
+        if baseline.get('version') != BASELINE_VERSION:
+            print('错误: 基线文件由旧版本的基准套件生成，请在修改前的代码上重新运行 --save', file=sys.stderr)
+            sys.exit(2)
+        rows = compare(report, baseline, args.threshold)
+        flagged = [(group, name) for group, name, _, _, regressed in rows if regressed]
+        if flagged:
+            print(f'{len(flagged)} 项疑似回归，复测中...', file=sys.stderr)
+            recheck(report, flagged, args.ops, args.repeat, args.runs, args.processes)
+            rows = compare(report, baseline, args.threshold)
+        print(f"基线: Python {baseline['python']}，{baseline['created']}；阈值 {args.threshold:.0%}")
+        print(f"{'测量组':<20}{'项目':<28}{'基线':>10}{'本次':>10}{'变化':>9}")
+        for group, name, base, value, regressed in rows:
+            mark = '  <- 回归' if regressed else ''
+            print(f'{group:<20}{name:<28}{base:>10.2f}{value:>10.2f}{value / base - 1:>+9.1%}{mark}')
+        regressions = sum(1 for row in rows if row[4])
+        print(f'共比较 {len(rows)} 项，回归 {regressions} 项')
+        if regressions:
+            sys.exit(1)
+    elif not args.json:
+        print(f"Python {report['python']}，每项 {args.ops} 次 x {args.repeat} 轮 x {args.processes} 个进程，各进程取最快一轮后取中位数")
+        for group, items in results.items():
+            print(f'\n{group} ({GROUP_UNITS[group]}/次):')
+            for name, value in items.items():
+                print(f'  {name:<28}{value:>10.2f}')
+
+if __name__ == '__main__':
+    main()
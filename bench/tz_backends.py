@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+time_transfer 时区后端基准
+
+对每个时区后端 (table / pytz / zoneinfo) 测量单次操作耗时，并以 pytz 的
+fromutc/localize 为参照统计结果不一致的次数（只取 pytz 数据覆盖的 1970-2037 年）。
+测量时关闭结果缓存，反映的是每次都真正计算的开销。
+
+用法:
+    python bench/tz_backends.py                 # 默认每项 20000 次
+    python bench/tz_backends.py --ops 100000
+    python bench/tz_backends.py --json          # 以 JSON 输出，便于与历史结果对比
+"""
+
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import pytz
+
+from tools.time_transfer import (
+    TIME_ZONES,
+    TZ_BACKENDS,
+    configure_cache,
+    date_to_timestamp,
+    get_zone,
+    set_tz_backend,
+    timestamp_to_date,
+)
+
+# 采样范围: 1970-01-01 至 2037-12-31，pytz 的转换数据止于 2037 年
+RANGE_END = 2145916800
+EPOCH = datetime.datetime(1970, 1, 1)
+
+def make_samples(ops: int, seed: int = 7) -> List[tuple]:
+    """生成 (时区, UTC 秒, 本地时间字符串) 样本，时区按 TIME_ZONES 轮换"""
+    rng = random.Random(seed)
+    zones = [tz_info['tz'] for tz_info in TIME_ZONES.values()]
+    samples = []
+    for i in range(ops):
+        seconds = rng.randrange(0, RANGE_END)
+        local = (EPOCH + datetime.timedelta(seconds=seconds)).strftime('%Y-%m-%d %H:%M:%S')
+        samples.append((zones[i % len(zones)], seconds, local))
+    return samples
+
+def reference(samples: List[tuple]) -> Dict[str, List]:
+    """pytz 参照结果"""
+    to_date, to_timestamp = [], []
+    for zone, seconds, local in samples:
+        tz = pytz.timezone(zone)
+        to_date.append(datetime.datetime.fromtimestamp(seconds, pytz.utc).astimezone(tz)
+                       .strftime('%Y-%m-%d %H:%M:%S %Z'))
+        localized = tz.localize(datetime.datetime.strptime(local, '%Y-%m-%d %H:%M:%S'))
+        to_timestamp.append(int(localized.timestamp()) * 1000)
+    return {'timestamp_to_date': to_date, 'date_to_timestamp': to_timestamp}
+
+def time_op(func: Callable, samples: List[tuple]) -> tuple:
+    """返回 (每次耗时us, 结果列表)"""
+    start = time.perf_counter()
+    results = [func(sample) for sample in samples]
+    return (time.perf_counter() - start) / len(samples) * 1e6, results
+
+def bench_backend(backend: str, samples: List[tuple], expected: Dict[str, List]) -> Dict[str, Dict[str, float]]:
+    set_tz_backend(backend)
+    configure_cache(0)
+    # 预热：时区对象、转换表在首次使用时创建，不计入耗时
+    for tz_info in TIME_ZONES.values():
+        get_zone(tz_info['tz'])
+
+    operations = {
+        'utc_offset': lambda s: get_zone(s[0]).utc_offset(s[1]),
+        'local_to_utc': lambda s: get_zone(s[0]).local_to_utc(s[1]),
+        'timestamp_to_date': lambda s: timestamp_to_date(s[1] * 1000, s[0]),
+        'date_to_timestamp': lambda s: date_to_timestamp(s[2], s[0]),
+    }
+    result = {}
+    for name, func in operations.items():
+        us_per_op, outputs = time_op(func, samples)
+        mismatches = None
+        if name in expected:
+            mismatches = sum(1 for got, want in zip(outputs, expected[name]) if got != want)
+        result[name] = {'us_per_op': us_per_op, 'mismatches': mismatches}
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description='time_transfer 时区后端基准')
+    parser.add_argument('--ops', type=int, default=20000, help='每项操作的次数 (默认 20000)')
+    parser.add_argument('--json', action='store_true', help='以 JSON 格式输出结果')
+    args = parser.parse_args()
+
+    samples = make_samples(args.ops)
+    expected = reference(samples)
+    results = {backend: bench_backend(backend, samples, expected) for backend in TZ_BACKENDS}
+
+    if args.json:
+        print(json.dumps({'python': sys.version.split()[0], 'ops': args.ops, 'results': results},
+                         ensure_ascii=False, indent=2))
+        return
+
+    print(f'Python {sys.version.split()[0]}，每项操作 {args.ops} 次 (us/次，括号内为与 pytz 不一致的次数)')
+    operations = list(next(iter(results.values())))
+    print(f"{'后端':<10}" + ''.join(f'{name:>22}' for name in operations))
+    for backend, ops in results.items():
+        cells = []
+        for name in operations:
+            cell = f"{ops[name]['us_per_op']:.2f}"
+            if ops[name]['mismatches'] is not None:
+                cell += f" ({ops[name]['mismatches']})"
+            cells.append(f'{cell:>22}')
+        print(f'{backend:<10}' + ''.join(cells))
+
+if __name__ == '__main__':
+    main()
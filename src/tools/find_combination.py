@@ -1,102 +1,702 @@
 #!/usr/bin/env python3
+"""
+加减组合查找工具
 
-def find_combinations_to_target(numbers, target):
+在一组数值中查找若干个数，通过加减运算得到目标值（每个数可以不用、加或减，各用一次）。
+用于对账时找出哪些流水的加减组合能凑出差额。
+
+有两种查找引擎，默认按数值大小自动选择：
+  - mitm: 折半搜索 (meet-in-the-middle)。把数值分成两半，先枚举一半的全部加减和建立哈希索引，
+    再枚举另一半，在索引中查找互补的和。计算量从 3^n 降为约 2 x 3^(n/2)，适用于任意大小的数值。
+  - bitset: 可达性动态规划。数值和目标都是整数且绝对值之和不大时，用 Python 大整数作位集，
+    每个数做一次移位和按位或，得到全部可达的加减和；保留每一层的位集，按需回溯出具体组合。
+两种引擎都不限制组合的项数。
+
+iter_combinations 按查找顺序逐个生成组合，每个组合只保存下标位掩码和符号位掩码，
+表达式等在读取时才计算，配合 limit 时内存占用与组合数无关。
+"""
+
+import os
+import time
+from contextlib import closing
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# 示例数值和目标值
+EXAMPLE_NUMBERS = [536, 346, 55, 910716, 145563, 16, 340715, 14585, 2829, 101, 4900222, 2314, 784172,
+                   34684117, 86, 370, 22345]
+EXAMPLE_TARGET = 2062
+
+# 建立索引的一半最多包含的数值个数：3^13 约 160 万个和，索引约占 250MB 内存。
+# 数值更多时，另一半按块流式枚举，内存不再增长
+MAX_INDEX_TERMS = 13
+
+# 折半搜索中逐个组合枚举的高位段至少包含的数值个数，保证并行查找至少有 3^4 = 81 个搜索单元
+MIN_PREFIX_TERMS = 4
+
+# 高位段组合数很多时，相邻的组合合并为一个搜索单元，单元数不超过 3^7 = 2187 个
+MAX_UNIT_PREFIX_TERMS = 7
+
+ENGINES = ('auto', 'mitm', 'bitset')
+
+# 位集引擎各层位集的总位数上限：2^31 位即 256MB，与折半搜索的索引相当
+BITSET_MAX_BITS = 1 << 31
+
+# 建立索引、查找时每处理多少个加减和检查一次截止时间（并行查找时也检查停止信号）
+DEADLINE_CHECK_EVERY = 1 << 14
+
+# 自动选择引擎时的相对开销：位集每一位的移位、按位或约 1 纳秒，折半搜索每个加减和的枚举、查找约 400 纳秒
+BITSET_BITS_PER_SUM = 400
+
+def _check_deadline(deadline: Optional[float]) -> None:
+    """超过截止时间（time.time()）时抛出 TimeoutError"""
+    if deadline is not None and time.time() >= deadline:
+        raise TimeoutError("超过查找的时间预算")
+
+def signed_sums(values: Sequence[Any], deadline: Optional[float] = None) -> List[Any]:
+    """
+    枚举一组数值的全部加减和（每个数可以不用、加或减）
+
+    Args:
+        values: 数值列表
+        deadline: 截止时间，每枚举一个数前检查，超过时抛出 TimeoutError
+
+    Returns:
+        长度为 3^len(values) 的列表。下标按三进制编码各数的用法：第 j 位为 0 不用、1 加、2 减，
+        即 sums[code] 的第 j 个数的用法为 code // 3**j % 3
+    """
+    sums = [0]
+    for value in values:
+        _check_deadline(deadline)
+        sums = sums + [total + value for total in sums] + [total - value for total in sums]
+    return sums
+
+def _decode(code: int, indices: Sequence[int]) -> Iterator[Tuple[int, int]]:
+    """把三进制编码解码为 (下标, 符号)，只输出用到的数"""
+    for index in indices:
+        code, digit = divmod(code, 3)
+        if digit:
+            yield index, 1 if digit == 1 else -1
+
+def _build_index(sums: List[Any], deadline: Optional[float] = None) -> Dict[Any, Any]:
+    """和 -> 编码；同一个和对应多个编码时值为编码列表。超过截止时间时抛出 TimeoutError"""
+    index: Dict[Any, Any] = {}
+    for start in range(0, len(sums), DEADLINE_CHECK_EVERY):
+        _check_deadline(deadline)
+        for code in range(start, min(start + DEADLINE_CHECK_EVERY, len(sums))):
+            total = sums[code]
+            previous = index.get(total)
+            if previous is None:
+                index[total] = code
+            elif type(previous) is list:
+                previous.append(code)
+            else:
+                index[total] = [previous, code]
+    return index
+
+def _mitm_parts(n: int) -> Tuple[range, range, range]:
+    """折半搜索对 n 个数值的划分: (索引段, 低位段, 高位段) 的下标范围"""
+    index_size = min((n + 1) // 2, MAX_INDEX_TERMS)
+    rest = n - index_size
+    high_size = max(rest - index_size, min(rest, MIN_PREFIX_TERMS))
+    return range(index_size), range(index_size, n - high_size), range(n - high_size, n)
+
+def _search_units(n: int) -> Iterator[range]:
+    """按高位段组合划分的搜索单元（高位段组合编码的范围），至多 3^MAX_UNIT_PREFIX_TERMS 个"""
+    high_size = len(_mitm_parts(n)[2])
+    total = 3 ** high_size
+    size = 3 ** max(0, high_size - MAX_UNIT_PREFIX_TERMS)
+    for start in range(0, total, size):
+        yield range(start, min(start + size, total))
+
+class _MeetInTheMiddle:
+    """
+    折半搜索的数据：数值分为三段
+
+    索引段（至多 MAX_INDEX_TERMS 个）建立哈希索引；低位段的加减和预先枚举；高位段（至少
+    MIN_PREFIX_TERMS 个）逐个组合枚举，每个组合与低位段拼成一块，在索引中查找互补的和。
+    高位段的每个组合是一个互不重叠的搜索单元，并行查找按它划分，与进程数无关。
+    """
+    __slots__ = ('target', 'index_part', 'low_part', 'high_part', 'index', 'low_sums', 'high_sums')
+
+    def __init__(self, numbers: Sequence[Any], target: Any, deadline: Optional[float] = None):
+        self.target = target
+        self.index_part, self.low_part, self.high_part = _mitm_parts(len(numbers))
+        self.index = _build_index(signed_sums([numbers[i] for i in self.index_part], deadline), deadline)
+        self.low_sums = signed_sums([numbers[i] for i in self.low_part], deadline)
+        self.high_sums = signed_sums([numbers[i] for i in self.high_part], deadline)
+
+    def scan(self, high_codes: range, deadline: Optional[float] = None,
+             stop: Any = None) -> Iterator[Tuple[Tuple[int, ...], Tuple[int, ...]]]:
+        """
+        查找高位段取 high_codes 中各组合时的全部解
+
+        每查找 DEADLINE_CHECK_EVERY 个低位段组合检查一次截止时间和停止信号（multiprocessing.Event），
+        超时或收到停止信号时抛出 TimeoutError，此前生成的解是完整结果的前缀。
+        """
+        index, low_sums = self.index, self.low_sums
+        step = DEADLINE_CHECK_EVERY
+        chunks = [(0, low_sums)] if len(low_sums) <= step else \
+            [(start, low_sums[start:start + step]) for start in range(0, len(low_sums), step)]
+        for high_code in high_codes:
+            rest = self.target - self.high_sums[high_code]
+            for start, chunk in chunks:
+                if stop is not None and stop.is_set():
+                    raise TimeoutError("查找已停止")
+                _check_deadline(deadline)
+                hits = [low_code for low_code, low_total in enumerate(chunk, start) if rest - low_total in index]
+                for low_code in hits:
+                    codes = index[rest - low_sums[low_code]]
+                    for index_code in (codes if type(codes) is list else (codes,)):
+                        if not (index_code or low_code or high_code):
+                            continue
+                        terms = [*_decode(index_code, self.index_part), *_decode(low_code, self.low_part),
+                                 *_decode(high_code, self.high_part)]
+                        yield tuple(i for i, _ in terms), tuple(sign for _, sign in terms)
+
+def iter_signed_solutions(numbers: Sequence[Any], target: Any) -> Iterator[Tuple[Tuple[int, ...], Tuple[int, ...]]]:
+    """
+    折半搜索全部加减组合
+
+    Args:
+        numbers: 数值列表（整数、Decimal、Fraction 等可精确比较的数）
+        target: 目标值
+
+    Yields:
+        (下标元组, 符号元组)，下标升序，符号为 1 或 -1；不含一个数都不用的空组合
+    """
+    search = _MeetInTheMiddle(numbers, target)
+    yield from search.scan(range(len(search.high_sums)))
+
+def _bitset_windows(values: Sequence[int], target: int) -> Iterator[Tuple[int, int]]:
+    """
+    位集引擎每一层需要保留的加减和范围
+
+    前 k 个数的加减和落在 [-前缀绝对值和, 前缀绝对值和] 内；剩余的数最多还能改变"剩余绝对值和"，
+    离目标更远的和不可能再凑到目标，不必保留。两者的交集即为该层的窗口。
+
+    Yields:
+        (窗口下界, 窗口上界)，共 len(values) + 1 层；窗口为空时下界大于上界
+    """
+    prefix, remaining = 0, sum(abs(value) for value in values)
+    yield max(0, target - remaining), min(0, target + remaining)
+    for value in values:
+        prefix += abs(value)
+        remaining -= abs(value)
+        yield max(-prefix, target - remaining), min(prefix, target + remaining)
+
+class SignedSumReachability:
+    """
+    整数加减和的可达性位集
+
+    按绝对值从小到大依次加入各数，每一层的位集 bits 第 j 位表示加减和 lo + j 是否可达：
+    加入数值 x 后的位集 = 原位集 | 原位集 << x | 原位集 >> x（再按窗口对齐、截断）。
+    最后一层的窗口只剩目标值本身，因此构建完成即可知道目标是否可达；具体组合从目标出发
+    逐层回溯，每一步只走向上一层可达的和，不会走进死路，组合按需逐个生成。
+    """
+    __slots__ = ('numbers', 'target', 'order', 'layers')
+
+    def __init__(self, numbers: Sequence[int], target: int):
+        self.numbers = numbers
+        self.target = target
+        self.order = sorted(range(len(numbers)), key=lambda i: abs(numbers[i]))
+        values = [numbers[i] for i in self.order]
+
+        windows = _bitset_windows(values, target)
+        lo, hi = next(windows)
+        bits = 1 if lo <= 0 <= hi else 0
+        layers = [(lo, bits)]
+        for value, (new_lo, new_hi) in zip(values, windows):
+            if not bits or new_lo > new_hi:
+                bits = 0
+            else:
+                shift = lo - new_lo
+                moved = 0
+                for offset in (shift, shift + value, shift - value):
+                    moved |= bits << offset if offset >= 0 else bits >> -offset
+                bits = moved & ((1 << (new_hi - new_lo + 1)) - 1)
+            lo = new_lo
+            layers.append((lo, bits))
+        # 回溯时逐位查询，转为字节串后每次查询不再复制整个大整数
+        self.layers = [(lo, bits.to_bytes((bits.bit_length() + 7) // 8, 'little')) for lo, bits in layers]
+
+    def _has(self, layer: int, total: int) -> bool:
+        lo, data = self.layers[layer]
+        j = total - lo
+        return 0 <= j < len(data) * 8 and data[j >> 3] >> (j & 7) & 1 == 1
+
+    @property
+    def reachable(self) -> bool:
+        """目标值是否可由至少一个数的加减得到"""
+        if self.target == 0:
+            # 一个数都不用的空组合总能得到 0，需要找到一个非空组合
+            return next(self.solutions(), None) is not None
+        return self._has(len(self.layers) - 1, self.target)
+
+    def solutions(self) -> Iterator[Tuple[Tuple[int, ...], Tuple[int, ...]]]:
+        """
+        逐个回溯出全部组合
+
+        Yields:
+            (下标元组, 符号元组)，与 iter_signed_solutions 相同
+        """
+        if not self._has(len(self.layers) - 1, self.target):
+            return
+        order, numbers = self.order, self.numbers
+        # 栈中为 (已决定到第几层, 当前和, 已选的 (下标, 符号))；从最后一层往前决定每个数的用法
+        stack = [(len(order), self.target, ())]
+        while stack:
+            layer, total, terms = stack.pop()
+            if layer == 0:
+                if terms:
+                    chosen = sorted(terms)
+                    yield tuple(i for i, _ in chosen), tuple(sign for _, sign in chosen)
+                continue
+            index = order[layer - 1]
+            value = numbers[index]
+            for sign in (-1, 1, 0):
+                if self._has(layer - 1, total - sign * value):
+                    stack.append((layer - 1, total - sign * value, terms + ((index, sign),) if sign else terms))
+
+def choose_engine(numbers: Sequence[Any], target: Any) -> str:
+    """
+    按数值大小选择查找引擎
+
+    数值和目标都是整数、位集总位数不超过 BITSET_MAX_BITS，且估算开销低于折半搜索时使用 bitset，
+    否则使用 mitm。
+    """
+    if not all(type(value) is int for value in (*numbers, target)):
+        return 'mitm'
+    values = sorted(numbers, key=abs)
+    bits = sum(hi - lo + 1 for lo, hi in _bitset_windows(values, target) if lo <= hi)
+    n = len(numbers)
+    index_size = min((n + 1) // 2, MAX_INDEX_TERMS)
+    mitm_sums = 3 ** index_size + 3 ** (n - index_size)
+    return 'bitset' if bits <= BITSET_MAX_BITS and bits <= BITSET_BITS_PER_SUM * mitm_sums else 'mitm'
+
+# 并行查找时工作进程中的折半搜索数据和停止信号，由 _init_search_worker 设置
+_SEARCH: Optional[_MeetInTheMiddle] = None
+_STOP: Any = None
+
+def _init_search_worker(search: _MeetInTheMiddle, stop: Any) -> None:
+    """进程池初始化：fork 启动的工作进程直接继承父进程建好的索引，不需要序列化或重建"""
+    global _SEARCH, _STOP
+    _SEARCH = search
+    _STOP = stop
+
+def _search_unit(high_codes: range, deadline: Optional[float]) -> Tuple[List[Tuple[Tuple[int, ...], Tuple[int, ...]]], bool]:
+    """
+    在工作进程中查找一个搜索单元
+
+    Returns:
+        (找到的组合, 是否查找完整)；收到停止信号或超过截止时间时提前返回，第二项为 False
+    """
+    found = []
+    try:
+        for solution in _SEARCH.scan(high_codes, deadline, _STOP):
+            found.append(solution)
+    except TimeoutError:
+        return found, False
+    return found, True
+
+def _serial_scan(numbers: Sequence[Any], target: Any,
+                 deadline: Optional[float]) -> Iterator[Tuple[Tuple[int, ...], Tuple[int, ...]]]:
+    """单进程折半搜索，建立索引期间同样检查截止时间"""
+    try:
+        search = _MeetInTheMiddle(numbers, target, deadline)
+        yield from search.scan(range(len(search.high_sums)), deadline)
+    except TimeoutError:
+        return
+
+def _parallel_scan(numbers: Sequence[Any], target: Any, workers: int,
+                   deadline: Optional[float]) -> Iterator[Tuple[Tuple[int, ...], Tuple[int, ...]]]:
+    """
+    多进程折半搜索，按搜索单元的顺序输出
+
+    索引只在父进程建立一次，工作进程以 fork 方式启动，写时复制地共享索引，内存占用与进程数无关。
+    不支持 fork 的平台退回单进程查找，结果相同。
+
+    搜索单元由数值个数决定、互不重叠，因此输出与进程数无关，也不会重复，与单进程的输出完全相同。
+    超过截止时间、或调用方不再读取（生成器关闭）时设置停止信号，正在查找的单元在下一个
+    高位段组合前停止，尚未开始的单元直接取消；已输出的结果始终是完整结果的前缀。
+    """
+    import gc
+    import multiprocessing
+    from collections import deque
+    from concurrent.futures import Future, ProcessPoolExecutor
+
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        yield from _serial_scan(numbers, target, deadline)
+        return
+    try:
+        search = _MeetInTheMiddle(numbers, target, deadline)
+    except TimeoutError:
+        return
+
+    context = multiprocessing.get_context('fork')
+    stop = context.Event()
+    units = _search_units(len(numbers))
+    # 冻结现有对象：工作进程中的垃圾回收不再改写它们的对象头，索引所在的内存页保持共享
+    gc.freeze()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_search_worker,
+                                 initargs=(search, stop)) as pool:
+            def submit(unit: range) -> Future:
+                return pool.submit(_search_unit, unit, deadline)
+
+            # 每个进程保留两个在途单元，按提交顺序取结果
+            pending = deque(submit(unit) for unit in islice(units, workers * 2))
+            try:
+                while pending:
+                    # 最早提交的单元一定已在查找；工作进程自己检查截止时间，超时后至多一个检查间隔即返回已找到的部分
+                    found, complete = pending.popleft().result()
+                    unit = next(units, None)
+                    if unit is not None:
+                        pending.append(submit(unit))
+                    yield from found
+                    if not complete:
+                        return
+            finally:
+                stop.set()
+                pool.shutdown(wait=True, cancel_futures=True)
+    finally:
+        gc.unfreeze()
+
+def _bounded(solutions: Iterator[Tuple[Tuple[int, ...], Tuple[int, ...]]], max_terms: Optional[int],
+             limit: Optional[int], deadline: Optional[float]) -> Iterator[Tuple[Tuple[int, ...], Tuple[int, ...]]]:
+    """按项数过滤，输出 limit 个或超过截止时间后停止，并关闭底层的查找（通知并行查找的工作进程停止）"""
+    count = 0
+    try:
+        if limit is not None and limit <= 0:
+            return
+        for combo, signs in solutions:
+            if deadline is not None and time.time() >= deadline:
+                return
+            if max_terms is not None and len(combo) > max_terms:
+                continue
+            yield combo, signs
+            count += 1
+            if limit is not None and count >= limit:
+                return
+    finally:
+        close = getattr(solutions, 'close', None)
+        if close is not None:
+            close()
+
+def solve(numbers: Sequence[Any], target: Any, engine: str = 'auto', max_terms: Optional[int] = None,
+          limit: Optional[int] = None, timeout: Optional[float] = None,
+          workers: Optional[int] = None) -> Iterator[Tuple[Tuple[int, ...], Tuple[int, ...]]]:
+    """
+    用指定引擎查找加减组合
+
+    同样的输入和引擎总是按相同的顺序得到相同的组合，与是否并行、进程数无关；
+    limit 和 timeout 截断时得到的是完整结果的前缀。
+
+    Args:
+        numbers: 数值列表
+        target: 目标值
+        engine: auto、mitm 或 bitset（bitset 只支持整数）
+        max_terms: 组合最多包含的数值个数，None 表示不限制
+        limit: 最多输出的组合数，None 表示不限制
+        timeout: 墙上时间预算（秒），超时后停止查找
+        workers: 折半搜索的工作进程数，None 为单进程，0 为 CPU 核数；bitset 引擎始终单进程
+
+    Yields:
+        (下标元组, 符号元组)，下标升序；不同引擎生成的顺序不同
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"不支持的查找引擎: {engine}，可选 {', '.join(ENGINES)}")
+    if engine == 'auto':
+        engine = choose_engine(numbers, target)
+    deadline = None if timeout is None else time.time() + timeout
+    if engine == 'bitset':
+        if not all(type(value) is int for value in (*numbers, target)):
+            raise ValueError("bitset 引擎只支持整数数值和目标值")
+        solutions = SignedSumReachability(numbers, target).solutions()
+    elif workers is not None:
+        solutions = _parallel_scan(numbers, target, workers or os.cpu_count() or 1, deadline)
+    else:
+        solutions = _serial_scan(numbers, target, deadline)
+    return _bounded(solutions, max_terms, limit, deadline)
+
+def is_reachable(numbers: Sequence[Any], target: Any, engine: str = 'auto') -> bool:
+    """目标值能否由至少一个数的加减得到（bitset 引擎构建完位集即可回答，不需要回溯）"""
+    if engine not in ENGINES:
+        raise ValueError(f"不支持的查找引擎: {engine}，可选 {', '.join(ENGINES)}")
+    if engine == 'bitset' or (engine == 'auto' and choose_engine(numbers, target) == 'bitset'):
+        if not all(type(value) is int for value in (*numbers, target)):
+            raise ValueError("bitset 引擎只支持整数数值和目标值")
+        return SignedSumReachability(numbers, target).reachable
+    return next(iter_signed_solutions(numbers, target), None) is not None
+
+def format_expression(numbers: Sequence[Any], combo: Sequence[int], signs: Sequence[int]) -> str:
+    """格式化为 "536 +346 -55" 形式的表达式，开头的加号省略"""
+    expression = " ".join(f"{'+' if sign == 1 else '-'}{numbers[i]}" for i, sign in zip(combo, signs))
+    if expression.startswith("+"):
+        expression = expression[1:]
+    return expression
+
+class Solution:
+    """
+    一个加减组合的紧凑表示
+
+    mask 的第 i 位表示用到第 i 个数，negative 的第 i 位表示该数取减号；数值列表只保存引用，
+    表达式、数值等在读取时才生成。
+    """
+
+    __slots__ = ('numbers', 'target', 'mask', 'negative')
+
+    def __init__(self, numbers: Sequence[Any], target: Any, mask: int, negative: int = 0):
+        self.numbers = numbers
+        self.target = target
+        self.mask = mask
+        self.negative = negative
+
+    @classmethod
+    def from_terms(cls, numbers: Sequence[Any], target: Any, combo: Sequence[int],
+                   signs: Sequence[int]) -> 'Solution':
+        """由 (下标元组, 符号元组) 构造"""
+        mask = negative = 0
+        for i, sign in zip(combo, signs):
+            mask |= 1 << i
+            if sign < 0:
+                negative |= 1 << i
+        return cls(numbers, target, mask, negative)
+
+    @property
+    def indices(self) -> Tuple[int, ...]:
+        """用到的数值下标，升序"""
+        mask = self.mask
+        return tuple(i for i in range(mask.bit_length()) if mask >> i & 1)
+
+    @property
+    def signs(self) -> Tuple[int, ...]:
+        """与 indices 对应的符号，1 或 -1"""
+        return tuple(-1 if self.negative >> i & 1 else 1 for i in self.indices)
+
+    @property
+    def values(self) -> List[Any]:
+        """用到的数值"""
+        return [self.numbers[i] for i in self.indices]
+
+    @property
+    def expression(self) -> str:
+        """"536 +346 -55" 形式的表达式"""
+        return format_expression(self.numbers, self.indices, self.signs)
+
+    def __len__(self) -> int:
+        return self.mask.bit_count()
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Solution):
+            return NotImplemented
+        return (self.mask, self.negative) == (other.mask, other.negative)
+
+    def __hash__(self) -> int:
+        return hash((self.mask, self.negative))
+
+    def __repr__(self) -> str:
+        return f"Solution({self.expression!r})"
+
+    def sort_key(self) -> Tuple[int, Tuple[int, ...], List[bool]]:
+        """按项数、下标、符号（先加后减）排序的键"""
+        indices = self.indices
+        return len(indices), indices, [self.negative >> i & 1 == 1 for i in indices]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """{"expression", "numbers", "signs", "total"}"""
+        return {
+            'expression': self.expression,
+            'numbers': self.values,
+            'signs': list(self.signs),
+            'total': self.target,
+        }
+
+def _as_solutions(numbers: Sequence[Any], target: Any,
+                  solutions: Iterator[Tuple[Tuple[int, ...], Tuple[int, ...]]]) -> Iterator[Solution]:
+    """把引擎生成的 (下标元组, 符号元组) 转为 Solution，停止读取时关闭底层的查找"""
+    with closing(solutions):
+        for combo, signs in solutions:
+            yield Solution.from_terms(numbers, target, combo, signs)
+
+def iter_combinations(numbers: Sequence[Any], target: Any, max_terms: Optional[int] = None,
+                      engine: str = 'auto', limit: Optional[int] = None, timeout: Optional[float] = None,
+                      workers: Optional[int] = None) -> Iterator[Solution]:
+    """
+    按查找顺序逐个生成加减组合，不保存已生成的组合
+
+    参数与 solve 相同；顺序由引擎决定，需要排序时对结果按 Solution.sort_key 排序。
+
+    Yields:
+        Solution
+    """
+    return _as_solutions(numbers, target, solve(numbers, target, engine, max_terms, limit, timeout, workers))
+
+def find_combinations_to_target(numbers: Sequence[Any], target: Any, max_terms: Optional[int] = None,
+                                engine: str = 'auto', limit: Optional[int] = None,
+                                timeout: Optional[float] = None,
+                                workers: Optional[int] = None) -> List[Dict[str, Any]]:
     """
     找到数值组合，通过加减运算得到目标值
+
+    Args:
+        numbers: 数值列表
+        target: 目标值
+        max_terms: 组合最多包含的数值个数，None 表示不限制
+        engine: 查找引擎 auto、mitm 或 bitset；不截断时结果与引擎无关
+        limit: 最多查找的组合数（按引擎的查找顺序取前 limit 个），None 表示不限制
+        timeout: 墙上时间预算（秒），超时后返回已找到的组合
+        workers: 折半搜索的工作进程数，None 为单进程，0 为 CPU 核数
+
+    Returns:
+        [{"expression", "numbers", "signs", "total"}]，按项数、下标、符号（先加后减）排序；
+        组合很多时改用 iter_combinations
+    """
+    solutions = sorted(iter_combinations(numbers, target, max_terms, engine, limit, timeout, workers),
+                       key=Solution.sort_key)
+    return [solution.to_dict() for solution in solutions]
+
+def find_nearest_combinations(numbers: Sequence[Any], target: Any, k: int = 5, tolerance: Any = None,
+                              max_terms: Optional[int] = None) -> List[Dict[str, Any]]:
     """
-    from itertools import combinations, product
-    
+    查找加减和最接近目标值的 k 个组合（包括恰好等于目标值的组合）
+
+    与折半搜索同样划分数值：建立索引的一半的加减和排序一次，另一半逐个枚举，二分查找
+    最接近互补值的位置后向两侧展开；用大小为 k 的堆保存当前最好的组合，差值不小于堆中
+    最差的一个时停止展开。只枚举一遍，耗时与精确查找相当。差值相同的组合超过 k 个时保留先找到的。
+
+    Args:
+        numbers: 数值列表
+        target: 目标值
+        k: 返回的组合数
+        tolerance: 差值上限，None 表示不限制
+        max_terms: 组合最多包含的数值个数，None 表示不限制
+
+    Returns:
+        [{"expression", "numbers", "signs", "total", "diff"}]，按差值排序，差值相同时按项数、下标、
+        符号（先加后减）排序
+    """
+    import heapq
+    from bisect import bisect_left
+
+    if k <= 0:
+        return []
+    index_part, low_part, high_part = _mitm_parts(len(numbers))
+    index_sums = signed_sums([numbers[i] for i in index_part])
+    order = sorted(range(len(index_sums)), key=index_sums.__getitem__)
+    sorted_sums = [index_sums[code] for code in order]
+    low_sums = signed_sums([numbers[i] for i in low_part])
+    high_sums = signed_sums([numbers[i] for i in high_part])
+
+    # 堆顶为当前最差的组合: (-差值, -发现顺序, 索引段编码, 低位段编码, 高位段编码)
+    heap: List[Tuple[Any, ...]] = []
+    found = 0
+    for high_code, high_total in enumerate(high_sums):
+        for low_code, low_total in enumerate(low_sums):
+            rest = target - high_total - low_total
+            right = bisect_left(sorted_sums, rest)
+            left = right - 1
+            while left >= 0 or right < len(sorted_sums):
+                if right >= len(sorted_sums) or (left >= 0 and rest - sorted_sums[left] <= sorted_sums[right] - rest):
+                    diff, position = rest - sorted_sums[left], left
+                    left -= 1
+                else:
+                    diff, position = sorted_sums[right] - rest, right
+                    right += 1
+                if (tolerance is not None and diff > tolerance) or (len(heap) == k and diff >= -heap[0][0]):
+                    break
+                index_code = order[position]
+                if not (index_code or low_code or high_code):
+                    continue
+                if max_terms is not None and max_terms < sum(1 for _ in _decode(index_code, index_part)) \
+                        + sum(1 for _ in _decode(low_code, low_part)) + sum(1 for _ in _decode(high_code, high_part)):
+                    continue
+                found += 1
+                entry = (-diff, -found, index_code, low_code, high_code)
+                if len(heap) < k:
+                    heapq.heappush(heap, entry)
+                else:
+                    heapq.heapreplace(heap, entry)
+
     results = []
-    n = len(numbers)
-    
-    # 尝试不同数量的数字组合
-    for r in range(1, min(n + 1, 8)):  # 限制组合数量，避免计算量过大
-        for combo in combinations(range(n), r):
-            # 对于每个组合，尝试所有可能的加减号组合
-            for signs in product([1, -1], repeat=len(combo)):
-                total = sum(numbers[i] * sign for i, sign in zip(combo, signs))
-                if total == target:
-                    result_items = []
-                    for i, sign in zip(combo, signs):
-                        if sign == 1:
-                            result_items.append(f"+{numbers[i]}")
-                        else:
-                            result_items.append(f"-{numbers[i]}")
-                    
-                    # 格式化输出
-                    expression = " ".join(result_items)
-                    if expression.startswith("+"):
-                        expression = expression[1:]  # 去掉开头的加号
-                    
-                    results.append({
-                        'expression': expression,
-                        'numbers': [numbers[i] for i in combo],
-                        'signs': list(signs),
-                        'total': total
-                    })
-    
-    return results
-
-# 给定的数值
-numbers = [536, 346, 55, 910716, 145563, 16, 340715, 14585, 2829, 101, 4900222, 2314, 784172, 34684117, 86, 370, 22345]
-target = 2062
-
-print(f"寻找组合得到目标值: {target}")
-print(f"可用数值: {numbers}")
-print(f"数值总数: {len(numbers)}")
-print("-" * 50)
-
-# 查找组合
-results = find_combinations_to_target(numbers, target)
-
-if results:
-    print(f"找到 {len(results)} 个可能的组合:")
-    print()
-    
-    for i, result in enumerate(results[:10], 1):  # 只显示前10个结果
-        print(f"方案 {i}:")
-        print(f"  表达式: {result['expression']} = {result['total']}")
-        print(f"  使用数值: {result['numbers']}")
+    for _, _, index_code, low_code, high_code in heap:
+        terms = [*_decode(index_code, index_part), *_decode(low_code, low_part), *_decode(high_code, high_part)]
+        solution = Solution.from_terms(numbers, target, [i for i, _ in terms], [sign for _, sign in terms])
+        total = sum(numbers[i] * sign for i, sign in terms)
+        results.append((abs(total - target), solution.sort_key(), {
+            **solution.to_dict(), 'total': total, 'diff': abs(total - target)}))
+    results.sort(key=lambda item: item[:2])
+    return [result for _, _, result in results]
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='查找加减运算得到目标值的数值组合')
+    parser.add_argument('numbers', nargs='*', type=int, help='可用数值 (默认使用示例数值)')
+    parser.add_argument('-t', '--target', type=int, default=EXAMPLE_TARGET,
+                        help=f'目标值 (默认 {EXAMPLE_TARGET})')
+    parser.add_argument('--max-terms', type=int, help='组合最多包含的数值个数 (默认不限制)')
+    parser.add_argument('--show', type=int, default=10, help='最多显示的方案数 (默认 10)')
+    parser.add_argument('--engine', choices=ENGINES, default='auto',
+                        help='查找引擎: mitm 折半搜索，bitset 整数可达性位集，auto 按数值大小选择 (默认 auto)')
+    parser.add_argument('--reachable', action='store_true', help='只判断目标值能否得到，不列出组合')
+    parser.add_argument('--limit', type=int, help='找到指定数量的组合后停止')
+    parser.add_argument('--timeout', type=float, help='查找的时间预算（秒），超时后显示已找到的组合')
+    parser.add_argument('--workers', type=int, nargs='?', const=0, default=None,
+                        help='折半搜索使用多进程并行，可指定进程数 (默认 CPU 核数)')
+    parser.add_argument('--nearest', type=int, default=5, help='未找到组合时显示最接近的组合数 (默认 5)')
+    parser.add_argument('--tolerance', type=int, help='最接近的组合与目标值的差值上限 (默认不限制)')
+    args = parser.parse_args()
+
+    numbers = args.numbers or EXAMPLE_NUMBERS
+    target = args.target
+
+    print(f"寻找组合得到目标值: {target}")
+    print(f"可用数值: {numbers}")
+    print(f"数值总数: {len(numbers)}")
+    print("-" * 50)
+
+    if args.reachable:
+        print("目标值可以得到" if is_reachable(numbers, target, args.engine) else "目标值无法得到")
+        return
+
+    # 查找组合：只保留排在最前的 show 个，其余只计数
+    import heapq
+    count = 0
+
+    def counted(solutions: Iterator[Solution]) -> Iterator[Solution]:
+        nonlocal count
+        for count, solution in enumerate(solutions, 1):
+            yield solution
+
+    solutions = counted(iter_combinations(numbers, target, args.max_terms, args.engine,
+                                          args.limit, args.timeout, args.workers))
+    shown = heapq.nsmallest(args.show, solutions, key=Solution.sort_key)
+    for _ in solutions:  # --show 0 时 nsmallest 不读取，仍需计数
+        pass
+
+    if count:
+        print(f"找到 {count} 个可能的组合:")
         print()
-        
-    if len(results) > 10:
-        print(f"... 还有 {len(results) - 10} 个组合未显示")
-else:
-    print("未找到任何组合能够得到目标值 2062")
-    
+
+        for i, solution in enumerate(shown, 1):
+            print(f"方案 {i}:")
+            print(f"  表达式: {solution.expression} = {solution.target}")
+            print(f"  使用数值: {solution.values}")
+            print()
+
+        if count > args.show:
+            print(f"... 还有 {count - args.show} 个组合未显示")
+        return
+
+    print(f"未找到任何组合能够得到目标值 {target}")
+
     # 显示一些接近的结果
     print("\n尝试寻找最接近的组合...")
-    close_results = []
-    
-    # 简化搜索，只尝试较少的组合
-    for r in range(1, min(len(numbers) + 1, 6)):
-        for combo in combinations(range(len(numbers)), r):
-            for signs in product([1, -1], repeat=len(combo)):
-                total = sum(numbers[i] * sign for i, sign in zip(combo, signs))
-                diff = abs(total - target)
-                if diff < 1000:  # 差值小于1000的认为是接近的
-                    close_results.append({
-                        'total': total,
-                        'diff': diff,
-                        'combo': combo,
-                        'signs': signs
-                    })
-    
-    # 按差值排序，显示最接近的几个
-    close_results.sort(key=lambda x: x['diff'])
-    
+    close_results = find_nearest_combinations(numbers, target, args.nearest, args.tolerance, args.max_terms)
     if close_results:
         print("最接近的几个组合:")
-        for i, result in enumerate(close_results[:5], 1):
-            expression_parts = []
-            for j, sign in zip(result['combo'], result['signs']):
-                if sign == 1:
-                    expression_parts.append(f"+{numbers[j]}")
-                else:
-                    expression_parts.append(f"-{numbers[j]}")
-            
-            expression = " ".join(expression_parts)
-            if expression.startswith("+"):
-                expression = expression[1:]
-                
-            print(f"  {expression} = {result['total']} (差值: {result['diff']})")
\ No newline at end of file
+        for result in close_results:
+            print(f"  {result['expression']} = {result['total']} (差值: {result['diff']})")
+
+if __name__ == '__main__':
+    main()
@@ -3,16 +3,29 @@
 时间转换工具
 
 支持时间戳和日期之间的相互转换，支持多个时区。
-可以处理毫秒级时间戳，支持多种日期格式。
+可以处理秒、毫秒、微秒、纳秒级时间戳，支持多种日期格式。
+
+命令行参数定义、批量转换、分桶聚合、时间范围展开、csv 子命令、日志改写、时间索引、常驻服务、
+pytz/zoneinfo 时区后端和向量化接口分别在同目录的 time_transfer_cli、time_transfer_batch、
+time_transfer_aggregate、time_transfer_expand、time_transfer_csv、time_transfer_rewrite、
+time_transfer_index、time_transfer_serve、time_transfer_backends、time_transfer_vectorize 模块中，
+只在用到时导入。
 """
 
-import argparse
+# 启动速度优化：作为脚本运行时解释器每次都要重新编译本文件，这里只保留核心的转换和命令行分派。
+# 模块顶层只导入轻量的标准库，pytz、re、json、argparse 等较重的模块在真正用到的函数内部导入，
+# 无参数获取当前时间戳时完全不会加载它们。
 import datetime
-import pytz
+import math
+import os
 import time
 import sys
-import re
-from typing import Dict, Optional, Tuple, List
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, Optional, Tuple, List, Union
+
+if TYPE_CHECKING:
+    import re
 
 # 定义时区映射
 TIME_ZONES: Dict[str, Dict[str, str]] = {
@@ -85,65 +98,635 @@ DATE_FORMATS = [
     '%Y%m%d',                  # 20231011
 ]
 
-# 预编译正则表达式以提高性能
-TZ_PATTERNS = [
-    re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\s+([A-Z]{3,4})$'),  # YYYY-MM-DD HH:MM:SS TZ
-    re.compile(r'^(\d{4}/\d{2}/\d{2} \d{2}:\d{2}:\d{2})\s+([A-Z]{3,4})$'),  # YYYY/MM/DD HH:MM:SS TZ
+# 带时区缩写的日期正则，首次使用时才编译（见 get_tz_patterns）
+TZ_PATTERN_SOURCES = [
+    r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\s+([A-Z]{3,4})$',  # YYYY-MM-DD HH:MM:SS TZ
+    r'^(\d{4}/\d{2}/\d{2} \d{2}:\d{2}:\d{2})\s+([A-Z]{3,4})$',  # YYYY/MM/DD HH:MM:SS TZ
 ]
 
-def validate_timestamp(timestamp_str: str) -> float:
-    """验证并转换时间戳"""
+_TZ_PATTERNS: Optional[List['re.Pattern']] = None
+
+def get_tz_patterns() -> List['re.Pattern']:
+    """返回编译好的 TZ_PATTERNS，首次调用时编译并缓存"""
+    global _TZ_PATTERNS
+    if _TZ_PATTERNS is None:
+        import re
+        _TZ_PATTERNS = [re.compile(source) for source in TZ_PATTERN_SOURCES]
+    return _TZ_PATTERNS
+
+def __getattr__(name: str) -> Any:
+    # 兼容直接访问模块属性 TZ_PATTERNS 的旧用法，访问时才编译
+    if name == 'TZ_PATTERNS':
+        return get_tz_patterns()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# 时区缩写映射：缩写 -> 可能的时区列表（第一个为默认）
+TZ_ABBR_MAP: Dict[str, List[str]] = {
+    'CST': ['Asia/Shanghai', 'America/Chicago'],  # 中国标准时间或美国中部时间
+    'PST': ['America/Los_Angeles'],
+    'PDT': ['America/Los_Angeles'],
+    'EST': ['America/New_York'],
+    'EDT': ['America/New_York'],
+    'JST': ['Asia/Tokyo'],
+    'UTC': ['UTC'],
+    'GMT': ['UTC'],
+    'CET': ['Europe/Madrid'],
+    'CEST': ['Europe/Madrid'],
+    'AST': ['Asia/Riyadh'],
+    'MST': ['America/Denver'],
+    'MDT': ['America/Denver'],
+    'HST': ['Pacific/Honolulu'],
+    'AKST': ['America/Anchorage'],
+    'AKDT': ['America/Anchorage'],
+}
+
+# 时间戳单位 -> 每秒的计数
+TIMESTAMP_UNITS: Dict[str, int] = {'s': 1, 'ms': 1000, 'us': 10**6, 'ns': 10**9}
+
+# 时间戳的合理范围上限：2100-01-01 00:00:00 UTC
+_MAX_TIMESTAMP_SECONDS = 4102444800
+
+# 自动识别单位时按数量级判断: 秒级时间戳到 5138 年才达到 1e11，
+# 而 1e11 毫秒只是 1973 年，依此类推
+_AUTO_UNIT_LIMITS = ((10**11, 's'), (10**14, 'ms'), (10**17, 'us'))
+
+def detect_timestamp_unit(timestamp: Union[int, float]) -> str:
+    """按数量级识别时间戳单位，返回 s/ms/us/ns"""
+    magnitude = abs(timestamp)
+    for limit, unit in _AUTO_UNIT_LIMITS:
+        if magnitude < limit:
+            return unit
+    return 'ns'
+
+def _unit_scale(unit: str, timestamp: Optional[Union[int, float]] = None) -> int:
+    """
+    时间戳单位对应的每秒计数
+
+    unit 为 auto 时按 timestamp 的数量级识别；没有时间戳可供识别时（日期转时间戳）按毫秒处理。
+    """
+    if unit == 'auto':
+        unit = 'ms' if timestamp is None else detect_timestamp_unit(timestamp)
+    scale = TIMESTAMP_UNITS.get(unit)
+    if scale is None:
+        raise ValueError(f"不支持的时间戳单位: {unit}，可选: {', '.join(TIMESTAMP_UNITS)}, auto")
+    return scale
+
+def validate_timestamp(timestamp_str: str, unit: str = 'ms') -> Union[int, float]:
+    """
+    验证并转换时间戳
+
+    整数时间戳按 int 返回，后续换算全程使用整数运算，大数值的纳秒、微秒时间戳不会丢失精度；
+    带小数或指数的时间戳返回 float。
+
+    Args:
+        timestamp_str: 时间戳字符串
+        unit: 时间戳单位 s/ms/us/ns，auto 表示按数量级自动识别（默认毫秒）
+
+    Returns:
+        时间戳数值
+    """
+    value = timestamp_str.strip()
     try:
-        timestamp = float(timestamp_str.strip())
-        # 检查是否为合理的时间戳范围（1970-2100年）
-        if timestamp < 0 or timestamp > 4102444800000:  # 2100年的毫秒时间戳
-            raise ValueError("时间戳超出合理范围 (1970-2100年)")
-        return timestamp
-    except ValueError as e:
-        if "时间戳超出合理范围" in str(e):
-            raise e
-        raise ValueError(f"无效的时间戳格式，请输入数字: {timestamp_str}")
+        timestamp: Union[int, float] = int(value)
+    except ValueError:
+        try:
+            timestamp = float(value)
+        except ValueError:
+            raise ValueError(f"无效的时间戳格式，请输入数字: {timestamp_str}") from None
+    scale = _unit_scale(unit, timestamp)
+    # 检查是否为合理的时间戳范围（1970-2100年），NaN 同样视为超出范围
+    if not 0 <= timestamp <= _MAX_TIMESTAMP_SECONDS * scale:
+        raise ValueError("时间戳超出合理范围 (1970-2100年)")
+    return timestamp
 
-def parse_date_string(date_str: str) -> Tuple[datetime.datetime, Optional[str]]:
+# 形状签名：数字串、ASCII 字母串、空白串各折叠为一个占位符，
+# 例如 "2023-10-11 12:34:56" -> "9-9-9 9:9:9"，"20231011" -> "9"
+# (数字, 字母, 空白) 三个正则，首次计算签名时编译
+_SIG_PATTERNS: Optional[Tuple['re.Pattern', 're.Pattern', 're.Pattern']] = None
+
+def _shape_signature(value: str) -> str:
+    """计算字符串的形状签名"""
+    global _SIG_PATTERNS
+    if _SIG_PATTERNS is None:
+        import re
+        _SIG_PATTERNS = (re.compile(r'\d+'), re.compile(r'[A-Za-z]+'), re.compile(r'\s+'))
+    digits, alpha, space = _SIG_PATTERNS
+    return space.sub(' ', alpha.sub('a', digits.sub('9', value)))
+
+def _directive_samples() -> Dict[str, List[str]]:
     """
-    尝试解析多种日期格式
+    各格式指令可能匹配到的文本样例（按 strptime 的匹配规则覆盖所有签名形态）
+
+    %d 允许 " 5" 这种前导空格写法；%z 的冒号、秒和小数部分都是可选的。
+    """
+    am_pm = [datetime.time(1).strftime('%p'), datetime.time(13).strftime('%p')]
+    offsets = ['Z']
+    for sign in '+-':
+        for colon in ('', ':'):
+            base = f'{sign}08{colon}00'
+            offsets.append(base)
+            for sec_colon in ('', ':'):
+                offsets.append(f'{base}{sec_colon}00')
+                offsets.append(f'{base}{sec_colon}00.5')
+    return {
+        'Y': ['2023'], 'm': ['10'], 'd': ['11', ' 5'], 'H': ['12'], 'I': ['12'],
+        'M': ['34'], 'S': ['56'], 'f': ['123456'], 'p': am_pm, 'z': offsets,
+        'Z': ['CST'], '%': ['%'],
+    }
+
+# 各格式指令可匹配的最小/最大字符数，None 表示无上限
+_DIRECTIVE_WIDTHS = {
+    'Y': (4, 4), 'm': (1, 2), 'd': (1, 2), 'H': (1, 2), 'I': (1, 2),
+    'M': (1, 2), 'S': (1, 2), 'f': (1, 6), 'p': (1, None), 'z': (1, None),
+    'Z': (1, None), '%': (1, 1),
+}
+
+def _format_shape(fmt: str) -> Tuple[List[str], int, Optional[int]]:
+    """
+    推导日期格式可能匹配的全部形状签名及长度范围
 
     Returns:
-        tuple: (解析后的datetime对象, 检测到的时区信息或None)
+        (签名列表, 最小长度, 最大长度或None)
     """
-    date_str = date_str.strip()
+    samples = _directive_samples()
+    variants = ['']
+    min_len, max_len = 0, 0
+    i = 0
+    while i < len(fmt):
+        if fmt[i] == '%' and i + 1 < len(fmt):
+            directive = fmt[i + 1]
+            pieces = samples[directive]
+            low, high = _DIRECTIVE_WIDTHS[directive]
+            i += 2
+        else:
+            pieces = [fmt[i]]
+            # strptime 把格式中的空白当作 \s+，可以匹配任意长度的空白
+            low, high = (1, None) if fmt[i].isspace() else (1, 1)
+            i += 1
+        variants = [prefix + piece for prefix in variants for piece in pieces]
+        min_len += low
+        max_len = None if max_len is None or high is None else max_len + high
 
-    # 优化：首先尝试手动解析带时区缩写的格式
-    for pattern in TZ_PATTERNS:
-        match = pattern.match(date_str)
-        if match:
-            date_part, tz_abbr = match.groups()
-            try:
-                # 根据分隔符选择对应的格式
-                fmt = '%Y-%m-%d %H:%M:%S' if '-' in date_part else '%Y/%m/%d %H:%M:%S'
-                parsed_dt = datetime.datetime.strptime(date_part, fmt)
-                return parsed_dt, tz_abbr
-            except ValueError:
-                continue
-
-    # 然后尝试解析带时区偏移的格式
-    for fmt in ['%Y-%m-%d %H:%M:%S %z', '%Y/%m/%d %H:%M:%S %z']:
+    signatures = []
+    for variant in variants:
+        signature = _shape_signature(variant)
+        if signature not in signatures:
+            signatures.append(signature)
+    return signatures, min_len, max_len
+
+class _DateParser:
+    """
+    单个候选格式的解析器，不匹配时返回 None 而不是抛出异常
+
+    kind 取值:
+        abbr:   TZ_PATTERNS 中的正则，匹配后解析日期部分并返回时区缩写
+        offset: 带 %z 时区偏移的格式
+        plain:  不带时区信息的格式
+    """
+    __slots__ = ('kind', 'fmt', 'pattern', 'min_len', 'max_len')
+
+    def __init__(self, kind: str, fmt: str, pattern: Optional['re.Pattern'] = None,
+                 min_len: int = 0, max_len: Optional[int] = None):
+        self.kind = kind
+        self.fmt = fmt
+        self.pattern = pattern
+        self.min_len = min_len
+        self.max_len = max_len
+
+    def accepts_length(self, length: int) -> bool:
+        """字符串长度是否落在该格式可匹配的长度范围内"""
+        return self.min_len <= length and (self.max_len is None or length <= self.max_len)
+
+    def parse(self, date_str: str) -> Optional[Tuple[datetime.datetime, Optional[str]]]:
         try:
-            parsed_dt = datetime.datetime.strptime(date_str, fmt)
-            return parsed_dt.replace(tzinfo=None), str(parsed_dt.tzinfo)
+            if self.kind == 'plain':
+                return datetime.datetime.strptime(date_str, self.fmt), None
+            if self.kind == 'offset':
+                parsed_dt = datetime.datetime.strptime(date_str, self.fmt)
+                return parsed_dt.replace(tzinfo=None), str(parsed_dt.tzinfo)
+            match = self.pattern.match(date_str)
+            return self.parse_match(match) if match else None
         except ValueError:
-            continue
+            return None
+
+    def parse_match(self, match: 're.Match') -> Optional[Tuple[datetime.datetime, Optional[str]]]:
+        """由 TZ_PATTERNS 的匹配结果解析（kind 为 abbr）"""
+        try:
+            date_part, tz_abbr = match.groups()
+            # 根据分隔符选择对应的格式
+            fmt = '%Y-%m-%d %H:%M:%S' if '-' in date_part else '%Y/%m/%d %H:%M:%S'
+            return datetime.datetime.strptime(date_part, fmt), tz_abbr
+        except ValueError:
+            return None
+
+    def matched_format(self, date_str: str) -> str:
+        """解析成功时对应的 DATE_FORMATS 条目（时区缩写格式按分隔符区分）"""
+        if self.kind == 'abbr':
+            return '%Y-%m-%d %H:%M:%S %Z' if '-' in date_str else '%Y/%m/%d %H:%M:%S %Z'
+        return self.fmt
+
+    def __repr__(self) -> str:
+        return f'_DateParser({self.kind!r}, {self.fmt!r})'
+
+_FORMAT_DISPATCH: Optional[Dict[str, Tuple[_DateParser, ...]]] = None
 
-    # 最后尝试其他格式（跳过前面已处理的带时区格式）
+def _build_format_dispatch() -> Dict[str, Tuple[_DateParser, ...]]:
+    """
+    由 DATE_FORMATS 和 TZ_PATTERNS 预编译 形状签名 -> 候选解析器 的分派表
+
+    每个签名下的候选顺序与逐个尝试时的解析顺序一致：
+    先带时区缩写（TZ_PATTERNS），再带时区偏移（%z），最后是其余 DATE_FORMATS。
+    TZ_PATTERNS 的签名取自 DATE_FORMATS 中对应的 %Z 格式。
+    """
+    steps: List[Tuple[_DateParser, List[str]]] = []
+
+    abbr_signatures: List[str] = []
     for fmt in DATE_FORMATS:
-        # 跳过带时区的格式，因为已经在上面处理过了
-        if '%Z' in fmt or '%z' in fmt:
-            continue
+        if '%Z' in fmt:
+            abbr_signatures.extend(_format_shape(fmt)[0])
+    for pattern in get_tz_patterns():
+        steps.append((_DateParser('abbr', pattern.pattern, pattern), abbr_signatures))
+
+    for kind, fmts in (('offset', [fmt for fmt in DATE_FORMATS if '%z' in fmt]),
+                       ('plain', [fmt for fmt in DATE_FORMATS if '%Z' not in fmt and '%z' not in fmt])):
+        for fmt in fmts:
+            signatures, min_len, max_len = _format_shape(fmt)
+            steps.append((_DateParser(kind, fmt, min_len=min_len, max_len=max_len), signatures))
+
+    dispatch: Dict[str, List[_DateParser]] = {}
+    for parser, signatures in steps:
+        for signature in signatures:
+            candidates = dispatch.setdefault(signature, [])
+            if parser not in candidates:
+                candidates.append(parser)
+    return {signature: tuple(candidates) for signature, candidates in dispatch.items()}
+
+# 分派表中的时区缩写解析器，它们在各签名的候选中都排在最前，随分派表一起构建
+_ABBR_PARSERS: Tuple[_DateParser, ...] = ()
+
+def _get_format_dispatch() -> Dict[str, Tuple[_DateParser, ...]]:
+    """返回分派表，首次调用时构建"""
+    global _FORMAT_DISPATCH, _ABBR_PARSERS
+    if _FORMAT_DISPATCH is None:
+        _FORMAT_DISPATCH = _build_format_dispatch()
+        _ABBR_PARSERS = tuple({parser: None for candidates in _FORMAT_DISPATCH.values()
+                               for parser in candidates if parser.kind == 'abbr'})
+    return _FORMAT_DISPATCH
+
+def _format_candidates(date_str: str) -> Tuple[_DateParser, ...]:
+    """返回形状和长度都与字符串相符的候选解析器（按解析顺序）"""
+    candidates = _get_format_dispatch().get(_shape_signature(date_str), ())
+    length = len(date_str)
+    return tuple(parser for parser in candidates if parser.accepts_length(length))
+
+def _fast_parse(date_str: str) -> Optional[datetime.datetime]:
+    """
+    按固定位置切片解析最常用的几种格式，不匹配时返回 None 交给通用流程
+
+    覆盖:
+        %Y-%m-%d %H:%M:%S
+        %Y-%m-%dT%H:%M:%S、%Y-%m-%dT%H:%M:%SZ
+        %Y-%m-%dT%H:%M:%S.%f、%Y-%m-%dT%H:%M:%S.%fZ
+        %Y%m%d%H%M%S
+
+    这些格式在各自形状签名下都是第一个候选，且各字段为两位有效值时
+    strptime 的分组方式与固定切片一致，因此结果与通用流程相同。
+    """
+    length = len(date_str)
+    if length == 14:
+        if not (date_str.isascii() and date_str.isdigit()):
+            return None
         try:
-            parsed_dt = datetime.datetime.strptime(date_str, fmt)
-            return parsed_dt, None
+            return datetime.datetime(int(date_str[0:4]), int(date_str[4:6]), int(date_str[6:8]),
+                                     int(date_str[8:10]), int(date_str[10:12]), int(date_str[12:14]))
         except ValueError:
+            return None
+
+    if length < 19 or length > 27:
+        return None
+    if (date_str[4] != '-' or date_str[7] != '-' or date_str[13] != ':' or date_str[16] != ':'
+            or not date_str.isascii()):
+        return None
+
+    separator = date_str[10]
+    if length == 19:
+        if separator != ' ' and separator != 'T':
+            return None
+    else:
+        if separator != 'T':
+            return None
+        if date_str[-1] == 'Z':
+            date_str = date_str[:-1]
+        if len(date_str) > 19:
+            fraction = date_str[20:]
+            if date_str[19] != '.' or not (1 <= len(fraction) <= 6 and fraction.isdigit()):
+                return None
+
+    # 分隔符位置已校验，fromisoformat 会逐位校验其余字符均为数字
+    try:
+        return datetime.datetime.fromisoformat(date_str)
+    except ValueError:
+        return None
+
+class LRUCache:
+    """
+    有容量上限的 LRU 缓存，记录命中、未命中和淘汰次数
+
+    maxsize 为 0 时不缓存任何内容，get 始终未命中。
+    """
+
+    def __init__(self, maxsize: int):
+        if maxsize < 0:
+            raise ValueError(f"缓存容量不能为负数: {maxsize}")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: 'OrderedDict[Any, Any]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Any) -> Any:
+        """查找缓存，命中时把条目移到最近使用的位置；未命中返回 None"""
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Any, value: Any) -> None:
+        """写入缓存，超出容量时淘汰最久未使用的条目（不缓存 None）"""
+        if self.maxsize == 0 or value is None:
+            return
+        data = self._data
+        if key in data:
+            data.move_to_end(key)
+        data[key] = value
+        if len(data) > self.maxsize:
+            data.popitem(last=False)
+            self.evictions += 1
+
+    def resize(self, maxsize: int) -> None:
+        """调整容量，缩容时按最久未使用的顺序淘汰"""
+        if maxsize < 0:
+            raise ValueError(f"缓存容量不能为负数: {maxsize}")
+        self.maxsize = maxsize
+        while len(self._data) > maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """清空缓存并重置计数"""
+        self._data.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, float]:
+        """返回 hits, misses, evictions, size, maxsize, hit_rate"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+# 默认缓存容量：日志中的重复时间戳通常集中在很短的时间窗口内，几千条足够覆盖
+DEFAULT_CACHE_SIZE = 4096
+
+# 日期字符串 -> 解析结果；datetime 不可变，可以安全共享
+_PARSE_CACHE = LRUCache(DEFAULT_CACHE_SIZE)
+# (日期字符串, 目标时区) -> 毫秒时间戳；键包含完整输入，带时区缩写或偏移的输入同样正确
+_TIMESTAMP_CACHE = LRUCache(DEFAULT_CACHE_SIZE)
+# (UTC 秒, 时区) -> timestamp_to_date 的输出
+_FORMAT_CACHE = LRUCache(DEFAULT_CACHE_SIZE)
+
+def configure_cache(maxsize: int) -> None:
+    """设置解析缓存和转换结果缓存的容量，0 表示禁用缓存"""
+    _PARSE_CACHE.resize(maxsize)
+    _TIMESTAMP_CACHE.resize(maxsize)
+    _FORMAT_CACHE.resize(maxsize)
+
+def clear_caches() -> None:
+    """清空所有缓存及其统计"""
+    _PARSE_CACHE.clear()
+    _TIMESTAMP_CACHE.clear()
+    _FORMAT_CACHE.clear()
+
+def get_cache_stats() -> Dict[str, Dict[str, float]]:
+    """
+    获取缓存统计
+
+    Returns:
+        {'parse': {...}, 'timestamp': {...}, 'format': {...}}，
+        每项包含命中、未命中、淘汰次数及命中率
+    """
+    return {
+        'parse': _PARSE_CACHE.stats(),
+        'timestamp': _TIMESTAMP_CACHE.stats(),
+        'format': _FORMAT_CACHE.stats(),
+    }
+
+# 快速路径命中时在格式统计中使用的名称
+_FAST_PATH_LABEL = '快速路径'
+
+# 时区缩写的推断规则: 目标时区在候选列表中 / 取候选列表第一个 / 无法识别时沿用目标时区
+_ABBR_RULES = {'target': '目标时区', 'first': '首个候选', 'unknown': '未识别'}
+
+class ConversionStats:
+    """
+    热点路径的计数与计时
+
+    只在 enable_stats() 之后由转换函数写入；关闭时热点路径只多一次 None 判断。
+    timers 记录 [次数, 总秒数]，abbrs 以 (缩写, 推断出的时区, 规则) 为键。
+    """
+    __slots__ = ('counters', 'formats', 'abbrs', 'timers')
+
+    def __init__(self):
+        self.counters: Dict[str, int] = {}
+        self.formats: Dict[str, int] = {}
+        self.abbrs: Dict[Tuple[str, str, str], int] = {}
+        self.timers: Dict[str, List[float]] = {}
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_time(self, name: str, seconds: float, calls: int = 1) -> None:
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = [0, 0.0]
+        timer[0] += calls
+        timer[1] += seconds
+
+    def record_format(self, fmt: str) -> None:
+        self.formats[fmt] = self.formats.get(fmt, 0) + 1
+
+    def record_probe(self, fmt: Optional[str], attempts: int, seconds: float) -> None:
+        """记录一次逐格式探测: 命中的格式（无法解析时为 None）、尝试次数和耗时"""
+        self.count('parse.probes')
+        self.count('parse.attempts', attempts)
+        self.count('parse.failed_attempts', attempts - (fmt is not None))
+        if fmt is None:
+            self.count('parse.unparsable')
+        else:
+            self.record_format(fmt)
+        self.add_time('parse.probe', seconds)
+
+    def record_abbr(self, tz_abbr: str, timezone_str: str, rule: str) -> None:
+        key = (tz_abbr, timezone_str, rule)
+        self.abbrs[key] = self.abbrs.get(key, 0) + 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        """以可序列化为 JSON 的字典形式返回"""
+        return {
+            'counters': dict(self.counters),
+            'formats': dict(sorted(self.formats.items(), key=lambda item: -item[1])),
+            'abbreviations': [{'abbr': abbr, 'timezone': timezone_str, 'rule': rule, 'count': count}
+                              for (abbr, timezone_str, rule), count in self.abbrs.items()],
+            'timers': {name: {'calls': calls, 'total_seconds': seconds,
+                              'avg_us': seconds / calls * 1e6 if calls else 0.0}
+                       for name, (calls, seconds) in self.timers.items()},
+        }
+
+    def merge(self, other: Dict[str, Any]) -> None:
+        """合并 as_dict() 的结果，用于汇总并行模式各工作进程的统计"""
+        for name, n in other['counters'].items():
+            self.count(name, n)
+        for fmt, n in other['formats'].items():
+            self.formats[fmt] = self.formats.get(fmt, 0) + n
+        for item in other['abbreviations']:
+            key = (item['abbr'], item['timezone'], item['rule'])
+            self.abbrs[key] = self.abbrs.get(key, 0) + item['count']
+        for name, timer in other['timers'].items():
+            self.add_time(name, timer['total_seconds'], timer['calls'])
+
+_STATS: Optional[ConversionStats] = None
+
+def enable_stats() -> None:
+    """开启热点路径统计，并清空之前的统计结果"""
+    global _STATS
+    _STATS = ConversionStats()
+
+def disable_stats() -> None:
+    """关闭热点路径统计"""
+    global _STATS
+    _STATS = None
+
+def get_stats() -> Optional[Dict[str, Any]]:
+    """
+    获取热点路径统计
+
+    Returns:
+        未开启统计时返回 None；否则返回 counters, formats, abbreviations, timers
+        以及 caches（同 get_cache_stats）
+    """
+    if _STATS is None:
+        return None
+    stats = _STATS.as_dict()
+    stats['caches'] = get_cache_stats()
+    return stats
+
+def format_stats(stats: Dict[str, Any]) -> str:
+    """把 get_stats() 的结果格式化为多行文本报告"""
+    counters, timers = stats['counters'], stats['timers']
+    probes = counters.get('parse.probes', 0)
+    calls = counters.get('parse.fast_path', 0) + counters.get('parse.cache_hits', 0) + probes
+    lines = ['转换统计:',
+             f"  日期解析 {calls} 次: 快速路径 {counters.get('parse.fast_path', 0)}，"
+             f"缓存命中 {counters.get('parse.cache_hits', 0)}，逐格式探测 {probes}"]
+    if probes:
+        probe = timers['parse.probe']
+        lines.append(f"  逐格式探测: 尝试 {counters.get('parse.attempts', 0)} 次，"
+                     f"失败 {counters.get('parse.failed_attempts', 0)} 次，"
+                     f"无法解析 {counters.get('parse.unparsable', 0)} 个，平均 {probe['avg_us']:.1f} us")
+    if stats['formats']:
+        lines.append('  命中的格式:')
+        lines.extend(f'    {count:>10}  {fmt}' for fmt, count in stats['formats'].items())
+    if stats['abbreviations']:
+        lines.append('  时区缩写:')
+        for item in stats['abbreviations']:
+            rule = _ABBR_RULES.get(item['rule'], item['rule'])
+            lines.append(f"    {item['count']:>10}  {item['abbr']} -> {item['timezone']} ({rule})")
+    zone_timers = [(name, timer) for name, timer in timers.items() if name.startswith('zone.')]
+    if zone_timers:
+        lines.append('  时区换算:')
+        lines.extend(f"    {timer['calls']:>10}  {name[len('zone.'):]}，平均 {timer['avg_us']:.2f} us"
+                     for name, timer in zone_timers)
+    caches = stats.get('caches')
+    if caches:
+        lines.append('  缓存命中率: ' + '，'.join(f"{name} {cache['hit_rate']:.1%}"
+                                              for name, cache in caches.items()))
+    return '\n'.join(lines)
+
+def parse_date_string(date_str: str) -> Tuple[datetime.datetime, Optional[str]]:
+    """
+    尝试解析多种日期格式
+
+    最常用的格式先走固定位置切片的快速路径；其余输入按字符串形状直接定位
+    候选格式，只对候选格式调用 strptime，解析顺序与按 DATE_FORMATS
+    逐个尝试时完全一致。走 strptime 的结果会进入 LRU 缓存。
+
+    Returns:
+        tuple: (解析后的datetime对象, 检测到的时区信息或None)
+    """
+    date_str = date_str.strip()
+
+    parsed_dt = _fast_parse(date_str)
+    if parsed_dt is not None:
+        if _STATS is not None:
+            _STATS.count('parse.fast_path')
+            _STATS.record_format(_FAST_PATH_LABEL)
+        return parsed_dt, None
+
+    # 快速路径本身已经足够快，只有需要 strptime 的格式才值得缓存
+    result = _PARSE_CACHE.get(date_str)
+    if result is not None:
+        if _STATS is not None:
+            _STATS.count('parse.cache_hits')
+        return result
+
+    result = _probe_formats(date_str)[1]
+    _PARSE_CACHE.put(date_str, result)
+    return result
+
+def _probe_formats(date_str: str) -> Tuple[_DateParser, Tuple[datetime.datetime, Optional[str]]]:
+    """
+    按解析顺序逐个尝试候选格式（不含快速路径），输入应已去除首尾空白
+
+    Returns:
+        (命中的解析器, 解析结果)
+    """
+    stats = _STATS
+    start = time.perf_counter() if stats is not None else 0.0
+    attempts = 0
+    dispatch = _get_format_dispatch()
+    # 时区缩写解析器在各签名的候选中都排在最前：直接用正则判断，匹配成功时不必再计算形状签名
+    for parser in _ABBR_PARSERS:
+        match = parser.pattern.match(date_str)
+        if match:
+            attempts += 1
+            result = parser.parse_match(match)
+            if result is not None:
+                if stats is not None:
+                    stats.record_probe(parser.matched_format(date_str), attempts, time.perf_counter() - start)
+                return parser, result
+    length = len(date_str)
+    for parser in dispatch.get(_shape_signature(date_str), ()):
+        if parser.kind == 'abbr' or not parser.accepts_length(length):
             continue
+        attempts += 1
+        result = parser.parse(date_str)
+        if result is not None:
+            if stats is not None:
+                stats.record_probe(parser.matched_format(date_str), attempts, time.perf_counter() - start)
+            return parser, result
+
+    if stats is not None:
+        stats.record_probe(None, attempts, time.perf_counter() - start)
 
     # 提供更友好的错误信息
     common_formats = [
@@ -165,110 +748,442 @@ def detect_timezone_from_abbr(tz_abbr: str, target_timezone_str: str) -> str:
     Returns:
         推断的时区字符串
     """
-    # 扩展时区缩写映射
-    tz_abbr_map = {
-        'CST': ['Asia/Shanghai', 'America/Chicago'],  # 中国标准时间或美国中部时间
-        'PST': ['America/Los_Angeles'],
-        'PDT': ['America/Los_Angeles'],
-        'EST': ['America/New_York'],
-        'EDT': ['America/New_York'],
-        'JST': ['Asia/Tokyo'],
-        'UTC': ['UTC'],
-        'GMT': ['UTC'],
-        'CET': ['Europe/Madrid'],
-        'CEST': ['Europe/Madrid'],
-        'AST': ['Asia/Riyadh'],
-        'MST': ['America/Denver'],
-        'MDT': ['America/Denver'],
-        'HST': ['Pacific/Honolulu'],
-        'AKST': ['America/Anchorage'],
-        'AKDT': ['America/Anchorage'],
-    }
-
-    if tz_abbr in tz_abbr_map:
-        possible_timezones = tz_abbr_map[tz_abbr]
+    possible_timezones = TZ_ABBR_MAP.get(tz_abbr)
+    if possible_timezones:
         # 如果目标时区在可能的时区列表中，优先使用目标时区
         if target_timezone_str in possible_timezones:
-            return target_timezone_str
+            resolved, rule = target_timezone_str, 'target'
         # 否则使用第一个匹配的时区
-        return possible_timezones[0]
+        else:
+            resolved, rule = possible_timezones[0], 'first'
+    else:
+        # 如果无法识别时区缩写，使用目标时区
+        resolved, rule = target_timezone_str, 'unknown'
 
-    # 如果无法识别时区缩写，使用目标时区
-    return target_timezone_str
+    if _STATS is not None:
+        _STATS.record_abbr(tz_abbr, resolved, rule)
+    return resolved
 
-def timestamp_to_date(timestamp: float, timezone_str: str) -> str:
+# 1970-01-01 的朴素 datetime，用于在 datetime 与 Unix 秒之间换算
+_EPOCH_NAIVE = datetime.datetime(1970, 1, 1)
+
+# pytz 转换表的起点 (0001-01-01) 对应的 Unix 秒
+_FIRST_TRANSITION_SECONDS = (datetime.datetime.min - _EPOCH_NAIVE).days * 86400
+
+# pytz 在夏令时跳变的空档时刻会把时钟回拨 6 小时再定位
+_GAP_SHIFT_SECONDS = 6 * 3600
+
+class ZoneTable:
+    """
+    单个时区的 UTC 偏移转换表
+
+    由 pytz 的转换数据一次性构建：transitions 为升序的 UTC 转换时刻（Unix 秒），
+    offsets/dst/abbrs 为每个时刻起生效的 UTC 偏移（秒）、是否夏令时和时区缩写。
+    查询偏移只需一次二分查找，结果与 pytz 的 fromutc/localize 完全一致。
+    """
+    __slots__ = ('name', 'transitions', 'offsets', 'dst', 'abbrs', '_arrays')
+
+    def __init__(self, name: str, transitions: List[int], offsets: List[int],
+                 dst: List[bool], abbrs: List[str]):
+        self.name = name
+        self.transitions = transitions
+        self.offsets = offsets
+        self.dst = dst
+        self.abbrs = abbrs
+        self._arrays = None
+
+    @classmethod
+    def from_pytz(cls, timezone_str: str) -> 'ZoneTable':
+        """根据 pytz 时区数据构建转换表"""
+        import pytz
+        tz = pytz.timezone(timezone_str)
+        transition_times = getattr(tz, '_utc_transition_times', None)
+        if transition_times:
+            transitions = []
+            for moment in transition_times:
+                delta = moment - _EPOCH_NAIVE
+                transitions.append(delta.days * 86400 + delta.seconds)
+            infos = tz._transition_info
+            return cls(timezone_str, transitions,
+                       [int(info[0].total_seconds()) for info in infos],
+                       [bool(info[1]) for info in infos],
+                       [info[2] for info in infos])
+
+        # 固定偏移的时区（如 UTC）只有一个区间
+        reference = _EPOCH_NAIVE
+        return cls(timezone_str, [_FIRST_TRANSITION_SECONDS],
+                   [int(tz.utcoffset(reference).total_seconds())],
+                   [bool(tz.dst(reference))],
+                   [tz.tzname(reference)])
+
+    def index_at(self, utc_seconds: int) -> int:
+        """返回 UTC 时刻所在区间的下标"""
+        index = bisect_right(self.transitions, utc_seconds) - 1
+        return index if index > 0 else 0
+
+    def utc_offset(self, utc_seconds: int) -> Tuple[int, str]:
+        """
+        查询 UTC 时刻的偏移
+
+        Returns:
+            (UTC 偏移秒数, 时区缩写)
+        """
+        index = self.index_at(utc_seconds)
+        return self.offsets[index], self.abbrs[index]
+
+    def span(self, utc_seconds: int) -> Tuple[float, float, int, str]:
+        """
+        查询 UTC 时刻所在的偏移区间
+
+        Returns:
+            (区间起点, 区间终点(不含), UTC 偏移秒数, 时区缩写)，无界时为 ±inf
+        """
+        transitions = self.transitions
+        index = self.index_at(utc_seconds)
+        start = transitions[index] if index > 0 else -math.inf
+        end = transitions[index + 1] if index + 1 < len(transitions) else math.inf
+        return start, end, self.offsets[index], self.abbrs[index]
+
+    def local_to_utc(self, local_seconds: int, is_dst: Optional[bool] = False) -> int:
+        """
+        将本地墙上时间（按 Unix 秒计）转换为 UTC 秒，规则与 pytz.localize 相同
+
+        Args:
+            local_seconds: 本地时间相对 1970-01-01 00:00:00 的秒数
+            is_dst: 歧义或不存在的时间按夏令时(True)/标准时间(False)处理，None 时抛出异常
+
+        Returns:
+            UTC Unix 秒
+        """
+        offsets = self.offsets
+        candidates: Dict[int, int] = {}
+        for delta in (-86400, 86400):
+            offset = offsets[self.index_at(local_seconds + delta)]
+            utc_seconds = local_seconds - offset
+            index = self.index_at(utc_seconds)
+            # 换算回本地时间后墙上时间不变，说明该偏移有效
+            if offsets[index] == offset and utc_seconds not in candidates:
+                candidates[utc_seconds] = index
+
+        if len(candidates) == 1:
+            return next(iter(candidates))
+
+        if not candidates:
+            # 夏令时开始时被跳过的时间
+            if is_dst is None:
+                raise ValueError(f"本地时间不存在: {self._format_local(local_seconds)} ({self.name})")
+            if is_dst:
+                return self.local_to_utc(local_seconds + _GAP_SHIFT_SECONDS, True) - _GAP_SHIFT_SECONDS
+            return self.local_to_utc(local_seconds - _GAP_SHIFT_SECONDS, False) + _GAP_SHIFT_SECONDS
+
+        # 夏令时结束时重复出现的时间
+        if is_dst is None:
+            raise ValueError(f"本地时间有歧义: {self._format_local(local_seconds)} ({self.name})")
+        matched = [utc for utc, index in candidates.items() if self.dst[index] == is_dst]
+        if len(matched) == 1:
+            return matched[0]
+        if not matched:
+            matched = list(candidates)
+        return min(matched) if is_dst else max(matched)
+
+    @staticmethod
+    def _format_local(local_seconds: int) -> str:
+        return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(local_seconds))
+
+    def as_arrays(self) -> Tuple[Any, Any, Any, Any]:
+        """
+        以 numpy 数组形式返回转换表，首次调用时构建
+
+        Returns:
+            (transitions int64, offsets int64, dst bool, abbrs str)
+        """
+        if self._arrays is None:
+            np = _require_numpy()
+            self._arrays = (np.array(self.transitions, dtype=np.int64),
+                            np.array(self.offsets, dtype=np.int64),
+                            np.array(self.dst, dtype=bool),
+                            np.array(self.abbrs, dtype=str))
+        return self._arrays
+
+_ZONE_TABLES: Dict[str, ZoneTable] = {}
+
+def get_zone_table(timezone_str: str) -> ZoneTable:
+    """获取时区转换表，首次使用时构建并缓存（TIME_ZONES 之外的时区同样适用）"""
+    table = _ZONE_TABLES.get(timezone_str)
+    if table is None:
+        table = _ZONE_TABLES[timezone_str] = ZoneTable.from_pytz(timezone_str)
+    return table
+
+def build_zone_tables() -> None:
+    """预先为 TIME_ZONES 中的全部时区构建转换表"""
+    for tz_info in TIME_ZONES.values():
+        get_zone_table(tz_info['tz'])
+
+# 时区后端: table 为由 pytz 数据预计算的转换表（默认），pytz/zoneinfo 每次查询调用对应的库。
+# 向量化接口依赖转换表的数组形式，始终使用 table。
+TZ_BACKENDS = ('table', 'pytz', 'zoneinfo')
+DEFAULT_TZ_BACKEND = 'table'
+TZ_BACKEND_ENV = 'TIME_TRANSFER_TZ_BACKEND'
+
+_TZ_BACKEND: Optional[str] = None
+_ZONES: Dict[str, Any] = {}
+
+def get_tz_backend() -> str:
+    """当前时区后端，未设置时读取环境变量 TIME_TRANSFER_TZ_BACKEND"""
+    global _TZ_BACKEND
+    if _TZ_BACKEND is None:
+        backend = os.environ.get(TZ_BACKEND_ENV) or DEFAULT_TZ_BACKEND
+        if backend not in TZ_BACKENDS:
+            raise ValueError(f"不支持的时区后端: {backend}，可选: {', '.join(TZ_BACKENDS)}")
+        _TZ_BACKEND = backend
+    return _TZ_BACKEND
+
+def set_tz_backend(backend: str) -> None:
+    """切换时区后端，并清空依赖时区计算结果的缓存"""
+    global _TZ_BACKEND
+    if backend not in TZ_BACKENDS:
+        raise ValueError(f"不支持的时区后端: {backend}，可选: {', '.join(TZ_BACKENDS)}")
+    _TZ_BACKEND = backend
+    _ZONES.clear()
+    _ZONE_FORMATTERS.clear()
+    clear_caches()
+
+def _load_feature(name: str) -> Any:
+    """按需导入同目录下的功能模块 time_transfer_<name>"""
+    import importlib
+    if __package__:
+        return importlib.import_module(f'.time_transfer_{name}', __package__)
+    # 直接运行 tools 目录下的脚本时没有 tools 包，功能模块是顶层模块
+    return importlib.import_module(f'time_transfer_{name}')
+
+def get_zone(timezone_str: str) -> Any:
+    """
+    按当前时区后端获取时区对象，首次使用时创建并缓存
+
+    返回的对象提供 utc_offset、span、local_to_utc 三个方法，语义与 ZoneTable 相同。
+    """
+    zone = _ZONES.get(timezone_str)
+    if zone is None:
+        backend = get_tz_backend()
+        if backend == 'table':
+            zone = get_zone_table(timezone_str)
+        elif backend == 'pytz':
+            zone = _load_feature('backends').PytzZone(timezone_str)
+        else:
+            zone = _load_feature('backends').ZoneInfoZone(timezone_str)
+        _ZONES[timezone_str] = zone
+    return zone
+
+def _timestamp_to_seconds(timestamp: Union[int, float], scale: int = 1000) -> int:
+    """
+    将时间戳换算为 UTC 整秒
+
+    整数输入直接整除，不经过浮点；浮点输入按 datetime.fromtimestamp 的规则先舍入到微秒再取整秒，保证结果一致。
+
+    Args:
+        timestamp: 时间戳
+        scale: 每秒的计数，毫秒为 1000
+    """
+    if isinstance(timestamp, int):
+        return timestamp // scale
+    fraction, whole = math.modf(timestamp / scale)
+    microsecond = round(fraction * 1e6)
+    seconds = int(whole)
+    if microsecond >= 1000000:
+        seconds += 1
+    elif microsecond < 0:
+        seconds -= 1
+    return seconds
+
+# 00-59 的两位数字串，拼接时分秒时查表比格式化整数快一个数量级
+_TWO_DIGITS = [f'{i:02d}' for i in range(60)]
+
+class _ZoneFormatter:
+    """
+    按时区增量格式化 UTC 秒
+
+    记住当前所在的偏移区间和本地日期，秒数推进时只重新拼接时分秒；
+    越过偏移区间边界（如夏令时切换）时重新查表，缩写随偏移一起更新。
+    """
+    __slots__ = ('zone', 'span_start', 'span_end', 'offset', 'abbr', 'day', 'day_prefix')
+
+    def __init__(self, zone: Any):
+        self.zone = zone
+        self.span_start = self.span_end = 0
+        self.offset, self.abbr = 0, ''
+        self.day = None
+        self.day_prefix = ''
+
+    def render(self, utc_seconds: int) -> str:
+        """格式化为 '%Y-%m-%d %H:%M:%S 缩写'"""
+        if not self.span_start <= utc_seconds < self.span_end:
+            self.span_start, self.span_end, self.offset, self.abbr = self.zone.span(utc_seconds)
+        day, second_of_day = divmod(utc_seconds + self.offset, 86400)
+        if day != self.day:
+            self.day = day
+            self.day_prefix = time.strftime('%Y-%m-%d ', time.gmtime(day * 86400))
+        hour, rest = divmod(second_of_day, 3600)
+        minute, second = divmod(rest, 60)
+        digits = _TWO_DIGITS
+        return f"{self.day_prefix}{digits[hour]}:{digits[minute]}:{digits[second]} {self.abbr}"
+
+_ZONE_FORMATTERS: Dict[str, _ZoneFormatter] = {}
+
+def _get_zone_formatter(timezone_str: str) -> _ZoneFormatter:
+    formatter = _ZONE_FORMATTERS.get(timezone_str)
+    if formatter is None:
+        formatter = _ZONE_FORMATTERS[timezone_str] = _ZoneFormatter(get_zone(timezone_str))
+    return formatter
+
+def timestamp_to_date(timestamp: Union[int, float], timezone_str: str, unit: str = 'ms') -> str:
     """
     将时间戳转换为指定时区的日期字符串
 
     Args:
-        timestamp: 毫秒级时间戳
+        timestamp: 时间戳，默认为毫秒级
         timezone_str: 时区字符串
+        unit: 时间戳单位 s/ms/us/ns，auto 表示按数量级自动识别
 
     Returns:
         格式化的日期字符串
     """
     try:
-        # 修复deprecation warning：使用新的API
-        utc_time = datetime.datetime.fromtimestamp(timestamp / 1000, tz=datetime.timezone.utc)
+        scale = 1000 if unit == 'ms' else _unit_scale(unit, timestamp)
+        utc_seconds = _timestamp_to_seconds(timestamp, scale)
+        # 同一秒内的毫秒时间戳格式化结果相同，按 (UTC 秒, 时区) 缓存
+        cache_key = (utc_seconds, timezone_str)
+        text = _FORMAT_CACHE.get(cache_key)
+        if text is None:
+            if _STATS is None:
+                text = _get_zone_formatter(timezone_str).render(utc_seconds)
+            else:
+                start = time.perf_counter()
+                text = _get_zone_formatter(timezone_str).render(utc_seconds)
+                _STATS.add_time('zone.render', time.perf_counter() - start)
+            _FORMAT_CACHE.put(cache_key, text)
+        return text
+    except Exception as e:
+        raise ValueError(f"时间戳转换失败: {e}")
 
-        # 获取目标时区
-        target_timezone = pytz.timezone(timezone_str)
+def render_all_zones(timestamp: Union[int, float], timezones: Optional[Iterable[str]] = None,
+                     unit: str = 'ms') -> Dict[str, str]:
+    """
+    将同一时刻一次性转换为多个时区的日期字符串
 
-        # 将UTC时间转换为目标时区时间
-        target_time = utc_time.astimezone(target_timezone)
+    UTC 秒只换算一次，每个时区只需在转换表中查出偏移并加到 UTC 秒上；
+    本地日期相同的时区共用同一个日期前缀，时分秒查表拼接。
 
-        return target_time.strftime('%Y-%m-%d %H:%M:%S %Z')
+    Args:
+        timestamp: 时间戳，默认为毫秒级
+        timezones: 时区字符串列表，默认为 TIME_ZONES 中的全部时区
+        unit: 时间戳单位 s/ms/us/ns，auto 表示按数量级自动识别
+
+    Returns:
+        时区字符串 -> 与 timestamp_to_date 格式相同的日期字符串，顺序与 timezones 一致
+    """
+    if timezones is None:
+        timezones = [tz_info['tz'] for tz_info in TIME_ZONES.values()]
+    start = time.perf_counter() if _STATS is not None else 0.0
+    try:
+        utc_seconds = _timestamp_to_seconds(timestamp, _unit_scale(unit, timestamp))
+        digits = _TWO_DIGITS
+        day_prefixes: Dict[int, str] = {}
+        rendered = {}
+        for timezone_str in timezones:
+            offset, abbr = get_zone(timezone_str).utc_offset(utc_seconds)
+            day, second_of_day = divmod(utc_seconds + offset, 86400)
+            day_prefix = day_prefixes.get(day)
+            if day_prefix is None:
+                day_prefix = day_prefixes[day] = time.strftime('%Y-%m-%d ', time.gmtime(day * 86400))
+            hour, rest = divmod(second_of_day, 3600)
+            minute, second = divmod(rest, 60)
+            rendered[timezone_str] = f"{day_prefix}{digits[hour]}:{digits[minute]}:{digits[second]} {abbr}"
+        if _STATS is not None:
+            _STATS.add_time('zone.fanout', time.perf_counter() - start)
+        return rendered
     except Exception as e:
         raise ValueError(f"时间戳转换失败: {e}")
 
-def date_to_timestamp(date_str: str, timezone_str: str) -> int:
+def date_to_timestamp(date_str: str, timezone_str: str, unit: str = 'ms') -> int:
     """
-    将日期字符串转换为毫秒级时间戳
+    将日期字符串转换为时间戳
 
     Args:
         date_str: 日期字符串
         timezone_str: 时区字符串
+        unit: 输出的时间戳单位 s/ms/us/ns（auto 按毫秒输出）
 
     Returns:
-        毫秒级时间戳
+        整数时间戳，默认为毫秒级
     """
-    try:
-        # 获取目标时区
-        target_timezone = pytz.timezone(timezone_str)
-
-        # 解析日期字符串
-        target_time, detected_tz_abbr = parse_date_string(date_str)
-
-        # 如果检测到时区缩写，根据目标时区推断实际时区
-        if detected_tz_abbr:
-            actual_timezone_str = detect_timezone_from_abbr(detected_tz_abbr, timezone_str)
-            actual_timezone = pytz.timezone(actual_timezone_str)
-            # 使用检测到的时区进行本地化
-            target_time = actual_timezone.localize(target_time)
-        else:
-            # 没有检测到时区信息，使用指定的目标时区
-            target_time = target_timezone.localize(target_time)
+    # 缓存的是 UTC 微秒数，各种单位共用同一份缓存
+    cache_key = (date_str, timezone_str)
+    micros = _TIMESTAMP_CACHE.get(cache_key)
+    if micros is None:
+        try:
+            # 获取目标时区
+            get_zone(timezone_str)
 
-        # 转换为UTC时间戳并返回毫秒级时间戳
-        timestamp = int(target_time.astimezone(pytz.utc).timestamp() * 1000)
+            # 解析日期字符串
+            target_time, detected_tz_abbr = parse_date_string(date_str)
+            micros = _parsed_to_micros(target_time, detected_tz_abbr, timezone_str)
+        except Exception as e:
+            raise ValueError(f"日期转换失败: {e}")
+        _TIMESTAMP_CACHE.put(cache_key, micros)
+    return _micros_to_unit(micros, unit)
 
-        return timestamp
-    except Exception as e:
-        raise ValueError(f"日期转换失败: {e}")
+def _parsed_to_micros(target_time: datetime.datetime, detected_tz_abbr: Optional[str],
+                      timezone_str: str) -> int:
+    """将 parse_date_string 的解析结果按时区换算为 UTC 微秒数"""
+    # 如果检测到时区缩写，根据目标时区推断实际时区；否则使用指定的目标时区
+    if detected_tz_abbr:
+        timezone_str = detect_timezone_from_abbr(detected_tz_abbr, timezone_str)
+    zone = get_zone(timezone_str)
+
+    delta = target_time - _EPOCH_NAIVE
+    if _STATS is None:
+        utc_seconds = zone.local_to_utc(delta.days * 86400 + delta.seconds)
+    else:
+        start = time.perf_counter()
+        utc_seconds = zone.local_to_utc(delta.days * 86400 + delta.seconds)
+        _STATS.add_time('zone.local_to_utc', time.perf_counter() - start)
+    return utc_seconds * 10**6 + delta.microseconds
+
+def _micros_to_unit(micros: int, unit: str) -> int:
+    """UTC 微秒数换算为指定单位的整数时间戳，不足一个单位的部分向下取整"""
+    if unit == 'ms':
+        return micros // 1000
+    return micros * _unit_scale(unit) // 10**6
+
+def _require_numpy():
+    """按需导入 numpy，向量化接口之外的功能不依赖 numpy"""
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("向量化接口需要 numpy，请安装可选依赖: uv sync --extra vectorize "
+                          "或 pip install 'uv-project[vectorize]'") from None
+    return numpy
 
 def get_current_time_info() -> str:
     """获取当前时间的详细信息"""
-    current_timestamp = int(time.time() * 1000)
-    current_utc = datetime.datetime.now(tz=datetime.timezone.utc)
+    return format_all_zones(int(time.time() * 1000), label='当前时间戳')
+
+def format_all_zones(timestamp: Union[int, float], unit: str = 'ms', label: str = '时间戳') -> str:
+    """
+    列出同一时刻在 TIME_ZONES 各时区的时间
 
-    info_lines = [f"当前时间戳: {current_timestamp}"]
+    Args:
+        timestamp: 时间戳，默认为毫秒级
+        unit: 时间戳单位 s/ms/us/ns/auto
+        label: 首行时间戳的标题
 
-    # 显示各个时区的当前时间
+    Returns:
+        首行为时间戳，其后每行一个时区
+    """
+    rendered = render_all_zones(timestamp, unit=unit)
+    info_lines = [f"{label}: {timestamp}"]
     for tz_key, tz_info in TIME_ZONES.items():
-        tz = pytz.timezone(tz_info['tz'])
-        local_time = current_utc.astimezone(tz)
-        info_lines.append(f"{tz_key}. {tz_info['name']}: {local_time.strftime('%Y-%m-%d %H:%M:%S %Z')}")
-
+        info_lines.append(f"{tz_key}. {tz_info['name']}: {rendered[tz_info['tz']]}")
     return '\n'.join(info_lines)
 
 def print_timezone_help():
@@ -293,46 +1208,157 @@ def print_format_help():
     for example in examples:
         print(f"  {example}")
 
+def convert_value(value: str, mode: str, timezone_str: str, unit: str = 'ms') -> Any:
+    """
+    按转换模式转换单个值
+
+    Args:
+        value: 时间戳或日期字符串
+        mode: to_date 或 to_timestamp
+        timezone_str: 时区字符串
+        unit: 时间戳单位 s/ms/us/ns/auto
+
+    Returns:
+        to_date 返回日期字符串，to_timestamp 返回整数时间戳
+    """
+    if mode == 'to_date':
+        return timestamp_to_date(validate_timestamp(value, unit), timezone_str, unit)
+    if mode == 'to_timestamp':
+        return date_to_timestamp(value, timezone_str, unit)
+    raise ValueError(f"不支持的转换模式: {mode}")
+
+def iter_input_lines(stream: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    """
+    逐行读取输入流，跳过空行
+
+    Yields:
+        (行号, 去掉首尾空白的行内容)，行号从 1 开始
+    """
+    for line_no, line in enumerate(stream, 1):
+        value = line.strip()
+        if value:
+            yield line_no, value
+
+def convert_stream(lines: Iterable[Tuple[int, str]], mode: str, timezone_str: str,
+                   unit: str = 'ms') -> Iterator[Tuple[int, str, Any, Optional[str]]]:
+    """
+    惰性转换行流，单行失败不会中断整个流
+
+    Yields:
+        (行号, 输入值, 转换结果或None, 错误信息或None)
+    """
+    for line_no, value in lines:
+        try:
+            yield line_no, value, convert_value(value, mode, timezone_str, unit), None
+        except ValueError as e:
+            yield line_no, value, None, str(e)
+
+def batch_record(value: str, result: Any, error: Optional[str]) -> Dict[str, Any]:
+    """单条批量转换结果: {"input", "output"} 或 {"input", "error"}"""
+    record = {'input': value}
+    if error is None:
+        record['output'] = result
+    else:
+        record['error'] = error
+    return record
+
+def format_batch_record(value: str, result: Any, error: Optional[str], output_format: str) -> str:
+    """将单条批量转换结果格式化为一行输出（不含换行符）"""
+    if output_format == 'tsv':
+        # 列顺序: 输入值, 转换结果, 错误信息（成功时为空）
+        return '\t'.join((value, '' if result is None else str(result), error or ''))
+    import json
+    return json.dumps(batch_record(value, result, error), ensure_ascii=False)
+
+# 并行文件模式的默认分块大小（字节）
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+def parse_size(size_str: str) -> int:
+    """
+    解析字节大小，支持 K/M/G 后缀（1024 进制）
+
+    Args:
+        size_str: 如 "65536"、"512K"、"4M"
+
+    Returns:
+        字节数
+    """
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    text = size_str.strip().upper().rstrip('B')
+    multiplier = 1
+    if text and text[-1] in units:
+        multiplier = units[text[-1]]
+        text = text[:-1]
+    try:
+        size = int(text) * multiplier
+    except ValueError:
+        raise ValueError(f"无效的大小: {size_str}")
+    if size <= 0:
+        raise ValueError(f"大小必须为正数: {size_str}")
+    return size
+
+# 分桶聚合支持的桶大小（秒），均按目标时区的本地时间对齐
+AGGREGATE_BUCKETS = {'minute': 60, 'hour': 3600, 'day': 86400}
+
+def _parse_time_bound(value: str, timezone_str: str) -> int:
+    """
+    解析范围查询、--expand 的边界：日期字符串（按指定时区）或毫秒时间戳
+
+    10 位及以上的纯数字先按毫秒时间戳解析，避免 1712101010101 这类值被当作 %Y%m%d%H%M%S
+    等紧凑日期格式；超出时间戳范围时（如 20231011123456）再按日期解析。
+    """
+    text = value.strip()
+    if len(text) >= 10 and text.isdigit():
+        try:
+            return int(validate_timestamp(text))
+        except ValueError:
+            return date_to_timestamp(text, timezone_str)
+    try:
+        return date_to_timestamp(value, timezone_str)
+    except ValueError:
+        return int(validate_timestamp(value))
+
+# 稀疏时间索引的默认采样间隔（行），也是 --index-every 的默认值
+DEFAULT_INDEX_EVERY = 1000
+
+def resolve_timezone(timezone: str) -> str:
+    """
+    将时区编号（如 "1"）或时区名称（如 "Asia/Shanghai"）解析为时区字符串
+
+    Raises:
+        ValueError: 时区不存在
+    """
+    if timezone in TIME_ZONES:
+        return TIME_ZONES[timezone]['tz']
+    try:
+        get_zone(timezone)
+    except (KeyError, ValueError):
+        # pytz 和 zoneinfo 的"时区不存在"异常都是 KeyError 的子类
+        raise ValueError(f"未知时区: {timezone}")
+    return timezone
+
 def main():
-    parser = argparse.ArgumentParser(
-        description='时间转换工具 - 支持时间戳和日期之间的相互转换',
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
-使用示例:
-  获取当前时间戳:
-    python time_transfer.py
-    
-  时间戳转日期 (上海时区):
-    python time_transfer.py -m to_date -v 1697049600000 -t 1
-    
-  日期转时间戳 (美西时区):
-    python time_transfer.py -m to_timestamp -v "2023-10-11 12:34:56" -t 2
-    
-  显示当前各时区时间:
-    python time_transfer.py --current-time
-    
-  显示时区列表:
-    python time_transfer.py --list-timezones
-    
-  显示支持的日期格式:
-    python time_transfer.py --list-formats
-        """
-    )
-
-    parser.add_argument('-m', '--mode', choices=['to_date', 'to_timestamp'],
-                        help='转换模式: to_date (时间戳转日期) 或 to_timestamp (日期转时间戳)')
-    parser.add_argument('-v', '--value', help='要转换的时间戳或日期字符串')
-    parser.add_argument('-t', '--timezone', choices=TIME_ZONES.keys(),
-                        help='时区选择 (使用 --list-timezones 查看所有可用时区)')
-    parser.add_argument('--current-time', action='store_true',
-                        help='显示当前各时区时间')
-    parser.add_argument('--list-timezones', action='store_true',
-                        help='显示所有可用时区')
-    parser.add_argument('--list-formats', action='store_true',
-                        help='显示支持的日期格式示例')
+    # 快速路径：最常见的两种调用不需要解析参数，也不必加载 argparse
+    argv = sys.argv[1:]
+    if not argv:
+        # 没有传入任何参数，返回当前时间戳（毫秒级）
+        print(int(time.time() * 1000), end='')
+        return
+    if argv == ['--current-time']:
+        print(get_current_time_info())
+        return
 
+    parser = _load_feature('cli').build_parser()
     args = parser.parse_args()
 
+    if args.cache_size < 0:
+        parser.error('--cache-size 不能为负数')
+    configure_cache(args.cache_size)
+    if args.tz_backend:
+        set_tz_backend(args.tz_backend)
+    if args.stats:
+        enable_stats()
+
     # 处理特殊参数
     if args.list_timezones:
         print_timezone_help()
@@ -346,6 +1372,68 @@ def main():
         print_format_help()
         return
 
+    if args.all_zones:
+        try:
+            if args.value is None:
+                print(get_current_time_info())
+            else:
+                print(format_all_zones(validate_timestamp(args.value, args.unit), args.unit))
+        except ValueError as e:
+            print(f'错误: {e}', file=sys.stderr)
+            sys.exit(1)
+        return
+
+    if args.command == 'csv':
+        _load_feature('csv').run_csv_cli(args)
+        return
+
+    if args.serve:
+        _load_feature('serve').run_server_cli(args)
+        return
+
+    if args.rewrite:
+        if not args.source_tz or not args.target_tz:
+            print('错误: 改写模式需要 --source-tz 和 --target-tz 参数', file=sys.stderr)
+            sys.exit(1)
+        _load_feature('rewrite').run_rewrite_cli(args)
+        return
+
+    if args.expand:
+        if not args.timezone or args.time_from is None or args.time_to is None:
+            print('错误: --expand 需要 -t、--from 和 --to 参数', file=sys.stderr)
+            sys.exit(1)
+        _load_feature('expand').run_expand_cli(args)
+        return
+
+    if args.build_index or args.range_query:
+        if not args.timezone:
+            print('错误: 时间索引需要 -t 参数指定日志时间所在的时区', file=sys.stderr)
+            sys.exit(1)
+        if args.range_query and (args.time_from is None or args.time_to is None):
+            print('错误: --range-query 需要 --from 和 --to 参数', file=sys.stderr)
+            sys.exit(1)
+        if args.index_every <= 0:
+            parser.error('--index-every 必须为正数')
+        _load_feature('index').run_index_cli(args)
+        return
+
+    if args.aggregate:
+        if not args.mode or not args.timezone:
+            print('错误: 分桶聚合需要 -m 和 -t 参数', file=sys.stderr)
+            sys.exit(1)
+        _load_feature('aggregate').run_aggregate_cli(args)
+        return
+
+    if args.batch:
+        if not args.mode or not args.timezone:
+            print('错误: 批量模式需要 -m 和 -t 参数', file=sys.stderr)
+            sys.exit(1)
+        if args.connect:
+            _load_feature('serve').run_client_cli(args)
+        else:
+            _load_feature('batch').run_batch_cli(args)
+        return
+
     # 如果没有传入任何参数，返回当前时间戳（毫秒级）
     if not args.mode and not args.value and not args.timezone:
         print(int(time.time() * 1000), end='')
@@ -358,6 +1446,10 @@ def main():
         print('使用 --list-formats 查看支持的日期格式', file=sys.stderr)
         sys.exit(1)
 
+    if args.connect:
+        _load_feature('serve').run_client_cli(args)
+        return
+
     # 获取时区信息
     timezone_info = TIME_ZONES[args.timezone]
     timezone_str = timezone_info['tz']
@@ -365,12 +1457,12 @@ def main():
     try:
         if args.mode == 'to_date':
             # 时间戳转日期
-            timestamp = validate_timestamp(args.value)
-            converted_value = timestamp_to_date(timestamp, timezone_str)
+            timestamp = validate_timestamp(args.value, args.unit)
+            converted_value = timestamp_to_date(timestamp, timezone_str, args.unit)
             print(converted_value, end='')
         elif args.mode == 'to_timestamp':
             # 日期转时间戳
-            converted_value = date_to_timestamp(args.value, timezone_str)
+            converted_value = date_to_timestamp(args.value, timezone_str, args.unit)
             print(converted_value, end='')
     except ValueError as e:
         print(f'错误: {e}', file=sys.stderr)
@@ -382,4 +1474,7 @@ def main():
         sys.exit(1)
 
 if __name__ == '__main__':
+    # 功能模块通过 import time_transfer 使用本模块的函数和缓存、统计、时区后端等状态。
+    # 作为脚本运行时本模块名为 __main__，先以导入名登记，避免功能模块再加载一份独立的副本
+    sys.modules.setdefault(__spec__.name if __spec__ else 'time_transfer', sys.modules[__name__])
     main()
\ No newline at end of file
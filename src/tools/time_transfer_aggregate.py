@@ -0,0 +1,157 @@
+"""
+time_transfer 的分桶聚合（--aggregate）
+
+按目标时区的本地分钟/小时/天统计事件数，夏令时结束时重复的小时分成两个桶。
+"""
+
+import sys
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, TextIO, Tuple
+
+if __package__:
+    from . import time_transfer as tt
+else:
+    import time_transfer as tt
+
+if TYPE_CHECKING:
+    import argparse
+
+class TimeBucketCounter:
+    """
+    按目标时区的本地时间分桶计数
+
+    每个事件只做一次整数运算: 本地秒 = UTC 秒 + 偏移，桶起点 = 本地秒向下取整到桶大小。
+    偏移按区间缓存，只有越过夏令时切换等边界时才重新查表。只保存各桶的计数，
+    内存占用与桶数成正比，与事件数无关。
+
+    分钟、小时桶以 (本地起点, 偏移) 为键：夏令时结束时重复的那个小时分成两个桶，
+    夏令时开始时跳过的小时不会出现；天桶以本地日期为键，23 小时或 25 小时的一天仍是一个桶。
+    """
+    __slots__ = ('zone', 'size', 'counts', 'span_start', 'span_end', 'offset')
+
+    def __init__(self, timezone_str: str, bucket: str = 'hour'):
+        if bucket not in tt.AGGREGATE_BUCKETS:
+            raise ValueError(f"不支持的分桶: {bucket}，可选 {', '.join(tt.AGGREGATE_BUCKETS)}")
+        self.zone = tt.get_zone(timezone_str)
+        self.size = tt.AGGREGATE_BUCKETS[bucket]
+        self.counts: Dict[Any, int] = {}
+        self.span_start = self.span_end = 0
+        self.offset = 0
+
+    def add(self, utc_seconds: int) -> None:
+        """计入一个 UTC 秒表示的事件"""
+        if not self.span_start <= utc_seconds < self.span_end:
+            self.span_start, self.span_end, self.offset, _ = self.zone.span(utc_seconds)
+        local_seconds = utc_seconds + self.offset
+        key = local_seconds - local_seconds % self.size
+        if self.size < 86400:
+            key = (key, self.offset)
+        counts = self.counts
+        counts[key] = counts.get(key, 0) + 1
+
+    def buckets(self, unit: str = 'ms') -> List[Dict[str, Any]]:
+        """
+        按时间顺序返回非空的桶
+
+        Args:
+            unit: start 字段的时间戳单位 s/ms/us/ns（auto 按毫秒输出）
+
+        Returns:
+            [{"bucket": 本地起点, "start": 起点的时间戳, "count": 事件数}]，
+            分钟、小时桶的本地起点带时区缩写，天桶只有日期
+        """
+        rows = []
+        for key, count in self.counts.items():
+            if self.size < 86400:
+                local_start, offset = key
+                utc_start = local_start - offset
+                label = time.strftime('%Y-%m-%d %H:%M ', time.gmtime(local_start))
+                label += self.zone.utc_offset(utc_start)[1]
+            else:
+                local_start = key
+                # 午夜恰好处于夏令时空档时，按 local_to_utc 的规则顺延
+                utc_start = self.zone.local_to_utc(local_start)
+                label = time.strftime('%Y-%m-%d', time.gmtime(local_start))
+            rows.append({'bucket': label, 'start': tt._micros_to_unit(utc_start * 10**6, unit),
+                         'count': count})
+        rows.sort(key=lambda row: row['start'])
+        return rows
+
+def aggregate_stream(lines: Iterable[Tuple[int, str]], mode: str, timezone_str: str,
+                     bucket: str = 'hour', unit: str = 'ms',
+                     error_stream: Optional[TextIO] = None) -> Tuple[TimeBucketCounter, Dict[str, float]]:
+    """
+    单遍流式分桶计数
+
+    Args:
+        lines: iter_input_lines 产生的 (行号, 值) 流
+        mode: 输入类型，to_date 表示输入为时间戳，to_timestamp 表示输入为日期字符串
+        timezone_str: 分桶所用的时区；日期字符串没有时区信息时也按此时区解释
+        bucket: minute、hour 或 day
+        unit: 时间戳单位 s/ms/us/ns/auto
+        error_stream: 逐行错误报告输出流，为None时不报告
+
+    Returns:
+        (计数器, 统计信息: lines, errors, elapsed, lines_per_second)
+    """
+    if mode not in ('to_date', 'to_timestamp'):
+        raise ValueError(f"不支持的转换模式: {mode}")
+    tt._unit_scale(unit)  # 提前校验单位，而不是让每一行都转换失败
+    counter = TimeBucketCounter(timezone_str, bucket)
+    add = counter.add
+    start = time.perf_counter()
+    count = errors = 0
+
+    for line_no, value in lines:
+        count += 1
+        try:
+            if mode == 'to_date':
+                timestamp = tt.validate_timestamp(value, unit)
+                utc_seconds = tt._timestamp_to_seconds(timestamp, tt._unit_scale(unit, timestamp))
+            else:
+                utc_seconds = tt.date_to_timestamp(value, timezone_str, 's')
+        except ValueError as e:
+            errors += 1
+            if error_stream is not None:
+                print(f'第 {line_no} 行转换失败: {e}', file=error_stream)
+            continue
+        add(utc_seconds)
+
+    elapsed = time.perf_counter() - start
+    return counter, {
+        'lines': count,
+        'errors': errors,
+        'elapsed': elapsed,
+        'lines_per_second': count / elapsed if elapsed > 0 else 0.0,
+    }
+
+def run_aggregate_cli(args: 'argparse.Namespace') -> None:
+    """执行分桶聚合，各桶计数输出到标准输出，统计输出到标准错误"""
+    timezone_str = tt.TIME_ZONES[args.timezone]['tz']
+    try:
+        if args.input == '-':
+            counter, summary = aggregate_stream(tt.iter_input_lines(sys.stdin), args.mode, timezone_str,
+                                                args.aggregate, args.unit, error_stream=sys.stderr)
+        else:
+            with open(args.input, 'r', encoding='utf-8', errors='replace') as f:
+                counter, summary = aggregate_stream(tt.iter_input_lines(f), args.mode, timezone_str,
+                                                    args.aggregate, args.unit, error_stream=sys.stderr)
+    except OSError as e:
+        print(f'错误: 无法读取输入文件: {e}', file=sys.stderr)
+        sys.exit(1)
+
+    rows = counter.buckets(args.unit)
+    if args.output_format == 'tsv':
+        # 列顺序: 本地起点, 起点时间戳, 事件数
+        for row in rows:
+            print(f"{row['bucket']}\t{row['start']}\t{row['count']}")
+    else:
+        import json
+        for row in rows:
+            print(json.dumps(row, ensure_ascii=False))
+
+    print(f"已处理 {summary['lines']} 行，失败 {summary['errors']} 行，共 {len(rows)} 个桶，"
+          f"耗时 {summary['elapsed']:.3f} 秒，吞吐 {summary['lines_per_second']:.0f} 行/秒",
+          file=sys.stderr)
+    if args.stats:
+        print(tt.format_stats(tt.get_stats()), file=sys.stderr)
@@ -0,0 +1,94 @@
+"""
+time_transfer 的 pytz / zoneinfo 时区后端
+
+与 ZoneTable 接口相同，每次查询都调用对应的库；time_transfer.get_zone() 在选择这两个后端时才导入本模块。
+"""
+
+import datetime
+from typing import Optional, Tuple
+
+if __package__:
+    from . import time_transfer as tt
+else:
+    import time_transfer as tt
+
+# 带时区的 1970-01-01，zoneinfo 后端由此换算 UTC 时刻
+_EPOCH_UTC = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+class PytzZone:
+    """
+    pytz 时区后端：每次查询都调用 pytz 的 fromutc/localize
+
+    与 ZoneTable 接口相同；没有预先划分的偏移区间，span 只覆盖查询的那一秒。
+    """
+    __slots__ = ('name', 'tz')
+
+    def __init__(self, timezone_str: str):
+        import pytz
+        self.name = timezone_str
+        self.tz = pytz.timezone(timezone_str)
+
+    def utc_offset(self, utc_seconds: int) -> Tuple[int, str]:
+        local = self.tz.fromutc(tt._EPOCH_NAIVE + datetime.timedelta(seconds=utc_seconds))
+        return int(local.utcoffset().total_seconds()), local.tzname()
+
+    def span(self, utc_seconds: int) -> Tuple[float, float, int, str]:
+        return (utc_seconds, utc_seconds + 1) + self.utc_offset(utc_seconds)
+
+    def local_to_utc(self, local_seconds: int, is_dst: Optional[bool] = False) -> int:
+        import pytz
+        try:
+            local = self.tz.localize(tt._EPOCH_NAIVE + datetime.timedelta(seconds=local_seconds), is_dst=is_dst)
+        except pytz.AmbiguousTimeError:
+            raise ValueError(f"本地时间有歧义: {tt.ZoneTable._format_local(local_seconds)} ({self.name})")
+        except pytz.NonExistentTimeError:
+            raise ValueError(f"本地时间不存在: {tt.ZoneTable._format_local(local_seconds)} ({self.name})")
+        return local_seconds - int(local.utcoffset().total_seconds())
+
+class ZoneInfoZone:
+    """
+    标准库 zoneinfo 时区后端
+
+    与 ZoneTable 接口相同。zoneinfo 用 fold 区分重复时间，这里按 pytz.localize 的规则
+    选择偏移：重复时间默认取标准时间，不存在的时间与 pytz 一样回拨 6 小时定位后再加回。
+    """
+    __slots__ = ('name', 'tz')
+
+    def __init__(self, timezone_str: str):
+        from zoneinfo import ZoneInfo
+        self.name = timezone_str
+        self.tz = ZoneInfo(timezone_str)
+
+    def utc_offset(self, utc_seconds: int) -> Tuple[int, str]:
+        local = (_EPOCH_UTC + datetime.timedelta(seconds=utc_seconds)).astimezone(self.tz)
+        return int(local.utcoffset().total_seconds()), local.tzname()
+
+    def span(self, utc_seconds: int) -> Tuple[float, float, int, str]:
+        return (utc_seconds, utc_seconds + 1) + self.utc_offset(utc_seconds)
+
+    def local_to_utc(self, local_seconds: int, is_dst: Optional[bool] = False) -> int:
+        naive = tt._EPOCH_NAIVE + datetime.timedelta(seconds=local_seconds)
+        first, second = naive.replace(tzinfo=self.tz), naive.replace(tzinfo=self.tz, fold=1)
+        offset = int(first.utcoffset().total_seconds())
+        later_offset = int(second.utcoffset().total_seconds())
+        if offset == later_offset:
+            return local_seconds - offset
+
+        if offset < later_offset:
+            # 夏令时开始时被跳过的时间
+            if is_dst is None:
+                raise ValueError(f"本地时间不存在: {tt.ZoneTable._format_local(local_seconds)} ({self.name})")
+            if is_dst:
+                return self.local_to_utc(local_seconds + tt._GAP_SHIFT_SECONDS, True) - tt._GAP_SHIFT_SECONDS
+            return self.local_to_utc(local_seconds - tt._GAP_SHIFT_SECONDS, False) + tt._GAP_SHIFT_SECONDS
+
+        # 夏令时结束时重复出现的时间
+        if is_dst is None:
+            raise ValueError(f"本地时间有歧义: {tt.ZoneTable._format_local(local_seconds)} ({self.name})")
+        candidates = {local_seconds - offset: bool(first.dst()), local_seconds - later_offset: bool(second.dst())}
+        matched = [utc for utc, dst in candidates.items() if dst == is_dst]
+        if len(matched) == 1:
+            return matched[0]
+        if not matched:
+            matched = list(candidates)
+        return min(matched) if is_dst else max(matched)
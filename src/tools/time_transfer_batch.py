@@ -0,0 +1,241 @@
+"""
+time_transfer 的批量转换（--batch）
+
+逐行流式转换标准输入或文件；指定 --workers 时把大文件按行切块，交给进程池并行转换。
+"""
+
+import os
+import sys
+import time
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+if __package__:
+    from . import time_transfer as tt
+else:
+    import time_transfer as tt
+
+if TYPE_CHECKING:
+    import argparse
+
+def run_batch(input_stream: Iterable[str], output_stream: TextIO, mode: str, timezone_str: str,
+              output_format: str = 'ndjson', error_stream: Optional[TextIO] = None,
+              unit: str = 'ms') -> Dict[str, float]:
+    """
+    批量转换：从输入流逐行读取，边转换边输出，内存占用与输入大小无关
+
+    Args:
+        input_stream: 每行一个时间戳或日期字符串的输入流
+        output_stream: 结果输出流
+        mode: to_date 或 to_timestamp
+        timezone_str: 时区字符串
+        output_format: ndjson 或 tsv
+        error_stream: 逐行错误报告输出流，为None时不报告
+        unit: 时间戳单位 s/ms/us/ns/auto
+
+    Returns:
+        统计信息: lines, errors, elapsed, lines_per_second
+    """
+    start = time.perf_counter()
+    lines = errors = 0
+    write = output_stream.write
+
+    for line_no, value, result, error in tt.convert_stream(tt.iter_input_lines(input_stream), mode,
+                                                        timezone_str, unit):
+        lines += 1
+        if error is not None:
+            errors += 1
+            if error_stream is not None:
+                print(f'第 {line_no} 行转换失败: {error}', file=error_stream)
+        write(tt.format_batch_record(value, result, error, output_format))
+        write('\n')
+
+    output_stream.flush()
+    elapsed = time.perf_counter() - start
+    return {
+        'lines': lines,
+        'errors': errors,
+        'elapsed': elapsed,
+        'lines_per_second': lines / elapsed if elapsed > 0 else 0.0,
+    }
+
+def iter_file_chunks(path: str, chunk_size: int = tt.DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[int, int]]:
+    """
+    将文件按换行符对齐切分为若干字节区间
+
+    每个区间（最后一个除外）都以换行符结尾，因此不会把一行拆到两个分块中。
+
+    Args:
+        path: 输入文件路径
+        chunk_size: 目标分块大小（字节），实际分块会延伸到下一个换行符
+
+    Yields:
+        (起始偏移, 结束偏移)，左闭右开
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"分块大小必须为正数: {chunk_size}")
+
+    import mmap
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            while start < size:
+                end = start + chunk_size
+                if end >= size:
+                    end = size
+                else:
+                    # 分块末字节恰好是换行符时 find 直接命中，否则延伸到下一个换行符
+                    newline = mm.find(b'\n', end - 1)
+                    end = size if newline == -1 else newline + 1
+                yield start, end
+                start = end
+
+def _convert_chunk(path: str, start: int, end: int, mode: str, timezone_str: str, output_format: str,
+                   unit: str = 'ms') -> Tuple[str, int, int, List[Tuple[int, str]], Optional[Dict[str, Any]]]:
+    """
+    在工作进程中转换文件的一个字节区间
+
+    Returns:
+        (格式化后的输出文本, 区间内的物理行数, 非空行数, [(区间内行号, 错误信息)],
+         开启统计时为本区间的统计结果，否则为None)
+    """
+    import mmap
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data = mm[start:end].decode('utf-8', errors='replace')
+
+    # 与 run_batch 逐行读取文件的行为一致：按换行符切分，行尾的 \r 由 strip 去掉
+    parts = data.split('\n')
+    if data.endswith('\n'):
+        parts.pop()
+
+    out: List[str] = []
+    errors: List[Tuple[int, str]] = []
+    records = 0
+    for line_no, value, result, error in tt.convert_stream(tt.iter_input_lines(parts), mode, timezone_str, unit):
+        records += 1
+        if error is not None:
+            errors.append((line_no, error))
+        out.append(tt.format_batch_record(value, result, error, output_format))
+        out.append('\n')
+
+    chunk_stats = None
+    if tt._STATS is not None:
+        chunk_stats = tt._STATS.as_dict()
+        tt.enable_stats()
+    return ''.join(out), len(parts), records, errors, chunk_stats
+
+def _init_worker(cache_size: int, tz_backend: str, stats_enabled: bool) -> None:
+    """并行模式工作进程的初始化"""
+    tt.configure_cache(cache_size)
+    tt.set_tz_backend(tz_backend)
+    if stats_enabled:
+        tt.enable_stats()
+    else:
+        tt.disable_stats()
+
+def run_parallel_batch(path: str, output_stream: TextIO, mode: str, timezone_str: str,
+                       output_format: str = 'ndjson', workers: Optional[int] = None,
+                       chunk_size: int = tt.DEFAULT_CHUNK_SIZE,
+                       error_stream: Optional[TextIO] = None, unit: str = 'ms') -> Dict[str, float]:
+    """
+    并行批量转换：内存映射输入文件，按换行符对齐分块后交给进程池转换，按原顺序输出
+
+    输出内容与 run_batch 完全一致。同时在途的分块数量有上限，内存占用与文件大小无关。
+
+    Args:
+        path: 输入文件路径（必须是普通文件，不支持标准输入）
+        output_stream: 结果输出流
+        mode: to_date 或 to_timestamp
+        timezone_str: 时区字符串
+        output_format: ndjson 或 tsv
+        workers: 工作进程数，默认为 CPU 核数
+        chunk_size: 分块大小（字节）
+        error_stream: 逐行错误报告输出流，为None时不报告
+        unit: 时间戳单位 s/ms/us/ns/auto
+
+    Returns:
+        统计信息: lines, errors, elapsed, lines_per_second
+    """
+    from collections import deque
+    from concurrent.futures import Future, ProcessPoolExecutor
+
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    lines = errors = 0
+    base_line = 0
+    write = output_stream.write
+
+    chunks = iter_file_chunks(path, chunk_size)
+    # 工作进程沿用主进程的缓存容量、时区后端和统计开关，各分块的统计汇总到主进程
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(tt._TIMESTAMP_CACHE.maxsize, tt.get_tz_backend(), tt._STATS is not None)) as pool:
+        def submit(chunk: Tuple[int, int]) -> Future:
+            return pool.submit(_convert_chunk, path, chunk[0], chunk[1],
+                               mode, timezone_str, output_format, unit)
+
+        # 每个进程保留两个在途分块，既能让进程持续忙碌，又不会把整个文件的结果堆在内存里
+        pending = deque(submit(chunk) for chunk in islice(chunks, workers * 2))
+        while pending:
+            text, n_lines, records, chunk_errors, chunk_stats = pending.popleft().result()
+            if chunk_stats is not None and tt._STATS is not None:
+                tt._STATS.merge(chunk_stats)
+            chunk = next(chunks, None)
+            if chunk is not None:
+                pending.append(submit(chunk))
+
+            lines += records
+            errors += len(chunk_errors)
+            if error_stream is not None:
+                for line_no, error in chunk_errors:
+                    print(f'第 {base_line + line_no} 行转换失败: {error}', file=error_stream)
+            write(text)
+            base_line += n_lines
+
+    output_stream.flush()
+    elapsed = time.perf_counter() - start
+    return {
+        'lines': lines,
+        'errors': errors,
+        'elapsed': elapsed,
+        'lines_per_second': lines / elapsed if elapsed > 0 else 0.0,
+    }
+
+def run_batch_cli(args: 'argparse.Namespace') -> None:
+    """执行命令行批量模式，并在标准错误输出吞吐统计"""
+    timezone_str = tt.TIME_ZONES[args.timezone]['tz']
+    try:
+        if args.workers is not None:
+            if args.input == '-':
+                print('错误: 并行模式需要通过 -i 指定输入文件', file=sys.stderr)
+                sys.exit(1)
+            summary = run_parallel_batch(args.input, sys.stdout, args.mode, timezone_str,
+                                         args.output_format, workers=args.workers,
+                                         chunk_size=args.chunk_size, error_stream=sys.stderr,
+                                         unit=args.unit)
+        elif args.input == '-':
+            summary = run_batch(sys.stdin, sys.stdout, args.mode, timezone_str,
+                                args.output_format, error_stream=sys.stderr, unit=args.unit)
+        else:
+            with open(args.input, 'r', encoding='utf-8', errors='replace') as f:
+                summary = run_batch(f, sys.stdout, args.mode, timezone_str,
+                                    args.output_format, error_stream=sys.stderr, unit=args.unit)
+    except OSError as e:
+        print(f'错误: 无法读取输入文件: {e}', file=sys.stderr)
+        sys.exit(1)
+
+    print(f"已处理 {summary['lines']} 行，失败 {summary['errors']} 行，"
+          f"耗时 {summary['elapsed']:.3f} 秒，吞吐 {summary['lines_per_second']:.0f} 行/秒",
+          file=sys.stderr)
+    if args.workers is None:
+        cache = tt.get_cache_stats()['timestamp' if args.mode == 'to_timestamp' else 'format']
+        print(f"缓存命中 {cache['hits']} 次，未命中 {cache['misses']} 次，淘汰 {cache['evictions']} 次，"
+              f"命中率 {cache['hit_rate']:.1%}", file=sys.stderr)
+    if args.stats:
+        stats = tt.get_stats()
+        if args.workers is not None:
+            # 并行模式的缓存在各工作进程中，主进程的缓存统计没有意义
+            del stats['caches']
+        print(tt.format_stats(stats), file=sys.stderr)
@@ -0,0 +1,158 @@
+"""
+time_transfer 的命令行参数定义
+
+参数和帮助信息较多，放在单独的模块里；time_transfer.main() 在快速路径之外才导入本模块。
+"""
+
+import argparse
+
+if __package__:
+    from . import time_transfer as tt
+else:
+    import time_transfer as tt
+
+def build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器（含 csv 子命令）"""
+    parser = argparse.ArgumentParser(
+        description='时间转换工具 - 支持时间戳和日期之间的相互转换',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  获取当前时间戳:
+    python time_transfer.py
+    
+  时间戳转日期 (上海时区):
+    python time_transfer.py -m to_date -v 1697049600000 -t 1
+    
+  日期转时间戳 (美西时区):
+    python time_transfer.py -m to_timestamp -v "2023-10-11 12:34:56" -t 2
+
+  纳秒时间戳转日期 / 日期转微秒时间戳 (--unit auto 按数量级识别单位):
+    python time_transfer.py -m to_date -v 1697049600123456789 -t 1 --unit ns
+    python time_transfer.py -m to_timestamp -v "2023-10-11T12:34:56.123456" -t 1 --unit us
+    
+  显示当前各时区时间:
+    python time_transfer.py --current-time
+
+  显示指定时间戳在各时区的时间:
+    python time_transfer.py --all-zones -v 1697049600000
+    
+  显示时区列表:
+    python time_transfer.py --list-timezones
+    
+  显示支持的日期格式:
+    python time_transfer.py --list-formats
+
+  批量转换 (每行一个值，结果按 NDJSON 输出):
+    cat timestamps.txt | python time_transfer.py --batch -m to_date -t 1
+    python time_transfer.py --batch -m to_timestamp -t 2 -i dates.txt --output-format tsv
+
+  并行转换大文件 (8 个进程，每块 16MB):
+    python time_transfer.py --batch -m to_date -t 1 -i events.txt --workers 8 --chunk-size 16M
+
+  常驻服务 (Unix socket 和本机 HTTP)，客户端通过 --connect 转换:
+    python time_transfer.py --serve --socket /tmp/time_transfer.sock --http-port 8765
+    python time_transfer.py --connect /tmp/time_transfer.sock -m to_date -t 1 -v 1697049600000
+    cat dates.txt | python time_transfer.py --connect http://127.0.0.1:8765 --batch -m to_timestamp -t 2
+    curl -d '{"mode": "to_date", "timezone": "1", "value": 1697049600000}' http://127.0.0.1:8765/convert
+
+  把利雅得时间的日志改写为马德里时间 (保持原有时间格式):
+    python time_transfer.py --rewrite --source-tz 3 --target-tz 4 -i riyadh.log > madrid.log
+
+  按纽约本地小时统计事件数 (夏令时结束时重复的小时分成两个桶，结果按 TSV 输出):
+    python time_transfer.py --aggregate hour -m to_date -t 6 -i events.txt --output-format tsv
+
+  批量转换并输出解析格式、时区缩写和时区换算的统计:
+    python time_transfer.py --batch -m to_timestamp -t 1 -i dates.txt --stats > out.ndjson
+
+  转换 CSV 中的时间列 (其余列原样输出，各列失败数输出到标准错误):
+    python time_transfer.py csv -m to_timestamp -t 1 -c created_at,updated_at -i orders.csv > out.csv
+
+  展开一年内美西时间每 15 分钟的时间点 (按墙上时间，-m to_date 输出日期):
+    python time_transfer.py --expand 15m -t 2 --from 2024-01-01 --to 2025-01-01 > schedule.txt
+    python time_transfer.py --expand 1h -t 2 --from 2024-03-10 --to 2024-03-11 -m to_date
+
+  按时间范围查询日志 (首次查询自动建立 app.log.tidx 索引，日志追加后增量更新):
+    python time_transfer.py --range-query app.log -t 1 --from "2023-10-11 09:00" --to "2023-10-11 09:05"
+        """
+    )
+
+    parser.add_argument('-m', '--mode', choices=['to_date', 'to_timestamp'],
+                        help='转换模式: to_date (时间戳转日期) 或 to_timestamp (日期转时间戳)')
+    parser.add_argument('-v', '--value', help='要转换的时间戳或日期字符串')
+    parser.add_argument('-t', '--timezone', choices=tt.TIME_ZONES.keys(),
+                        help='时区选择 (使用 --list-timezones 查看所有可用时区)')
+    parser.add_argument('--current-time', action='store_true',
+                        help='显示当前各时区时间')
+    parser.add_argument('--all-zones', action='store_true',
+                        help='显示 -v 指定的时间戳在各时区的时间，未指定 -v 时为当前时间')
+    parser.add_argument('--list-timezones', action='store_true',
+                        help='显示所有可用时区')
+    parser.add_argument('--list-formats', action='store_true',
+                        help='显示支持的日期格式示例')
+    parser.add_argument('--batch', action='store_true',
+                        help='批量模式: 从标准输入或 --input 文件逐行读取待转换的值')
+    parser.add_argument('-i', '--input', default='-',
+                        help='批量模式的输入文件，默认为标准输入')
+    parser.add_argument('--output-format', choices=['ndjson', 'tsv'], default='ndjson',
+                        help='批量模式的输出格式 (默认 ndjson)')
+    parser.add_argument('--aggregate', choices=tt.AGGREGATE_BUCKETS,
+                        help='分桶聚合: 逐行读取输入，按 -t 时区的本地分钟/小时/天输出事件数，-m 指定输入为时间戳或日期')
+    parser.add_argument('--workers', type=int, nargs='?', const=0, default=None,
+                        help='批量模式下启用多进程并行转换，可指定进程数 (默认 CPU 核数)')
+    parser.add_argument('--chunk-size', type=tt.parse_size, default=tt.DEFAULT_CHUNK_SIZE,
+                        help='并行模式的分块大小，支持 K/M/G 后缀 (默认 4M)')
+    parser.add_argument('--unit', choices=[*tt.TIMESTAMP_UNITS, 'auto'], default='ms',
+                        help='时间戳单位: s/ms/us/ns，auto 按数量级自动识别 (默认 ms)')
+    parser.add_argument('--stats', action='store_true',
+                        help='统计日期解析、时区缩写推断和时区换算的次数与耗时，批量模式和 csv 子命令结束后输出')
+    parser.add_argument('--tz-backend', choices=tt.TZ_BACKENDS,
+                        help=f'时区计算后端，默认读取环境变量 {tt.TZ_BACKEND_ENV}，未设置时为 {tt.DEFAULT_TZ_BACKEND}')
+    parser.add_argument('--cache-size', type=int, default=tt.DEFAULT_CACHE_SIZE,
+                        help=f'日期解析、日期转时间戳、时间戳转日期三个缓存各自的最大条目数，0 表示全部禁用 '
+                             f'(默认 {tt.DEFAULT_CACHE_SIZE})')
+
+    parser.add_argument('--serve', action='store_true',
+                        help='以常驻服务方式运行，保持时区表和缓存常驻内存')
+    parser.add_argument('--socket', help='服务模式监听的 Unix socket 路径')
+    parser.add_argument('--http-host', default='127.0.0.1',
+                        help='服务模式 HTTP 监听地址，只允许本机回环地址 (默认 127.0.0.1)')
+    parser.add_argument('--http-port', type=int, help='服务模式 HTTP 监听端口')
+    parser.add_argument('--connect', metavar='ADDRESS',
+                        help='将转换交给常驻服务执行: Unix socket 路径或 http://host:port')
+    parser.add_argument('--rewrite', action='store_true',
+                        help='改写模式: 把日志中的时间从 --source-tz 换算到 --target-tz，保持原格式')
+    parser.add_argument('--source-tz', choices=tt.TIME_ZONES.keys(), help='改写模式中日志时间所在的时区')
+    parser.add_argument('--target-tz', choices=tt.TIME_ZONES.keys(), help='改写模式的目标时区')
+    parser.add_argument('--rewrite-compact', action='store_true',
+                        help='改写模式同时处理 20231011123456 这类紧凑数字格式 (默认不处理)')
+    parser.add_argument('--build-index', metavar='LOG',
+                        help='为按时间排序的日志文件构建或增量更新稀疏时间索引')
+    parser.add_argument('--range-query', metavar='LOG',
+                        help='按时间范围查询日志行，配合 --from/--to 使用，自动更新索引')
+    parser.add_argument('--from', dest='time_from', help='范围查询、--expand 的起点（包含），日期或毫秒时间戳')
+    parser.add_argument('--to', dest='time_to', help='范围查询、--expand 的终点（不包含），日期或毫秒时间戳')
+    parser.add_argument('--expand', metavar='INTERVAL',
+                        help='按间隔展开 --from/--to 之间的时间点，如 15m、1h、1d，默认按 -t 时区的墙上时间递进')
+    parser.add_argument('--absolute', action='store_true',
+                        help='--expand 按绝对时间递进，不随夏令时调整墙上时间')
+    parser.add_argument('--index-every', type=int, default=tt.DEFAULT_INDEX_EVERY,
+                        help=f'每隔多少行记录一个索引点 (默认 {tt.DEFAULT_INDEX_EVERY})')
+
+    # csv 子命令与顶层共用 -m/-t/-i，默认值设为 SUPPRESS，避免子命令覆盖写在子命令之前的同名参数
+    subparsers = parser.add_subparsers(dest='command', metavar='{csv}')
+    csv_parser = subparsers.add_parser('csv', help='流式转换 CSV 文件中的时间列，其余列原样输出')
+    csv_parser.add_argument('-c', '--columns', action='append', required=True,
+                            help='要转换的列名或从 0 开始的列序号，多列用逗号分隔或重复指定')
+    csv_parser.add_argument('-m', '--mode', choices=['to_date', 'to_timestamp'], default=argparse.SUPPRESS,
+                            help='转换模式')
+    csv_parser.add_argument('-t', '--timezone', choices=tt.TIME_ZONES.keys(), default=argparse.SUPPRESS,
+                            help='时区选择')
+    csv_parser.add_argument('-i', '--input', default=argparse.SUPPRESS, help='输入 CSV 文件，默认为标准输入')
+    csv_parser.add_argument('--unit', choices=[*tt.TIMESTAMP_UNITS, 'auto'], default=argparse.SUPPRESS,
+                            help='时间戳单位')
+    csv_parser.add_argument('--stats', action='store_true', default=argparse.SUPPRESS,
+                            help='结束后输出热点路径统计')
+    csv_parser.add_argument('-d', '--delimiter', default=',', help='分隔符 (默认逗号)')
+    csv_parser.add_argument('--no-header', action='store_true', help='输入没有表头，此时 -c 只能使用列序号')
+    return parser
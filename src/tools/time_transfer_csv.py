@@ -0,0 +1,234 @@
+"""
+time_transfer 的 csv 子命令
+
+流式转换 CSV 文件中的时间列，其余列原样输出。
+"""
+
+import datetime
+import sys
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, TextIO, Tuple
+
+if __package__:
+    from . import time_transfer as tt
+else:
+    import time_transfer as tt
+
+if TYPE_CHECKING:
+    import argparse
+    import re
+
+# CSV 列转换中表示"上一次命中快速路径"的格式标记
+_FAST_LAYOUT = object()
+
+# 预检查排在缓存格式之前的候选时各指令使用的正则：只用于排除不可能命中的格式，
+# 必须是 strptime 可接受取值的超集（月份带取值范围，才能排除欧式日期中大于 12 的日）
+_PRECHECK_DIRECTIVES = {
+    'Y': r'\d{4}',
+    'm': r'(?:1[0-2]|0?[1-9])',
+    'd': r'(?:3[01]|[12]\d|0?[1-9]| [1-9])',
+    'f': r'\d{1,6}',
+    'p': r'[A-Za-z]+',
+    'Z': r'[A-Za-z]+',
+    'z': r'\S+',
+}
+
+def _precheck_regex(fmt: str) -> 're.Pattern':
+    """把格式翻译为宽松的预检查正则，正则不匹配时 strptime 一定解析失败"""
+    import re
+    parts = []
+    i = 0
+    while i < len(fmt):
+        if fmt[i] == '%' and i + 1 < len(fmt):
+            parts.append(_PRECHECK_DIRECTIVES.get(fmt[i + 1], r'\d{1,2}'))
+            i += 2
+        else:
+            parts.append(r'\s+' if fmt[i].isspace() else re.escape(fmt[i]))
+            i += 1
+    return re.compile(''.join(parts) + r'\Z', re.IGNORECASE)
+
+class _ColumnFormat:
+    """
+    CSV 列缓存的日期格式
+
+    复用格式时必须与 parse_date_string 的结果一致：排在该格式之前的候选（例如 %d/%m/%Y
+    之前的 %m/%d/%Y）先用预检查正则过滤，只有真正可能命中时才调用它们解析，最后调用
+    缓存的解析器，省去逐个探测候选格式的开销。解析本身始终由各解析器的 parse 完成。
+    """
+    __slots__ = ('parser', 'earlier')
+
+    def __init__(self, parser: tt._DateParser):
+        earlier: List[tt._DateParser] = []
+        for candidates in tt._get_format_dispatch().values():
+            if parser in candidates:
+                for candidate in candidates[:candidates.index(parser)]:
+                    if candidate not in earlier:
+                        earlier.append(candidate)
+        self.parser = parser
+        self.earlier = tuple((candidate.pattern if candidate.kind == 'abbr' else _precheck_regex(candidate.fmt),
+                              candidate) for candidate in earlier)
+
+    def parse(self, value: str) -> Optional[Tuple[datetime.datetime, Optional[str]]]:
+        """用缓存的格式解析，返回 None 表示需要完整探测"""
+        length = len(value)
+        for regex, candidate in self.earlier:
+            if regex.match(value) and candidate.accepts_length(length):
+                result = candidate.parse(value)
+                if result is not None:
+                    return result
+        if not self.parser.accepts_length(length):
+            return None
+        return self.parser.parse(value)
+
+class _ColumnConverter:
+    """
+    CSV 单列的转换器，记录该列的转换和失败次数
+
+    日期转时间戳时记住上一次命中的格式，后续行先用该格式解析，失败再完整探测，
+    转换结果与逐个调用 date_to_timestamp 完全相同。
+    """
+    __slots__ = ('name', 'index', 'mode', 'timezone_str', 'unit', 'format', 'formats', 'converted', 'errors')
+
+    def __init__(self, name: str, index: int, mode: str, timezone_str: str, unit: str = 'ms'):
+        self.name = name
+        self.index = index
+        self.mode = mode
+        self.timezone_str = timezone_str
+        self.unit = unit
+        self.format: Any = None
+        self.formats: Dict[tt._DateParser, _ColumnFormat] = {}
+        self.converted = 0
+        self.errors = 0
+
+    def _parse(self, value: str) -> Tuple[datetime.datetime, Optional[str]]:
+        column_format = self.format
+        if column_format is _FAST_LAYOUT:
+            parsed_dt = tt._fast_parse(value)
+            if parsed_dt is not None:
+                return parsed_dt, None
+        elif column_format is not None:
+            result = column_format.parse(value)
+            if result is not None:
+                return result
+
+        parsed_dt = tt._fast_parse(value)
+        if parsed_dt is not None:
+            self.format = _FAST_LAYOUT
+            return parsed_dt, None
+        parser, result = tt._probe_formats(value)
+        column_format = self.formats.get(parser)
+        if column_format is None:
+            column_format = self.formats[parser] = _ColumnFormat(parser)
+        self.format = column_format
+        return result
+
+    def convert(self, cell: str) -> str:
+        """转换单元格，空单元格原样保留，失败时输出空字符串"""
+        value = cell.strip()
+        if not value:
+            return cell
+        try:
+            if self.mode == 'to_date':
+                result = tt.timestamp_to_date(tt.validate_timestamp(value, self.unit), self.timezone_str, self.unit)
+            else:
+                result = tt._micros_to_unit(tt._parsed_to_micros(*self._parse(value), self.timezone_str), self.unit)
+        except ValueError:
+            self.errors += 1
+            return ''
+        self.converted += 1
+        return str(result)
+
+def _resolve_csv_columns(columns: List[str], header: Optional[List[str]]) -> List[Tuple[str, int]]:
+    """把列名或从 0 开始的列序号解析为 (列名, 列序号)"""
+    resolved = []
+    for column in columns:
+        if header is not None and column in header:
+            resolved.append((column, header.index(column)))
+        elif column.isdigit():
+            index = int(column)
+            resolved.append((header[index] if header is not None and index < len(header) else column, index))
+        else:
+            raise ValueError(f"CSV 中不存在列: {column}")
+    return resolved
+
+def convert_csv(input_stream: TextIO, output_stream: TextIO, columns: List[str], mode: str,
+                timezone_str: str, delimiter: str = ',', has_header: bool = True,
+                unit: str = 'ms') -> Dict[str, Any]:
+    """
+    流式转换 CSV 中的时间列，其余列原样输出
+
+    to_timestamp 的输出列全部是整数，to_date 的输出列全部是日期字符串；
+    无法转换的单元格输出为空，保证输出列类型一致。逐行读写，内存占用与文件大小无关。
+
+    Args:
+        input_stream: CSV 输入流（应以 newline='' 打开）
+        output_stream: CSV 输出流
+        columns: 要转换的列名，或从 0 开始的列序号
+        mode: to_date 或 to_timestamp
+        timezone_str: 时区字符串
+        delimiter: 分隔符
+        has_header: 第一行是否为表头（表头原样输出）
+        unit: 时间戳单位 s/ms/us/ns/auto
+
+    Returns:
+        统计信息: rows, elapsed, columns（列名 -> {converted, errors}）
+    """
+    import csv
+    start = time.perf_counter()
+    reader = csv.reader(input_stream, delimiter=delimiter)
+    writer = csv.writer(output_stream, delimiter=delimiter, lineterminator='\n')
+
+    header = next(reader, None) if has_header else None
+    if header is not None:
+        writer.writerow(header)
+    tt._unit_scale(unit)  # 提前校验单位，而不是让每个单元格都转换失败
+    converters = [_ColumnConverter(name, index, mode, timezone_str, unit)
+                  for name, index in _resolve_csv_columns(columns, header)]
+
+    rows = 0
+    for row in reader:
+        rows += 1
+        for converter in converters:
+            if converter.index < len(row):
+                row[converter.index] = converter.convert(row[converter.index])
+        writer.writerow(row)
+
+    output_stream.flush()
+    return {
+        'rows': rows,
+        'elapsed': time.perf_counter() - start,
+        'columns': {converter.name: {'converted': converter.converted, 'errors': converter.errors}
+                    for converter in converters},
+    }
+
+def run_csv_cli(args: 'argparse.Namespace') -> None:
+    """执行 csv 子命令，并在标准错误输出各列统计"""
+    mode = getattr(args, 'mode', None)
+    timezone = getattr(args, 'timezone', None)
+    if not mode or not timezone:
+        print('错误: csv 子命令需要 -m 和 -t 参数', file=sys.stderr)
+        sys.exit(1)
+    columns = [column.strip() for spec in args.columns for column in spec.split(',') if column.strip()]
+    input_path = getattr(args, 'input', '-')
+
+    try:
+        if input_path == '-':
+            import io
+            source = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', errors='replace', newline='')
+        else:
+            source = open(input_path, 'r', encoding='utf-8', errors='replace', newline='')
+        with source:
+            summary = convert_csv(source, sys.stdout, columns, mode, tt.TIME_ZONES[timezone]['tz'],
+                                  args.delimiter, not args.no_header, args.unit)
+    except OSError as e:
+        print(f'错误: 无法读取输入文件: {e}', file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        print(f'错误: {e}', file=sys.stderr)
+        sys.exit(1)
+
+    print(f"已处理 {summary['rows']} 行，耗时 {summary['elapsed']:.3f} 秒", file=sys.stderr)
+    for name, stats in summary['columns'].items():
+        print(f"  列 {name}: 转换 {stats['converted']} 个，失败 {stats['errors']} 个", file=sys.stderr)
+    if args.stats:
+        print(tt.format_stats(tt.get_stats()), file=sys.stderr)
@@ -0,0 +1,139 @@
+"""
+time_transfer 的时间范围展开（--expand）
+
+按间隔生成两个时间点之间的全部时间戳，默认按目标时区的墙上时间递进。
+"""
+
+import math
+import sys
+import time
+from itertools import islice
+from typing import TYPE_CHECKING, Iterator, Union
+
+if __package__:
+    from . import time_transfer as tt
+else:
+    import time_transfer as tt
+
+if TYPE_CHECKING:
+    import argparse
+
+# 时间间隔的单位后缀（秒）
+_INTERVAL_UNITS = {'S': 1, 'M': 60, 'H': 3600, 'D': 86400}
+
+def parse_interval(interval_str: str) -> int:
+    """
+    解析时间间隔，支持 s/m/h/d 后缀，无后缀时按秒
+
+    Args:
+        interval_str: 如 "30"、"15m"、"1h"、"1d"
+
+    Returns:
+        秒数
+    """
+    text = interval_str.strip().upper()
+    multiplier = 1
+    if text and text[-1] in _INTERVAL_UNITS:
+        multiplier = _INTERVAL_UNITS[text[-1]]
+        text = text[:-1]
+    try:
+        seconds = int(text) * multiplier
+    except ValueError:
+        raise ValueError(f"无效的时间间隔: {interval_str}")
+    if seconds <= 0:
+        raise ValueError(f"时间间隔必须为正数: {interval_str}")
+    return seconds
+
+def _scale_range(millis: range, unit: str) -> range:
+    """把毫秒时间戳的等差序列换算为指定单位，步长为整秒，换算后仍是 range"""
+    scale = tt._unit_scale(unit)
+    if scale == 1000:
+        return millis
+    if scale > 1000:
+        factor = scale // 1000
+        return range(millis.start * factor, millis.stop * factor, millis.step * factor)
+    # 秒级：起点向下取整，之后每一项都相差整数秒
+    first, step = millis.start // 1000, millis.step // 1000
+    return range(first, first + len(millis) * step, step)
+
+def generate_time_range(start: Union[str, int], end: Union[str, int], interval: Union[str, int],
+                        timezone_str: str, wall_clock: bool = True, unit: str = 'ms') -> Iterator[int]:
+    """
+    惰性生成 [start, end) 内按固定间隔排列的时间戳
+
+    wall_clock 为 True 时按墙上时间递进（"每天 09:00" 在夏令时前后都是本地 09:00）：
+    夏令时开始时被跳过的墙上时间不生成，夏令时结束时重复的墙上时间只生成第一次出现的那个时刻。
+    为 False 时按绝对时间递进，相邻两项恰好相差 interval。
+
+    按时区转换表的偏移区间整段生成，每个区间内是一个整数等差序列，不逐项查询偏移；
+    与向量化接口一样始终使用转换表，不受时区后端设置影响。
+
+    Args:
+        start: 起点（包含），日期字符串（按 timezone_str 解释）或毫秒时间戳
+        end: 终点（不包含），同上
+        interval: 间隔秒数，或 "15m"、"1h" 这样的字符串
+        timezone_str: 时区字符串
+        wall_clock: 按墙上时间(True)还是绝对时间(False)递进
+        unit: 生成的时间戳单位 s/ms/us/ns（auto 按毫秒生成）
+
+    Yields:
+        整数时间戳
+    """
+    step = (parse_interval(interval) if isinstance(interval, str) else interval) * 1000
+    if step <= 0:
+        raise ValueError(f"时间间隔必须为正数: {interval}")
+    tt._unit_scale(unit)
+    start_ms = tt._parse_time_bound(start, timezone_str) if isinstance(start, str) else start
+    end_ms = tt._parse_time_bound(end, timezone_str) if isinstance(end, str) else end
+
+    if not wall_clock:
+        yield from _scale_range(range(start_ms, end_ms, step), unit)
+        return
+
+    table = tt.get_zone_table(timezone_str)
+    span_start, span_end, offset, _ = table.span(start_ms // 1000)
+    local = start_ms + offset * 1000
+    local_end = end_ms + table.utc_offset(end_ms // 1000)[0] * 1000
+    while local < local_end:
+        offset_ms = offset * 1000
+        # 本区间覆盖的墙上时间为 [span_start + offset, span_end + offset)
+        window_start = span_start * 1000 + offset_ms
+        if local < window_start:
+            # 夏令时开始：跳过不存在的墙上时间
+            local += -((local - window_start) // step) * step
+        stop = min(span_end * 1000 + offset_ms, local_end)
+        if local < stop:
+            count = -((local - stop) // step)
+            utc = local - offset_ms
+            yield from _scale_range(range(utc, utc + count * step, step), unit)
+            local += count * step
+        if span_end == math.inf:
+            break
+        # 夏令时结束时下一区间的墙上时间与本区间重叠，local 已越过重叠部分，不会重复生成
+        span_start, span_end, offset, _ = table.span(span_end)
+
+def run_expand_cli(args: 'argparse.Namespace') -> None:
+    """执行 --expand，每行输出一个时间戳（-m to_date 时输出日期），统计输出到标准错误"""
+    timezone_str = tt.TIME_ZONES[args.timezone]['tz']
+    start = time.perf_counter()
+    as_dates = args.mode == 'to_date'
+    try:
+        values = generate_time_range(args.time_from, args.time_to, args.expand, timezone_str,
+                                     wall_clock=not args.absolute, unit='ms' if as_dates else args.unit)
+        if as_dates:
+            render = tt._get_zone_formatter(timezone_str).render
+            values = (render(value // 1000) for value in values)
+        count = 0
+        write = sys.stdout.write
+        while True:
+            chunk = list(islice(values, 65536))
+            if not chunk:
+                break
+            count += len(chunk)
+            write('\n'.join(map(str, chunk)))
+            write('\n')
+    except ValueError as e:
+        print(f'错误: {e}', file=sys.stderr)
+        sys.exit(1)
+    sys.stdout.flush()
+    print(f'已生成 {count} 个时间点，耗时 {time.perf_counter() - start:.3f} 秒', file=sys.stderr)
@@ -0,0 +1,277 @@
+"""
+time_transfer 的日志稀疏时间索引（--build-index / --range-query）
+
+为按时间排序的日志建立稀疏索引，按时间范围查询时只读取索引给出的字节区间。
+"""
+
+import os
+import sys
+import time
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+if __package__:
+    from . import time_transfer as tt
+else:
+    import time_transfer as tt
+
+if TYPE_CHECKING:
+    import argparse
+
+# 稀疏时间索引：索引文件名后缀、默认采样间隔（行）和头部校验长度上限（字节）
+INDEX_SUFFIX = '.tidx'
+_INDEX_HEAD_BYTES = 4096
+_INDEX_VERSION = 2
+
+def extract_line_timestamp(line: str, timezone_str: str) -> Optional[int]:
+    """
+    从日志行开头提取时间并换算为毫秒时间戳
+
+    依次尝试前三个、前两个、第一个空白分隔字段，兼容 "日期 时间 时区"、"日期 时间"
+    和 ISO 8601 等单字段写法。日志中常见的 "12:34:56,789" / "12:34:56.789"
+    毫秒写法会先拆出毫秒部分再解析。
+
+    Returns:
+        毫秒时间戳，行首没有可识别的时间（如异常堆栈的续行）时返回 None
+    """
+    fields = line.split(None, 3)[:3]
+    millis = 0
+    if len(fields) >= 2:
+        for separator in (',', '.'):
+            whole, found, fraction = fields[1].partition(separator)
+            if found and fraction.isdigit() and whole.count(':') == 2:
+                fields[1] = whole
+                millis = int(fraction[:3].ljust(3, '0'))
+                break
+    for count in range(len(fields), 0, -1):
+        try:
+            timestamp = tt.date_to_timestamp(' '.join(fields[:count]), timezone_str)
+        except ValueError:
+            continue
+        return timestamp + millis if count >= 2 else timestamp
+    return None
+
+def _head_digest(path: str, length: int) -> str:
+    """文件开头 length 字节的摘要"""
+    import hashlib
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read(length)).hexdigest()
+
+class TimeIndex:
+    """
+    日志文件的稀疏时间索引
+
+    每隔 every 行记录一次 (毫秒时间戳, 行起始字节偏移)，要求日志按时间非递减排列。
+    索引文件为文本格式：第一行是 JSON 头部，之后每行一个 "时间戳\\t偏移"。
+
+    头部记录已索引的字节数、距上一个索引点的行数以及文件开头的摘要（只覆盖已索引的部分，
+    最多 _INDEX_HEAD_BYTES 字节，不足 4KB 的小文件追加后摘要不变），
+    日志追加写入后只需从已索引位置继续扫描；文件被截断或替换时重新构建。
+    """
+
+    def __init__(self, log_path: str, timezone_str: str, every: int = tt.DEFAULT_INDEX_EVERY,
+                 index_path: Optional[str] = None):
+        if every <= 0:
+            raise ValueError(f"索引间隔必须为正数: {every}")
+        self.log_path = log_path
+        self.index_path = index_path or log_path + INDEX_SUFFIX
+        self.timezone_str = timezone_str
+        self.every = every
+        self.indexed_size = 0
+        self.since_last = every  # 第一行可解析的时间即作为索引点
+        self.head_size = 0
+        self.head_digest = ''
+        self.timestamps: List[int] = []
+        self.offsets: List[int] = []
+
+    def _header(self) -> Dict[str, Any]:
+        return {
+            'version': _INDEX_VERSION,
+            'timezone': self.timezone_str,
+            'every': self.every,
+            'indexed_size': self.indexed_size,
+            'since_last': self.since_last,
+            'head_size': self.head_size,
+            'head_digest': self.head_digest,
+        }
+
+    def load(self) -> bool:
+        """
+        读取已有索引文件
+
+        Returns:
+            索引文件存在且与当前参数（时区、间隔、版本）一致时返回 True
+        """
+        import json
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                header = json.loads(f.readline())
+                if (header.get('version') != _INDEX_VERSION or header.get('timezone') != self.timezone_str
+                        or header.get('every') != self.every):
+                    return False
+                timestamps, offsets = [], []
+                for line in f:
+                    timestamp, offset = line.split('\t')
+                    timestamps.append(int(timestamp))
+                    offsets.append(int(offset))
+        except (OSError, ValueError, AttributeError):
+            return False
+        self.indexed_size = header['indexed_size']
+        self.since_last = header['since_last']
+        self.head_size = header['head_size']
+        self.head_digest = header['head_digest']
+        self.timestamps, self.offsets = timestamps, offsets
+        return True
+
+    def save(self) -> None:
+        """原子地写入索引文件"""
+        import json
+        tmp_path = f'{self.index_path}.tmp{os.getpid()}'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self._header()))
+            f.write('\n')
+            f.writelines(f'{timestamp}\t{offset}\n'
+                         for timestamp, offset in zip(self.timestamps, self.offsets))
+        os.replace(tmp_path, self.index_path)
+
+    def _is_stale(self) -> bool:
+        """日志被截断或开头内容变化（轮转、替换）时已有索引不可再用"""
+        size = os.path.getsize(self.log_path)
+        if size < self.indexed_size:
+            return True
+        return self.indexed_size > 0 and _head_digest(self.log_path, self.head_size) != self.head_digest
+
+    def update(self) -> int:
+        """
+        增量更新索引：只扫描上次索引之后追加的完整行
+
+        只有达到采样间隔的行才解析时间，其余行只计数，扫描速度接近顺序读文件。
+
+        Returns:
+            本次新增的索引点数量
+        """
+        if self._is_stale():
+            self.indexed_size, self.since_last, self.head_size = 0, self.every, 0
+            self.timestamps, self.offsets = [], []
+
+        added = 0
+        offset = self.indexed_size
+        with open(self.log_path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # 末尾未写完的行留到下次更新
+                if self.since_last >= self.every:
+                    timestamp = extract_line_timestamp(line[:128].decode('utf-8', errors='replace'),
+                                                       self.timezone_str)
+                    if timestamp is not None:
+                        self.timestamps.append(timestamp)
+                        self.offsets.append(offset)
+                        self.since_last = 0
+                        added += 1
+                self.since_last += 1
+                offset += len(line)
+
+        if offset != self.indexed_size or not self.head_digest:
+            self.indexed_size = offset
+            self.head_size = min(offset, _INDEX_HEAD_BYTES)
+            self.head_digest = _head_digest(self.log_path, self.head_size)
+        return added
+
+    def span(self, start_ms: int, end_ms: int) -> Tuple[int, Optional[int]]:
+        """
+        计算可能包含 [start_ms, end_ms) 内日志行的字节区间
+
+        Returns:
+            (起始偏移, 结束偏移或None)，None 表示一直读到文件末尾
+        """
+        # 最后一个早于 start_ms 的索引点之前的行都早于 start_ms
+        index = bisect_left(self.timestamps, start_ms) - 1
+        begin = self.offsets[index] if index >= 0 else 0
+        # 第一个不早于 end_ms 的索引点之后的行都不早于 end_ms
+        index = bisect_left(self.timestamps, end_ms)
+        end = self.offsets[index] if index < len(self.offsets) else None
+        return begin, end
+
+def build_time_index(log_path: str, timezone_str: str, every: int = tt.DEFAULT_INDEX_EVERY,
+                     index_path: Optional[str] = None) -> TimeIndex:
+    """
+    构建或增量更新日志文件的稀疏时间索引并写回磁盘
+
+    Args:
+        log_path: 日志文件路径
+        timezone_str: 行内时间不带时区信息时采用的时区
+        every: 每隔多少行记录一个索引点
+        index_path: 索引文件路径，默认为日志路径加 .tidx 后缀
+
+    Returns:
+        更新后的索引
+    """
+    index = TimeIndex(log_path, timezone_str, every, index_path)
+    index.load()
+    index.update()
+    index.save()
+    return index
+
+def query_time_range(log_path: str, start_ms: int, end_ms: int, timezone_str: str,
+                     every: int = tt.DEFAULT_INDEX_EVERY, index_path: Optional[str] = None) -> Iterator[bytes]:
+    """
+    查询时间落在 [start_ms, end_ms) 内的日志行
+
+    先增量更新索引，再通过 mmap 只读取索引给出的字节区间。行首没有时间的续行
+    （如异常堆栈）归属于它前面最近的带时间的行。
+
+    Yields:
+        原始日志行（bytes，包含换行符）
+    """
+    index = build_time_index(log_path, timezone_str, every, index_path)
+    begin, end = index.span(start_ms, end_ms)
+
+    import mmap
+    with open(log_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = size if end is None else end
+            current = None
+            position = begin
+            while position < end:
+                newline = mm.find(b'\n', position, end)
+                line_end = end if newline == -1 else newline + 1
+                line = mm[position:line_end]
+                position = line_end
+                timestamp = extract_line_timestamp(line[:128].decode('utf-8', errors='replace'),
+                                                   timezone_str)
+                if timestamp is not None:
+                    current = timestamp
+                if current is None or current < start_ms:
+                    continue
+                if current >= end_ms:
+                    break
+                yield line
+
+def run_index_cli(args: 'argparse.Namespace') -> None:
+    """执行 --build-index / --range-query"""
+    timezone_str = tt.TIME_ZONES[args.timezone]['tz']
+    try:
+        if args.build_index:
+            start = time.perf_counter()
+            index = build_time_index(args.build_index, timezone_str, args.index_every)
+            print(f'索引已更新: {index.index_path}，共 {len(index.offsets)} 个索引点，'
+                  f'已索引 {index.indexed_size} 字节，耗时 {time.perf_counter() - start:.3f} 秒',
+                  file=sys.stderr)
+            return
+
+        start_ms = tt._parse_time_bound(args.time_from, timezone_str)
+        end_ms = tt._parse_time_bound(args.time_to, timezone_str)
+        output = sys.stdout.buffer
+        for line in query_time_range(args.range_query, start_ms, end_ms, timezone_str, args.index_every):
+            output.write(line)
+        output.flush()
+    except OSError as e:
+        print(f'错误: 无法读取日志文件: {e}', file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        print(f'错误: {e}', file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,274 @@
+"""
+time_transfer 的日志时间改写（--rewrite）
+
+把日志中的时间从源时区换算到目标时区，按块读写，内存占用与输入大小无关。
+"""
+
+import datetime
+import sys
+import time
+from typing import TYPE_CHECKING, Dict, List, TextIO, Tuple
+
+if __package__:
+    from . import time_transfer as tt
+else:
+    import time_transfer as tt
+
+if TYPE_CHECKING:
+    import argparse
+    import re
+
+# 日志时间改写：各格式指令在行内查找时使用的正则（带取值范围，避免匹配到无效日期）
+_REWRITE_DIRECTIVE_PATTERNS = {
+    'Y': r'(\d{4})',
+    'm': r'(1[0-2]|0?[1-9])',
+    'd': r'(3[01]|[12]\d|0?[1-9])',
+    'H': r'(2[0-3]|[01]?\d)',
+    'I': r'(1[0-2]|0?[1-9])',
+    'M': r'([0-5]\d)',
+    'S': r'([0-5]\d)',
+    'f': r'(\d{1,6})',
+    'p': r'(AM|PM|am|pm)',
+}
+
+class _RewriteFormat:
+    """
+    改写模式中的一个候选格式：DATE_FORMATS 中的格式及其在组合正则中的分组位置
+
+    layout 为格式按指令拆开后的 (指令, 其后的字面量) 列表，prefix 为首个指令之前的字面量，
+    改写时按它逐个字段输出。
+    """
+    __slots__ = ('fmt', 'directives', 'group', 'prefix', 'layout')
+
+    def __init__(self, fmt: str, directives: List[str], group: int):
+        self.fmt = fmt
+        self.directives = directives
+        self.group = group
+        pieces = fmt.split('%')
+        self.prefix = pieces[0]
+        self.layout = [(piece[0], piece[1:]) for piece in pieces[1:]]
+
+def _rewrite_format_regex(fmt: str, abbr_pattern: str) -> Tuple[str, List[str]]:
+    """把 DATE_FORMATS 中的一个格式翻译为正则，返回 (正则, 指令列表)"""
+    import re
+    parts, directives = [], []
+    i = 0
+    while i < len(fmt):
+        if fmt[i] == '%' and i + 1 < len(fmt):
+            directive = fmt[i + 1]
+            if directive == 'Z':
+                parts.append(f'({abbr_pattern})(?![A-Za-z])')
+            else:
+                parts.append(_REWRITE_DIRECTIVE_PATTERNS[directive])
+            directives.append(directive)
+            i += 2
+        else:
+            parts.append(re.escape(fmt[i]))
+            i += 1
+    return ''.join(parts), directives
+
+def is_rewritable_format(fmt: str, include_compact: bool = False) -> bool:
+    """
+    判断格式是否参与日志时间改写
+
+    排除：不含时间的纯日期格式（换时区后日期含义会变）、带 %z 偏移或字面量 Z 的格式
+    （本身已是绝对时间）；紧凑的纯数字格式容易误伤订单号等，只在显式开启时参与。
+    """
+    if '%z' in fmt or fmt.endswith('Z') and not fmt.endswith('%Z'):
+        return False
+    if '%H' not in fmt and '%I' not in fmt:
+        return False
+    if fmt.replace('%', '').isalnum() and '%p' not in fmt:
+        return include_compact
+    return True
+
+def _rewrite_prefilter(fmts: List[str]) -> str:
+    """
+    由各格式开头的 "首个指令 + 下一个字符" 生成前置断言，例如 (?=\\d{1,2}(?:/|\\.)|\\d{4}(?:\\-|年))
+
+    正则引擎无法对分支众多的组合正则做前缀优化，先用这个断言排除绝大多数数字位置，
+    只有形似日期开头的位置才会逐个尝试候选格式。
+    """
+    import re
+    heads: Dict[str, set] = {}
+    for fmt in fmts:
+        width = r'\d{4}' if fmt[1] == 'Y' else r'\d{1,2}'
+        following = fmt[2:3]
+        heads.setdefault(width, set()).add(r'\d' if following == '%' else re.escape(following))
+    return '(?=' + '|'.join(f"{width}(?:{'|'.join(sorted(chars))})"
+                            for width, chars in sorted(heads.items())) + ')'
+
+_REWRITE_PATTERNS: Dict[bool, Tuple['re.Pattern', List[_RewriteFormat]]] = {}
+
+def build_rewrite_pattern(include_compact: bool = False) -> Tuple['re.Pattern', List[_RewriteFormat]]:
+    """
+    由 DATE_FORMATS 生成在日志行中查找时间的组合正则（按参数缓存）
+
+    指令更多的格式排在前面，保证 "12:34:56" 不会只匹配到 "12:34"；指令数相同时
+    保持 DATE_FORMATS 中的顺序，例如 10/11/2023 与 parse_date_string 一样按美式解析。
+    前后都不允许紧邻数字，避免匹配到更长数字串的一部分；后面紧跟 Z、时区偏移、
+    ":数字" 或 "小数秒 + Z/时区偏移" 时不匹配，避免只改写带偏移时间或更长时间的一部分
+    （例如 2023-10-11T12:34:56.123Z 的 .%f 分支因结尾的 Z 失败后，不能退回到不带小数秒的格式）。
+
+    Returns:
+        (组合正则, 候选格式列表)，候选格式中记录了各自外层分组的编号
+    """
+    cached = _REWRITE_PATTERNS.get(include_compact)
+    if cached is not None:
+        return cached
+
+    import re
+    abbrs = sorted(tt.TZ_ABBR_MAP, key=len, reverse=True)
+    abbr_pattern = '|'.join(abbrs)
+    fmts = [fmt for fmt in tt.DATE_FORMATS if is_rewritable_format(fmt, include_compact)]
+    fmts.sort(key=lambda fmt: -fmt.count('%'))
+
+    alternatives, formats = [], []
+    group = 1
+    for fmt in fmts:
+        regex, directives = _rewrite_format_regex(fmt, abbr_pattern)
+        alternatives.append(f'({regex})')
+        formats.append(_RewriteFormat(fmt, directives, group))
+        group += 1 + len(directives)
+    # 所有格式都以数字开头，先用 (?=\d) 快速跳过非数字位置，再用前置断言排除不像日期开头的位置
+    pattern = re.compile(r'(?=\d)(?<!\d)' + _rewrite_prefilter(fmts) + '(?:' + '|'.join(alternatives) + r')(?![\dZ]|:\d|\s?[+-]\d{2}:?\d{2}|[.,]\d+(?:Z|\s?[+-]\d{2}:?\d{2}))')
+    _REWRITE_PATTERNS[include_compact] = pattern, formats
+    return pattern, formats
+
+class TimestampRewriter:
+    """
+    把文本中的时间从源时区改写为目标时区，保持原有格式
+
+    各字段保持原来的宽度：原文没有补零的月、日、时（如 1.2.2023 9:00）改写后同样不补零，
+    AM/PM 保持原来的大小写，小数秒原样保留。
+
+    带时区缩写的时间按缩写推断源时区（与 date_to_timestamp 的规则一致），
+    改写后缩写换成目标时区的缩写。无法换算的匹配（如 2 月 30 日）原样保留。
+    """
+
+    def __init__(self, source_timezone: str, target_timezone: str, include_compact: bool = False,
+                 cache_size: int = tt.DEFAULT_CACHE_SIZE):
+        self.source_timezone = source_timezone
+        self.target_timezone = target_timezone
+        self.pattern, formats = build_rewrite_pattern(include_compact)
+        self._formats = {fmt.group: fmt for fmt in formats}
+        self._source_zone = tt.get_zone(source_timezone)
+        self._target_zone = tt.get_zone(target_timezone)
+        # 日志中同一时间往往重复出现很多次，按匹配文本缓存改写结果
+        self._cache = tt.LRUCache(cache_size)
+        self.matches = 0
+        self.failures = 0
+
+    def _convert(self, match: 're.Match') -> str:
+        text = match.group()
+        self.matches += 1
+        replacement = self._cache.get(text)
+        if replacement is not None:
+            return replacement
+
+        spec = self._formats[match.lastindex]
+        values = match.groups()[spec.group:spec.group + len(spec.directives)]
+        fields = dict(zip(spec.directives, values))
+        try:
+            hour = int(fields.get('H', 0))
+            if 'I' in fields:
+                hour = int(fields['I']) % 12 + (12 if fields['p'].upper() == 'PM' else 0)
+            local = datetime.datetime(int(fields['Y']), int(fields['m']), int(fields['d']),
+                                      hour, int(fields.get('M', 0)), int(fields.get('S', 0)))
+        except ValueError:
+            self.failures += 1
+            return text
+
+        zone = self._source_zone
+        if 'Z' in fields:
+            zone = tt.get_zone(tt.detect_timezone_from_abbr(fields['Z'], self.source_timezone))
+        delta = local - tt._EPOCH_NAIVE
+        utc_seconds = zone.local_to_utc(delta.days * 86400 + delta.seconds)
+        offset, abbr = self._target_zone.utc_offset(utc_seconds)
+
+        # 输出沿用原格式和各字段的宽度；小数秒原样保留，时区缩写换成目标时区的缩写
+        target = time.gmtime(utc_seconds + offset)
+        rendered = {
+            'Y': f'{target.tm_year:04d}', 'm': target.tm_mon, 'd': target.tm_mday, 'H': target.tm_hour,
+            'I': (target.tm_hour - 1) % 12 + 1, 'M': f'{target.tm_min:02d}', 'S': f'{target.tm_sec:02d}',
+            'f': fields.get('f'), 'Z': abbr,
+        }
+        if 'p' in fields:
+            meridiem = 'PM' if target.tm_hour >= 12 else 'AM'
+            rendered['p'] = meridiem if fields['p'].isupper() else meridiem.lower()
+        parts = [spec.prefix]
+        for directive, literal in spec.layout:
+            value = rendered[directive]
+            if isinstance(value, int):
+                value = str(value) if len(fields[directive]) == 1 else f'{value:02d}'
+            parts.append(value)
+            parts.append(literal)
+        replacement = ''.join(parts)
+        self._cache.put(text, replacement)
+        return replacement
+
+    def rewrite(self, text: str) -> str:
+        """改写一段文本（可以包含多行）中的全部时间"""
+        return self.pattern.sub(self._convert, text)
+
+# 改写模式每次读取的块大小（字符）
+REWRITE_BLOCK_SIZE = 1024 * 1024
+
+def rewrite_stream(input_stream: TextIO, output_stream: TextIO, source_timezone: str,
+                   target_timezone: str, include_compact: bool = False,
+                   block_size: int = REWRITE_BLOCK_SIZE) -> Dict[str, float]:
+    """
+    流式改写日志中的时间
+
+    按块读取，在换行处切分后对整块做一次正则替换，没有时间的行不会被单独处理；
+    读写都是整块进行，内存占用与输入大小无关。
+
+    Returns:
+        统计信息: matches, failures, elapsed
+    """
+    start = time.perf_counter()
+    rewriter = TimestampRewriter(source_timezone, target_timezone, include_compact)
+    read, write = input_stream.read, output_stream.write
+    pending = ''
+    while True:
+        block = read(block_size)
+        if not block:
+            break
+        cut = block.rfind('\n') + 1
+        if cut == 0:
+            pending += block
+            continue
+        write(rewriter.rewrite(pending + block[:cut]))
+        pending = block[cut:]
+    if pending:
+        write(rewriter.rewrite(pending))
+    output_stream.flush()
+    return {
+        'matches': rewriter.matches,
+        'failures': rewriter.failures,
+        'elapsed': time.perf_counter() - start,
+    }
+
+def run_rewrite_cli(args: 'argparse.Namespace') -> None:
+    """执行 --rewrite：从标准输入或 --input 文件读取日志，改写后写到标准输出"""
+    import io
+    source = tt.TIME_ZONES[args.source_tz]['tz']
+    target = tt.TIME_ZONES[args.target_tz]['tz']
+    # surrogateescape + newline='' 保证非 UTF-8 字节和 \r\n 原样输出
+    output = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='surrogateescape',
+                              newline='', write_through=False)
+    try:
+        if args.input == '-':
+            input_stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8',
+                                            errors='surrogateescape', newline='')
+        else:
+            input_stream = open(args.input, 'r', encoding='utf-8', errors='surrogateescape', newline='')
+        with input_stream:
+            summary = rewrite_stream(input_stream, output, source, target, args.rewrite_compact)
+    except OSError as e:
+        print(f'错误: 无法读取输入文件: {e}', file=sys.stderr)
+        sys.exit(1)
+    finally:
+        output.detach()
+    print(f"已改写 {summary['matches'] - summary['failures']} 处时间，"
+          f"{summary['failures']} 处无法换算保持原样，耗时 {summary['elapsed']:.3f} 秒", file=sys.stderr)
@@ -0,0 +1,336 @@
+"""
+time_transfer 的常驻服务与客户端（--serve / --connect）
+
+服务端通过 Unix socket 和本机 HTTP 接收 JSON 转换请求，时区表和缓存常驻内存；
+ConversionClient 是对应的同步客户端。
+"""
+
+import os
+import sys
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if __package__:
+    from . import time_transfer as tt
+else:
+    import time_transfer as tt
+
+if TYPE_CHECKING:
+    import argparse
+    import asyncio
+
+# 守护进程模式单个请求的大小上限（字节）
+MAX_REQUEST_BYTES = 16 * 1024 * 1024
+# 批量请求每转换多少条让出一次事件循环，避免大批量请求阻塞其他客户端
+_SERVE_YIELD_EVERY = 1000
+# HTTP 服务只允许监听本机回环地址
+_LOOPBACK_HOSTS = ('127.0.0.1', '::1', 'localhost')
+_HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+                 405: 'Method Not Allowed', 413: 'Payload Too Large'}
+
+def _convert_record(value: str, mode: str, timezone_str: str, unit: str = 'ms') -> Dict[str, Any]:
+    try:
+        return tt.batch_record(value, tt.convert_value(value, mode, timezone_str, unit), None)
+    except ValueError as e:
+        return tt.batch_record(value, None, str(e))
+
+async def handle_request(request: Any) -> Dict[str, Any]:
+    """
+    处理一个转换请求
+
+    请求格式:
+        {"mode": "to_date", "timezone": "1", "value": "1697049600000"}
+        {"mode": "to_timestamp", "timezone": "Asia/Shanghai", "values": ["...", "..."]}
+        可选字段 unit 指定时间戳单位 s/ms/us/ns/auto，默认 ms
+
+    Returns:
+        单个请求返回 {"input", "output"} 或 {"input", "error"}；
+        批量请求返回 {"results": [...]}，每项格式同单个请求
+
+    Raises:
+        ValueError: 请求本身不合法（缺少字段、模式或时区错误）
+    """
+    if not isinstance(request, dict):
+        raise ValueError("请求必须是 JSON 对象")
+    mode = request.get('mode')
+    if mode not in ('to_date', 'to_timestamp'):
+        raise ValueError(f"不支持的转换模式: {mode}")
+    import asyncio
+    timezone = request.get('timezone')
+    if not isinstance(timezone, str):
+        raise ValueError("缺少 timezone 字段")
+    timezone_str = tt.resolve_timezone(timezone)
+    unit = request.get('unit', 'ms')
+    if not isinstance(unit, str):
+        raise ValueError("unit 字段必须是字符串")
+    tt._unit_scale(unit)
+
+    if 'values' in request:
+        values = request['values']
+        if not isinstance(values, list):
+            raise ValueError("values 字段必须是数组")
+        results = []
+        for count, value in enumerate(values, 1):
+            results.append(_convert_record(str(value), mode, timezone_str, unit))
+            if count % _SERVE_YIELD_EVERY == 0:
+                await asyncio.sleep(0)
+        return {'results': results}
+
+    if 'value' not in request:
+        raise ValueError("缺少 value 或 values 字段")
+    return _convert_record(str(request['value']), mode, timezone_str, unit)
+
+async def _process_payload(payload: bytes) -> Dict[str, Any]:
+    """解析 JSON 请求体并处理，请求级错误以 {"error": ...} 返回"""
+    import json
+    try:
+        return await handle_request(json.loads(payload))
+    except ValueError as e:
+        return {'error': str(e)}
+
+def _encode_response(response: Dict[str, Any]) -> bytes:
+    import json
+    return json.dumps(response, ensure_ascii=False).encode('utf-8')
+
+async def _handle_unix_client(reader: 'asyncio.StreamReader', writer: 'asyncio.StreamWriter') -> None:
+    """Unix socket 连接: 每行一个 JSON 请求，按顺序每行返回一个 JSON 响应"""
+    try:
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                writer.write(_encode_response({'error': '请求过大'}) + b'\n')
+                break
+            if not line:
+                break
+            if not line.strip():
+                continue
+            writer.write(_encode_response(await _process_payload(line)) + b'\n')
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def _handle_http_client(reader: 'asyncio.StreamReader', writer: 'asyncio.StreamWriter') -> None:
+    """
+    极简 HTTP/1.1 服务: POST / 或 /convert 提交 JSON 请求，GET /health 检查存活
+
+    支持 keep-alive，同一连接上的请求按顺序处理。
+    """
+    import asyncio
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            parts = request_line.decode('latin-1').split()
+            headers: Dict[str, str] = {}
+            while True:
+                header = await reader.readline()
+                if header in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = header.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            keep_alive = False
+            if len(parts) != 3:
+                status, response = 400, {'error': '无效的 HTTP 请求'}
+            else:
+                method, path, version = parts
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+                try:
+                    length = int(headers.get('content-length', '0'))
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    status, response, keep_alive = 400, {'error': '无效的 Content-Length'}, False
+                elif length > MAX_REQUEST_BYTES:
+                    status, response, keep_alive = 413, {'error': '请求过大'}, False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    path = path.split('?', 1)[0]
+                    if method == 'GET' and path == '/health':
+                        status, response = 200, {'status': 'ok'}
+                    elif path not in ('/', '/convert'):
+                        status, response = 404, {'error': f'路径不存在: {path}'}
+                    elif method != 'POST':
+                        status, response = 405, {'error': '只支持 POST 请求'}
+                    else:
+                        response = await _process_payload(body)
+                        status = 400 if 'error' in response and 'input' not in response else 200
+
+            body = _encode_response(response)
+            writer.write(
+                f"HTTP/1.1 {status} {_HTTP_REASONS[status]}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+async def start_servers(unix_path: Optional[str] = None, host: str = '127.0.0.1',
+                        port: Optional[int] = None) -> List['asyncio.AbstractServer']:
+    """
+    启动守护进程监听，并预先构建常用时区的转换表
+
+    Args:
+        unix_path: Unix socket 路径，为None时不监听
+        host: HTTP 监听地址，只允许回环地址
+        port: HTTP 端口，为None时不监听（0 表示随机端口）
+
+    Returns:
+        已启动的服务列表
+    """
+    if unix_path is None and port is None:
+        raise ValueError("至少需要指定 Unix socket 路径或 HTTP 端口")
+    if port is not None and host not in _LOOPBACK_HOSTS:
+        raise ValueError(f"HTTP 服务只允许监听本机回环地址: {host}")
+    import asyncio
+    import stat
+
+    tt.build_zone_tables()
+    servers = []
+    if unix_path is not None:
+        # 清理上次异常退出遗留的 socket 文件，其他类型的文件不动
+        if os.path.exists(unix_path) and stat.S_ISSOCK(os.stat(unix_path).st_mode):
+            os.unlink(unix_path)
+        servers.append(await asyncio.start_unix_server(_handle_unix_client, path=unix_path,
+                                                       limit=MAX_REQUEST_BYTES))
+        os.chmod(unix_path, 0o600)
+    if port is not None:
+        servers.append(await asyncio.start_server(_handle_http_client, host, port,
+                                                  limit=MAX_REQUEST_BYTES))
+    return servers
+
+async def serve(unix_path: Optional[str] = None, host: str = '127.0.0.1',
+                port: Optional[int] = None) -> None:
+    """启动守护进程并持续运行，收到 SIGTERM 时正常退出"""
+    import asyncio
+    import signal
+    servers = await start_servers(unix_path, host, port)
+    for server in servers:
+        for sock in server.sockets:
+            print(f'服务已启动: {sock.getsockname() or unix_path}', file=sys.stderr)
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except (NotImplementedError, RuntimeError):
+        pass
+    try:
+        await asyncio.gather(*(server.serve_forever() for server in servers))
+    except asyncio.CancelledError:
+        pass
+    finally:
+        if unix_path is not None and os.path.exists(unix_path):
+            os.unlink(unix_path)
+
+class ConversionClient:
+    """
+    守护进程的同步客户端，同一个连接可发送多个请求
+
+    address 为 Unix socket 路径，或 http://host:port 形式的 HTTP 地址。
+    """
+
+    def __init__(self, address: str, timeout: Optional[float] = 30.0):
+        self.address = address
+        if address.startswith('http://'):
+            import http.client
+            from urllib.parse import urlsplit
+            url = urlsplit(address)
+            self._http = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=timeout)
+            self._sock = self._file = None
+        else:
+            import socket
+            self._http = None
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(timeout)
+            self._sock.connect(address)
+            self._file = self._sock.makefile('rwb')
+
+    def request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """发送一个请求并返回响应"""
+        import json
+        payload = _encode_response(request)
+        if self._http is not None:
+            self._http.request('POST', '/convert', body=payload,
+                               headers={'Content-Type': 'application/json'})
+            return json.loads(self._http.getresponse().read())
+        self._file.write(payload + b'\n')
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("服务端关闭了连接")
+        return json.loads(line)
+
+    def close(self) -> None:
+        if self._http is not None:
+            self._http.close()
+        else:
+            self._file.close()
+            self._sock.close()
+
+    def __enter__(self) -> 'ConversionClient':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+# 客户端批量模式每个请求携带的值数量
+CLIENT_BATCH_SIZE = 1000
+
+def run_client_cli(args: 'argparse.Namespace') -> None:
+    """通过 --connect 将单个转换或批量转换交给守护进程执行"""
+    try:
+        with ConversionClient(args.connect) as client:
+            if not args.batch:
+                response = client.request({'mode': args.mode, 'timezone': args.timezone,
+                                           'unit': args.unit, 'value': args.value})
+                if 'output' in response:
+                    print(response['output'], end='')
+                    return
+                print(f"错误: {response['error']}", file=sys.stderr)
+                sys.exit(1)
+
+            source = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8',
+                                                               errors='replace')
+            with source:
+                lines = tt.iter_input_lines(source)
+                while True:
+                    chunk = list(islice(lines, CLIENT_BATCH_SIZE))
+                    if not chunk:
+                        break
+                    response = client.request({'mode': args.mode, 'timezone': args.timezone, 'unit': args.unit,
+                                               'values': [value for _, value in chunk]})
+                    if 'error' in response:
+                        print(f"错误: {response['error']}", file=sys.stderr)
+                        sys.exit(1)
+                    for (line_no, _), record in zip(chunk, response['results']):
+                        if 'error' in record:
+                            print(f"第 {line_no} 行转换失败: {record['error']}", file=sys.stderr)
+                        sys.stdout.write(tt.format_batch_record(record['input'], record.get('output'),
+                                                             record.get('error'), args.output_format))
+                        sys.stdout.write('\n')
+            sys.stdout.flush()
+    except OSError as e:
+        print(f'错误: 无法连接服务 {args.connect}: {e}', file=sys.stderr)
+        sys.exit(1)
+
+def run_server_cli(args: 'argparse.Namespace') -> None:
+    """执行 --serve，直到收到 Ctrl+C"""
+    if args.socket is None and args.http_port is None:
+        print('错误: --serve 需要 --socket 或 --http-port 参数', file=sys.stderr)
+        sys.exit(1)
+    import asyncio
+    try:
+        asyncio.run(serve(args.socket, args.http_host, args.http_port))
+    except KeyboardInterrupt:
+        pass
+    except (OSError, ValueError) as e:
+        print(f'错误: 服务启动失败: {e}', file=sys.stderr)
+        sys.exit(1)
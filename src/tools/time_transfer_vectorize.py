@@ -0,0 +1,155 @@
+"""
+time_transfer 的向量化接口
+
+基于 numpy 批量转换时间戳和本地时间，numpy 为可选依赖（uv sync --extra vectorize），
+只在调用这里的函数时才需要。
+"""
+
+from typing import Any, Tuple
+
+if __package__:
+    from . import time_transfer as tt
+else:
+    import time_transfer as tt
+
+def timestamps_to_dates(timestamps: Any, timezone_str: str, output: str = 'str') -> Any:
+    """
+    向量化地将毫秒时间戳数组转换为指定时区的本地时间
+
+    偏移通过对转换表做 searchsorted 一次性求出，年月日时分秒由 numpy 批量格式化。
+
+    Args:
+        timestamps: 毫秒级时间戳数组（浮点数向下取整到毫秒）
+        timezone_str: 时区字符串
+        output: 'str' 返回与 timestamp_to_date 相同格式的字符串数组，
+                'datetime64' 返回本地墙上时间的 datetime64[ms] 数组
+
+    Returns:
+        与输入形状相同的 numpy 数组
+    """
+    np = tt._require_numpy()
+    if output not in ('str', 'datetime64'):
+        raise ValueError(f"不支持的输出类型: {output}")
+
+    millis = np.asarray(timestamps)
+    if millis.dtype.kind == 'f':
+        millis = np.floor(millis)
+    millis = millis.astype(np.int64)
+
+    transitions, offsets, _, abbrs = tt.get_zone_table(timezone_str).as_arrays()
+    seconds = np.floor_divide(millis, 1000)
+    index = np.maximum(np.searchsorted(transitions, seconds, side='right') - 1, 0)
+    local_offsets = offsets[index]
+
+    if output == 'datetime64':
+        return (millis + local_offsets * 1000).astype('datetime64[ms]')
+
+    # 按 UCS4 码位直接写出 "YYYY-MM-DD HH:MM:SS ABBR"，避免逐个元素格式化
+    year, month, day, hour, minute, second = _civil_fields(np, (seconds + local_offsets).reshape(-1))
+    zone_abbrs = abbrs[index].reshape(-1)
+    abbr_width = zone_abbrs.dtype.itemsize // 4
+    result = np.zeros(millis.size, dtype=f'U{20 + abbr_width}')
+    if millis.size == 0:
+        return result.reshape(millis.shape)
+
+    # 先按列写入连续缓冲区，最后一次性转置拷贝，避免逐列跨步写入
+    columns = np.empty((20 + abbr_width, millis.size), dtype=np.uint32)
+    zero = ord('0')
+    for column, value, width in ((0, year, 4), (5, month, 2), (8, day, 2),
+                                 (11, hour, 2), (14, minute, 2), (17, second, 2)):
+        for position in range(width - 1, -1, -1):
+            quotient = value // 10
+            columns[column + position] = value - quotient * 10 + zero
+            value = quotient
+    for column, char in ((4, '-'), (7, '-'), (10, ' '), (13, ':'), (16, ':'), (19, ' ')):
+        columns[column] = ord(char)
+    columns[20:] = zone_abbrs.view(np.uint32).reshape(millis.size, -1).T
+    result.view(np.uint32).reshape(millis.size, -1)[...] = columns.T
+    return result.reshape(millis.shape)
+
+def _civil_fields(np: Any, local_seconds: Any) -> Tuple[Any, Any, Any, Any, Any, Any]:
+    """
+    批量将本地秒数拆分为 年/月/日/时/分/秒 字段
+
+    日期部分使用公历 days-from-civil 的逆算法，全部为整数数组运算。
+    """
+    days, day_seconds = np.divmod(local_seconds, 86400)
+    # 拆分后的各字段都在 int32 范围内，用 int32 运算更快
+    days = days.astype(np.int32)
+    day_seconds = day_seconds.astype(np.int32)
+    shifted = days + 719468
+    era = np.floor_divide(shifted, 146097)
+    day_of_era = shifted - era * 146097
+    year_of_era = (day_of_era - day_of_era // 1460 + day_of_era // 36524 - day_of_era // 146096) // 365
+    day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 - year_of_era // 100)
+    month_index = (5 * day_of_year + 2) // 153
+    day = day_of_year - (153 * month_index + 2) // 5 + 1
+    month = np.where(month_index < 10, month_index + 3, month_index - 9)
+    year = year_of_era + era * 400 + (month <= 2)
+    hour = day_seconds // 3600
+    minute_seconds = day_seconds - hour * 3600
+    minute = minute_seconds // 60
+    return year, month, day, hour, minute, minute_seconds - minute * 60
+
+def _vector_local_to_utc(table: tt.ZoneTable, local_seconds: Any) -> Any:
+    """ZoneTable.local_to_utc 的向量化版本（is_dst=False）"""
+    np = tt._require_numpy()
+    transitions, offsets, dst, _ = table.as_arrays()
+
+    def index_at(values):
+        return np.maximum(np.searchsorted(transitions, values, side='right') - 1, 0)
+
+    candidates = []
+    for delta in (-86400, 86400):
+        offset = offsets[index_at(local_seconds + delta)]
+        utc_seconds = local_seconds - offset
+        index = index_at(utc_seconds)
+        candidates.append((utc_seconds, offsets[index] == offset, dst[index]))
+    (utc_a, valid_a, dst_a), (utc_b, valid_b, dst_b) = candidates
+
+    # 只有一个有效偏移（或两个偏移得到同一时刻）时直接取有效的那个
+    result = np.where(valid_a, utc_a, utc_b)
+
+    # 重复出现的时间：优先取标准时间，否则取较晚的时刻
+    ambiguous = valid_a & valid_b & (utc_a != utc_b)
+    if ambiguous.any():
+        resolved = np.where(~dst_a & dst_b, utc_a,
+                            np.where(dst_a & ~dst_b, utc_b, np.maximum(utc_a, utc_b)))
+        result = np.where(ambiguous, resolved, result)
+
+    # 不存在的时间：与 pytz 一样回拨 6 小时定位后再加回
+    gap = ~(valid_a | valid_b)
+    if gap.any():
+        result[gap] = _vector_local_to_utc(table, local_seconds[gap] - tt._GAP_SHIFT_SECONDS) + tt._GAP_SHIFT_SECONDS
+    return result
+
+def dates_to_timestamps(local_times: Any, timezone_str: str) -> Any:
+    """
+    向量化地将已解析的本地时间转换为毫秒时间戳（timestamps_to_dates 的逆操作）
+
+    Args:
+        local_times: 本地墙上时间的 datetime64 数组，
+                     或 (年, 月, 日[, 时, 分, 秒[, 微秒]]) 各字段数组组成的元组
+        timezone_str: 时区字符串
+
+    Returns:
+        int64 毫秒时间戳数组，歧义/不存在的时间按 date_to_timestamp 的规则处理
+    """
+    np = tt._require_numpy()
+    if isinstance(local_times, tuple):
+        local_times = _fields_to_datetime64(np, *local_times)
+    local_us = np.asarray(local_times).astype('datetime64[us]').astype(np.int64)
+    local_seconds = np.floor_divide(local_us, 1000000)
+    microseconds = local_us - local_seconds * 1000000
+
+    utc_seconds = _vector_local_to_utc(tt.get_zone_table(timezone_str), local_seconds)
+    return utc_seconds * 1000 + microseconds // 1000
+
+def _fields_to_datetime64(np: Any, year: Any, month: Any, day: Any, hour: Any = 0,
+                          minute: Any = 0, second: Any = 0, microsecond: Any = 0) -> Any:
+    """由年月日时分秒字段数组组装 datetime64[us] 数组"""
+    months = (np.asarray(year, dtype=np.int64) - 1970) * 12 + np.asarray(month, dtype=np.int64) - 1
+    days = months.astype('datetime64[M]').astype('datetime64[D]') + (np.asarray(day, dtype=np.int64) - 1)
+    micros = ((np.asarray(hour, dtype=np.int64) * 3600 + np.asarray(minute, dtype=np.int64) * 60
+               + np.asarray(second, dtype=np.int64)) * 1000000 + np.asarray(microsecond, dtype=np.int64))
+    return days.astype('datetime64[us]') + micros.astype('timedelta64[us]')
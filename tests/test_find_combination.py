@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+find_combination.py 的单元测试
+
+测试加减组合查找的各个功能模块，包括：
+- 加减和的枚举与编码
+- 折半搜索与穷举结果一致
+- 并行查找、数量与时间限制
+- 结果格式与排序
+- 最接近目标值的组合
+- 命令行入口
+"""
+
+import unittest
+import os
+import random
+import subprocess
+import sys
+import time
+from fractions import Fraction
+from itertools import combinations, islice, product
+from unittest.mock import patch
+
+# 添加 src 目录到 Python 路径，以便导入被测试的模块
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tools.find_combination import (
+    EXAMPLE_NUMBERS,
+    EXAMPLE_TARGET,
+    SignedSumReachability,
+    Solution,
+    choose_engine,
+    find_combinations_to_target,
+    find_nearest_combinations,
+    format_expression,
+    is_reachable,
+    iter_combinations,
+    iter_signed_solutions,
+    signed_sums,
+    solve,
+)
+import tools.find_combination as find_combination
+
+
+def brute_force(numbers, target):
+    """逐个组合、逐个符号穷举，作为参照"""
+    found = []
+    for r in range(1, len(numbers) + 1):
+        for combo in combinations(range(len(numbers)), r):
+            for signs in product([1, -1], repeat=r):
+                if sum(numbers[i] * sign for i, sign in zip(combo, signs)) == target:
+                    found.append((combo, signs))
+    return found
+
+
+class TestSignedSums(unittest.TestCase):
+    """测试加减和的枚举"""
+
+    def test_ternary_layout(self):
+        """测试下标按三进制编码各数的用法"""
+        values = [5, 7]
+        sums = signed_sums(values)
+        self.assertEqual(len(sums), 9)
+        for code, total in enumerate(sums):
+            expected = 0
+            for j, value in enumerate(values):
+                digit = code // 3 ** j % 3
+                expected += {0: 0, 1: value, 2: -value}[digit]
+            self.assertEqual(total, expected)
+
+    def test_empty(self):
+        self.assertEqual(signed_sums([]), [0])
+
+
+class TestMeetInTheMiddle(unittest.TestCase):
+    """测试折半搜索"""
+
+    def test_matches_brute_force(self):
+        """测试与穷举结果完全一致（包括重复数值、零和负数）"""
+        rng = random.Random(21)
+        for _ in range(200):
+            numbers = [rng.randrange(-20, 40) for _ in range(rng.randrange(0, 8))]
+            target = rng.randrange(-30, 30)
+            with self.subTest(numbers=numbers, target=target):
+                self.assertEqual(sorted(iter_signed_solutions(numbers, target)),
+                                 sorted(brute_force(numbers, target)))
+
+    def test_streamed_blocks(self):
+        """测试数值超过两倍索引上限、高位段按块枚举时结果不变"""
+        rng = random.Random(7)
+        numbers = [rng.randrange(1, 50) for _ in range(8)]
+        expected = sorted(brute_force(numbers, 30))
+        with patch.object(find_combination, 'MAX_INDEX_TERMS', 2):
+            self.assertEqual(sorted(iter_signed_solutions(numbers, 30)), expected)
+
+    def test_zero_target_excludes_empty_combination(self):
+        """测试目标为 0 时不返回一个数都不用的组合"""
+        self.assertEqual(sorted(iter_signed_solutions([3, 3], 0)), [((0, 1), (-1, 1)), ((0, 1), (1, -1))])
+        self.assertEqual(list(iter_signed_solutions([], 0)), [])
+
+    def test_exact_non_integer_values(self):
+        """测试 Fraction 等可精确比较的数值"""
+        numbers = [Fraction(1, 3), Fraction(1, 6), Fraction(1, 2)]
+        self.assertEqual(sorted(iter_signed_solutions(numbers, Fraction(1, 2))),
+                         [((0, 1), (1, 1)), ((2,), (1,))])
+
+    def test_no_term_cap(self):
+        """测试需要全部数值参与的组合也能找到"""
+        numbers = list(range(1, 13))
+        target = sum(numbers) - 2 * 12
+        results = find_combinations_to_target(numbers, target)
+        self.assertIn([1] * 11 + [-1], [result['signs'] for result in results])
+
+
+class TestBitsetEngine(unittest.TestCase):
+    """测试整数可达性位集引擎"""
+
+    def test_matches_brute_force(self):
+        """测试回溯出的组合与穷举完全一致，可达性判断与折半搜索一致"""
+        rng = random.Random(22)
+        for _ in range(200):
+            numbers = [rng.randrange(-15, 30) for _ in range(rng.randrange(0, 8))]
+            target = rng.randrange(-40, 40)
+            expected = sorted(brute_force(numbers, target))
+            with self.subTest(numbers=numbers, target=target):
+                self.assertEqual(sorted(solve(numbers, target, 'bitset')), expected)
+                self.assertEqual(is_reachable(numbers, target, 'bitset'), bool(expected))
+                self.assertEqual(is_reachable(numbers, target, 'mitm'), bool(expected))
+
+    def test_engines_give_same_results(self):
+        """测试示例数据在两种引擎下结果相同"""
+        self.assertEqual(find_combinations_to_target(EXAMPLE_NUMBERS, EXAMPLE_TARGET, engine='bitset'),
+                         find_combinations_to_target(EXAMPLE_NUMBERS, EXAMPLE_TARGET, engine='mitm'))
+
+    def test_zero_target(self):
+        """测试目标为 0 时只有存在非空组合才算可达"""
+        self.assertFalse(SignedSumReachability([1, 2, 4], 0).reachable)
+        self.assertTrue(SignedSumReachability([1, 2, 3], 0).reachable)
+        self.assertFalse(SignedSumReachability([], 0).reachable)
+
+    def test_many_small_numbers(self):
+        """测试折半搜索无法处理的数值个数，按需回溯的组合都正确"""
+        rng = random.Random(5)
+        numbers = [rng.randrange(1, 1000) for _ in range(200)]
+        target = sum(numbers[::3]) - sum(numbers[1::5]) + 1
+        reachability = SignedSumReachability(numbers, target)
+        self.assertTrue(reachability.reachable)
+        for combo, signs in islice(reachability.solutions(), 20):
+            self.assertEqual(sum(numbers[i] * sign for i, sign in zip(combo, signs)), target)
+        self.assertFalse(SignedSumReachability(numbers, sum(numbers) + 1).reachable)
+
+    def test_choose_engine(self):
+        """测试按数值大小和类型选择引擎"""
+        self.assertEqual(choose_engine(list(range(1, 40)), 100), 'bitset')
+        self.assertEqual(choose_engine(EXAMPLE_NUMBERS, EXAMPLE_TARGET), 'mitm')
+        self.assertEqual(choose_engine([1.5, 2.5], 4.0), 'mitm')
+        self.assertEqual(choose_engine([Fraction(1, 2)], Fraction(1, 2)), 'mitm')
+
+    def test_invalid_engine(self):
+        """测试不支持的引擎和 bitset 引擎的非整数输入"""
+        with self.assertRaises(ValueError):
+            list(solve([1, 2], 3, 'greedy'))
+        with self.assertRaises(ValueError):
+            solve([1.5, 2.5], 4.0, 'bitset')
+        with self.assertRaises(ValueError):
+            is_reachable([1.5], 1.5, 'bitset')
+
+
+class TestParallelSearch(unittest.TestCase):
+    """测试并行查找与提前停止"""
+
+    NUMBERS = [random.Random(23).randrange(1, 60) for _ in range(12)]
+    TARGET = 45
+
+    def test_deterministic_across_workers(self):
+        """测试不同进程数得到与单进程完全相同的结果和顺序，且没有重复"""
+        serial = list(solve(self.NUMBERS, self.TARGET, 'mitm'))
+        self.assertEqual(sorted(serial), sorted(brute_force(self.NUMBERS, self.TARGET)))
+        for workers in (1, 2, 3):
+            with self.subTest(workers=workers):
+                self.assertEqual(list(solve(self.NUMBERS, self.TARGET, 'mitm', workers=workers)), serial)
+
+    def test_limit_returns_prefix(self):
+        """测试 limit 截断得到完整结果的前缀，先按项数过滤再计数"""
+        serial = list(solve(self.NUMBERS, self.TARGET, 'mitm'))
+        for workers in (None, 2):
+            with self.subTest(workers=workers):
+                self.assertEqual(list(solve(self.NUMBERS, self.TARGET, 'mitm', limit=5, workers=workers)),
+                                 serial[:5])
+                short = [solution for solution in serial if len(solution[0]) <= 3]
+                self.assertEqual(list(solve(self.NUMBERS, self.TARGET, 'mitm', max_terms=3, limit=2,
+                                            workers=workers)), short[:2])
+        self.assertEqual(list(solve(self.NUMBERS, self.TARGET, 'bitset', limit=0)), [])
+
+    def test_timeout_stops_search(self):
+        """测试超时后停止查找，已得到的结果是完整结果的前缀"""
+        rng = random.Random(3)
+        numbers = [rng.randrange(10 ** 6, 10 ** 7) for _ in range(30)]
+        for workers in (None, 2):
+            with self.subTest(workers=workers):
+                start = time.time()
+                found = list(solve(numbers, 1, 'mitm', timeout=0.5, workers=workers))
+                # 不限时的完整查找要运行数分钟；上限留足余量，避免机器繁忙时误报
+                self.assertLess(time.time() - start, 0.5 + 10)
+                self.assertEqual(found, list(islice(solve(numbers, 1, 'mitm'), len(found))))
+        serial = list(solve(self.NUMBERS, self.TARGET, 'mitm'))
+        found = list(solve(self.NUMBERS, self.TARGET, 'mitm', timeout=0))
+        self.assertEqual(found, serial[:len(found)])
+
+    def test_find_combinations_limit(self):
+        """测试 find_combinations_to_target 的 limit 与并行参数"""
+        results = find_combinations_to_target(EXAMPLE_NUMBERS, EXAMPLE_TARGET, engine='mitm', workers=2)
+        self.assertEqual(results, find_combinations_to_target(EXAMPLE_NUMBERS, EXAMPLE_TARGET))
+        self.assertEqual(len(find_combinations_to_target(EXAMPLE_NUMBERS, EXAMPLE_TARGET, limit=3)), 3)
+
+
+class TestIterCombinations(unittest.TestCase):
+    """测试生成器接口与紧凑的组合表示"""
+
+    def test_solution_encoding(self):
+        """测试位掩码编码与按需生成的各字段"""
+        solution = Solution.from_terms([10, 20, 30], 20, (0, 2), (-1, 1))
+        self.assertEqual((solution.mask, solution.negative), (0b101, 0b001))
+        self.assertEqual(solution.indices, (0, 2))
+        self.assertEqual(solution.signs, (-1, 1))
+        self.assertEqual(solution.values, [10, 30])
+        self.assertEqual(solution.expression, '-10 +30')
+        self.assertEqual(len(solution), 2)
+        self.assertEqual(solution, Solution([10, 20, 30], 20, 0b101, 0b001))
+        self.assertEqual(solution.to_dict(), {'expression': '-10 +30', 'numbers': [10, 30], 'signs': [-1, 1],
+                                              'total': 20})
+
+    def test_matches_list_api(self):
+        """测试排序后与 find_combinations_to_target 一致"""
+        solutions = sorted(iter_combinations(EXAMPLE_NUMBERS, EXAMPLE_TARGET), key=Solution.sort_key)
+        self.assertEqual([solution.to_dict() for solution in solutions],
+                         find_combinations_to_target(EXAMPLE_NUMBERS, EXAMPLE_TARGET))
+
+    def test_lazy_and_limit(self):
+        """测试组合很多时按需生成，limit 截断"""
+        numbers = list(range(1, 21))
+        solutions = iter_combinations(numbers, 0, engine='bitset')
+        first = list(islice(solutions, 3))
+        self.assertEqual(len(first), 3)
+        for solution in first:
+            self.assertEqual(sum(numbers[i] * sign for i, sign in zip(solution.indices, solution.signs)), 0)
+        self.assertEqual(list(iter_combinations(numbers, 0, engine='mitm', limit=4)),
+                         list(islice(iter_combinations(numbers, 0, engine='mitm'), 4)))
+
+    def test_invalid_engine_raises_immediately(self):
+        with self.assertRaises(ValueError):
+            iter_combinations([1, 2], 3, engine='greedy')
+
+
+class TestFindCombinationsToTarget(unittest.TestCase):
+    """测试结果格式与排序"""
+
+    def test_example(self):
+        """测试示例数据：7 项以内的结果与原先的穷举一致，并找到项数更多的组合"""
+        results = find_combinations_to_target(EXAMPLE_NUMBERS, EXAMPLE_TARGET)
+        self.assertEqual(len(results), 10)
+        self.assertEqual(results[0], {
+            'expression': '-536 +2314 -86 +370',
+            'numbers': [536, 2314, 86, 370],
+            'signs': [-1, 1, -1, 1],
+            'total': EXAMPLE_TARGET,
+        })
+        self.assertEqual(results[-1]['expression'], '-536 +55 +910716 -145563 +16 -2829 +2314 -784172 +86 -370 +22345')
+        for result in results:
+            self.assertEqual(sum(n * s for n, s in zip(result['numbers'], result['signs'])), EXAMPLE_TARGET)
+        capped = find_combinations_to_target(EXAMPLE_NUMBERS, EXAMPLE_TARGET, max_terms=7)
+        self.assertEqual(capped, results[:3])
+
+    def test_order_and_format(self):
+        """测试按项数、下标、先加后减排序，表达式省略开头的加号"""
+        self.assertEqual([result['expression'] for result in find_combinations_to_target([1, 2, 3], 1)],
+                         ['1', '-1 +2', '-2 +3'])
+        self.assertEqual([result['expression'] for result in find_combinations_to_target([1, 2, 3], 0)],
+                         ['1 +2 -3', '-1 -2 +3'])
+
+    def test_format_expression(self):
+        self.assertEqual(format_expression([10, 20, 30], (0, 2), (-1, 1)), '-10 +30')
+        self.assertEqual(format_expression([10, 20, 30], (1,), (1,)), '20')
+
+
+class TestNearestCombinations(unittest.TestCase):
+    """测试最接近目标值的组合"""
+
+    @staticmethod
+    def nearest_diffs(numbers, target, k, tolerance=None, max_terms=None):
+        """穷举全部组合的差值，作为参照"""
+        diffs = []
+        for r in range(1, len(numbers) + 1):
+            for combo in combinations(range(len(numbers)), r):
+                for signs in product([1, -1], repeat=r):
+                    diff = abs(sum(numbers[i] * sign for i, sign in zip(combo, signs)) - target)
+                    if (tolerance is None or diff <= tolerance) and (max_terms is None or r <= max_terms):
+                        diffs.append(diff)
+        return sorted(diffs)[:k]
+
+    def test_matches_brute_force(self):
+        """测试差值与穷举的前 k 个一致，各组合的和正确"""
+        rng = random.Random(25)
+        for _ in range(200):
+            numbers = [rng.randrange(-20, 40) for _ in range(rng.randrange(0, 7))]
+            target = rng.randrange(-50, 50)
+            k = rng.randrange(1, 8)
+            tolerance = rng.choice([None, 3, 10])
+            max_terms = rng.choice([None, 2])
+            with self.subTest(numbers=numbers, target=target, k=k, tolerance=tolerance, max_terms=max_terms):
+                results = find_nearest_combinations(numbers, target, k, tolerance, max_terms)
+                self.assertEqual([result['diff'] for result in results],
+                                 self.nearest_diffs(numbers, target, k, tolerance, max_terms))
+                for result in results:
+                    self.assertEqual(sum(n * s for n, s in zip(result['numbers'], result['signs'])), result['total'])
+
+    def test_order_and_format(self):
+        """测试按差值排序，差值相同时按项数、下标排序"""
+        results = find_nearest_combinations([2, 4], 100, k=4)
+        self.assertEqual([(result['expression'], result['total'], result['diff']) for result in results],
+                         [('2 +4', 6, 94), ('4', 4, 96), ('2', 2, 98), ('-2 +4', 2, 98)])
+        self.assertEqual(find_nearest_combinations([2, 4], 100, k=0), [])
+        self.assertEqual(find_nearest_combinations([2, 4], 100, tolerance=50), [])
+
+    def test_includes_exact_matches(self):
+        """测试恰好等于目标值的组合排在最前，差值为 0"""
+        results = find_nearest_combinations(EXAMPLE_NUMBERS, EXAMPLE_TARGET, k=3)
+        self.assertEqual([result['diff'] for result in results], [0, 0, 0])
+
+    def test_many_duplicates(self):
+        """测试大量相同数值时差值相同的组合很多，仍然很快返回 k 个"""
+        results = find_nearest_combinations([7] * 16, 3, k=5)
+        self.assertEqual([result['diff'] for result in results], [3] * 5)
+
+
+class TestCommandLine(unittest.TestCase):
+    """测试命令行入口"""
+
+    SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'tools', 'find_combination.py')
+
+    def run_script(self, *args):
+        return subprocess.run([sys.executable, self.SCRIPT, *args], capture_output=True, text=True, check=True)
+
+    def test_found(self):
+        result = self.run_script('-t', '5', '2', '3', '4')
+        self.assertIn('找到 2 个可能的组合', result.stdout)
+        self.assertIn('表达式: 2 +3 = 5', result.stdout)
+
+    def test_reachable_only(self):
+        result = self.run_script('--reachable', '--engine', 'bitset', '-t', '7', '2', '4')
+        self.assertIn('目标值无法得到', result.stdout)
+        result = self.run_script('--reachable')
+        self.assertIn('目标值可以得到', result.stdout)
+
+    def test_show_zero_still_counts(self):
+        result = self.run_script('--show', '0')
+        self.assertIn('找到 10 个可能的组合', result.stdout)
+        self.assertIn('还有 10 个组合未显示', result.stdout)
+
+    def test_parallel_limit(self):
+        result = self.run_script('--workers', '2', '--limit', '1', '-t', '5', '2', '3', '4')
+        self.assertIn('找到 1 个可能的组合', result.stdout)
+
+    def test_not_found_shows_close(self):
+        result = self.run_script('-t', '100', '2', '4')
+        self.assertIn('未找到任何组合能够得到目标值 100', result.stdout)
+        self.assertIn('2 +4 = 6 (差值: 94)', result.stdout)
+        result = self.run_script('--nearest', '1', '--tolerance', '100', '-t', '100', '2', '4')
+        self.assertIn('2 +4 = 6 (差值: 94)', result.stdout)
+        self.assertNotIn('差值: 96', result.stdout)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)
@@ -12,11 +12,24 @@ time_transfer.py 的单元测试
 
 import unittest
 import datetime
+import asyncio
+import io
+import json
+import random
+import subprocess
+import tempfile
+import threading
+import time
 import pytz
 from unittest.mock import patch, MagicMock
 import sys
 import os
 
+try:
+    import numpy
+except ImportError:  # 向量化接口依赖 numpy，未安装时跳过相关测试
+    numpy = None
+
 # 添加 src 目录到 Python 路径，以便导入被测试的模块
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
@@ -27,9 +40,76 @@ from tools.time_transfer import (
     timestamp_to_date,
     date_to_timestamp,
     get_current_time_info,
+    format_all_zones,
+    render_all_zones,
+    convert_stream,
+    iter_input_lines,
+    convert_value,
+    detect_timestamp_unit,
+    resolve_timezone,
+    LRUCache,
+    TZ_ABBR_MAP,
+    clear_caches,
+    disable_stats,
+    enable_stats,
+    format_stats,
+    get_stats,
+    configure_cache,
+    get_cache_stats,
+    DEFAULT_CACHE_SIZE,
+    parse_size,
     TIME_ZONES,
-    DATE_FORMATS
+    DATE_FORMATS,
+    TZ_PATTERNS,
+    get_zone_table,
+    _fast_parse,
+    _format_candidates,
+    _parse_time_bound,
 )
+from tools.time_transfer_aggregate import aggregate_stream
+from tools.time_transfer_batch import iter_file_chunks, run_batch, run_parallel_batch
+from tools.time_transfer_csv import convert_csv
+from tools.time_transfer_expand import generate_time_range, parse_interval
+from tools.time_transfer_index import TimeIndex, build_time_index, extract_line_timestamp, query_time_range
+from tools.time_transfer_rewrite import TimestampRewriter, rewrite_stream
+from tools.time_transfer_serve import ConversionClient, handle_request, start_servers
+from tools.time_transfer_vectorize import dates_to_timestamps, timestamps_to_dates
+
+
+def legacy_parse_date_string(date_str):
+    """逐个格式尝试 strptime 的原始解析流程，作为差分测试的参照实现"""
+    date_str = date_str.strip()
+    for pattern in TZ_PATTERNS:
+        match = pattern.match(date_str)
+        if match:
+            date_part, tz_abbr = match.groups()
+            try:
+                fmt = '%Y-%m-%d %H:%M:%S' if '-' in date_part else '%Y/%m/%d %H:%M:%S'
+                return datetime.datetime.strptime(date_part, fmt), tz_abbr
+            except ValueError:
+                continue
+    for fmt in ['%Y-%m-%d %H:%M:%S %z', '%Y/%m/%d %H:%M:%S %z']:
+        try:
+            parsed_dt = datetime.datetime.strptime(date_str, fmt)
+            return parsed_dt.replace(tzinfo=None), str(parsed_dt.tzinfo)
+        except ValueError:
+            continue
+    for fmt in DATE_FORMATS:
+        if '%Z' in fmt or '%z' in fmt:
+            continue
+        try:
+            return datetime.datetime.strptime(date_str, fmt), None
+        except ValueError:
+            continue
+    raise ValueError(f"无法解析日期格式: '{date_str}'")
+
+
+def parse_or_error(parse, date_str):
+    """返回解析结果，解析失败时返回 'ERROR'"""
+    try:
+        return parse(date_str)
+    except ValueError:
+        return 'ERROR'
 
 
 class TestValidateTimestamp(unittest.TestCase):
@@ -159,6 +239,134 @@ class TestParseDateString(unittest.TestCase):
         self.assertIsNone(tz)
 
 
+class TestFormatDispatch(unittest.TestCase):
+    """测试按形状签名分派候选格式，结果需与逐个尝试 strptime 完全一致"""
+
+    SAMPLE = datetime.datetime(2023, 1, 5, 7, 8, 9, 120000)
+
+    def test_every_date_format_matches_trial_loop(self):
+        """测试 DATE_FORMATS 中每种格式的解析结果与原流程一致"""
+        for fmt in DATE_FORMATS:
+            date_str = self.SAMPLE.strftime(fmt.replace('%Z', 'CST').replace('%z', '+0800'))
+            with self.subTest(fmt=fmt):
+                self.assertEqual(parse_date_string(date_str), legacy_parse_date_string(date_str))
+
+    def test_resolution_order_matches_trial_loop(self):
+        """测试形状相同的歧义输入仍按原有顺序解析"""
+        cases = [
+            "20231111",               # 会先被 %Y%m%d%H%M 匹配
+            "2023111",
+            "202311",
+            "10/11/2023",             # 美式优先于欧式
+            "13/10/2023",             # 美式失败后落到欧式
+            "2023-1-5 7:8:9",
+            "2023-10- 5 12:00",
+            "10/ 5/2023",
+            "2023-10-11\t12:34:56",
+            "2023-10-11t12:34:56z",
+            "2023-10-11 12:34:56 pm",
+            "2023-10-11 12:34:56 +08:00",
+            "2023-10-11 12:34:56 -0800",
+            "2023/10/11 12:34:56 Z",
+            "2023-13-11 12:34:56 CST",
+            "2023-10-11 12:34:56 XYZW",
+            "2023.10.11 12:34",
+            "11.10.2023",
+            "2023年1月5日 7:08",
+            "2023-02-30",
+            "",
+            "12:34:56",
+        ]
+        for date_str in cases:
+            with self.subTest(date_str=date_str):
+                self.assertEqual(parse_or_error(parse_date_string, date_str),
+                                 parse_or_error(legacy_parse_date_string, date_str))
+
+    def test_unknown_shape_has_no_candidates(self):
+        """测试无法识别的形状不会尝试任何格式"""
+        self.assertEqual(_format_candidates("invalid_date"), ())
+        self.assertEqual(_format_candidates("2023-10-11 12:34:56 abc def"), ())
+
+    def test_abbr_input_skips_signature(self):
+        """测试带时区缩写的输入直接由 TZ_PATTERNS 解析，不计算形状签名；日期无效时仍按原顺序落到其他格式"""
+        import tools.time_transfer as module
+        with patch.object(module, '_PARSE_CACHE', module.LRUCache(0)), \
+                patch.object(module, '_shape_signature', side_effect=AssertionError):
+            self.assertEqual(parse_date_string("2023-10-11 12:34:56 CST"),
+                             (datetime.datetime(2023, 10, 11, 12, 34, 56), 'CST'))
+            self.assertEqual(parse_date_string("2023/10/11 12:34:56  PST"),
+                             (datetime.datetime(2023, 10, 11, 12, 34, 56), 'PST'))
+        self.assertEqual(parse_or_error(parse_date_string, "2023-02-30 12:34:56 CST"),
+                         parse_or_error(legacy_parse_date_string, "2023-02-30 12:34:56 CST"))
+
+    def test_candidates_filtered_by_length(self):
+        """测试紧凑格式按长度只保留可能匹配的候选"""
+        self.assertEqual([p.fmt for p in _format_candidates("20231011123456")], ['%Y%m%d%H%M%S'])
+        self.assertEqual([p.fmt for p in _format_candidates("20231011")], ['%Y%m%d%H%M', '%Y%m%d'])
+
+
+class TestFastPathParsers(unittest.TestCase):
+    """测试常用格式的快速解析路径，结果需与 strptime 流程逐一一致"""
+
+    FAST_FORMATS = [
+        '%Y-%m-%d %H:%M:%S',
+        '%Y-%m-%dT%H:%M:%S',
+        '%Y-%m-%dT%H:%M:%SZ',
+        '%Y-%m-%dT%H:%M:%S.%f',
+        '%Y-%m-%dT%H:%M:%S.%fZ',
+        '%Y%m%d%H%M%S',
+    ]
+
+    def random_samples(self, count=200):
+        """生成 1970-2100 年间的随机时间样本"""
+        rng = random.Random(20231011)
+        start = datetime.datetime(1970, 1, 1)
+        for _ in range(count):
+            yield start + datetime.timedelta(seconds=rng.randrange(0, 130 * 365 * 86400),
+                                             microseconds=rng.randrange(0, 1000000))
+
+    def test_fast_path_is_used(self):
+        """测试常用格式确实命中快速路径"""
+        sample = datetime.datetime(2023, 10, 11, 12, 34, 56, 123456)
+        for fmt in self.FAST_FORMATS:
+            with self.subTest(fmt=fmt):
+                self.assertIsNotNone(_fast_parse(sample.strftime(fmt)))
+
+    def test_fast_path_matches_strptime(self):
+        """测试快速路径与 strptime 流程的差分结果一致"""
+        for sample in self.random_samples():
+            for fmt in self.FAST_FORMATS:
+                date_str = sample.strftime(fmt)
+                self.assertEqual(parse_date_string(date_str), legacy_parse_date_string(date_str), date_str)
+        # 去掉小数末尾位数后同样一致
+        for date_str in ["2023-10-11T12:34:56.1", "2023-10-11T12:34:56.12Z", "2023-10-11T12:34:56.00001"]:
+            self.assertEqual(parse_date_string(date_str), legacy_parse_date_string(date_str))
+
+    def test_mismatch_falls_back_to_generic_path(self):
+        """测试不符合固定布局的输入回退到通用流程且结果一致"""
+        cases = [
+            "2023-10-11 24:00:00",
+            "2023-10-11 23:59:60",
+            "2023-02-29 12:00:00",
+            "2023-13-01 00:00:00",
+            "2023-10-11T12:34:56.1234567",
+            "2023-10-11T12:34:56,123",
+            "2023-10-11t12:34:56",
+            "2023-10-11 12:34:56Z",
+            "2023-10-11 12:34:56.123",
+            "2023-1-11 12:34:567",
+            "２０２３-10-11 12:34:56",
+            "20231311123456",
+            "20230229120000",
+            "2023101112345x",
+            "+2023101112345",
+        ]
+        for date_str in cases:
+            with self.subTest(date_str=date_str):
+                self.assertEqual(parse_or_error(parse_date_string, date_str),
+                                 parse_or_error(legacy_parse_date_string, date_str))
+
+
 class TestDetectTimezoneFromAbbr(unittest.TestCase):
     """测试 detect_timezone_from_abbr 函数"""
 
@@ -289,6 +497,137 @@ class TestDateToTimestamp(unittest.TestCase):
             date_to_timestamp("2023-10-11 12:34:56", "Invalid/Timezone")
 
 
+class TestZoneTable(unittest.TestCase):
+    """测试预计算的时区转换表，结果需与 pytz 在 1970-2100 年间一致"""
+
+    RANGE_START = 0
+    RANGE_END = 4102444800  # 2100-01-01 的秒级时间戳
+
+    @staticmethod
+    def pytz_timestamp_to_date(timestamp, timezone_str):
+        utc_time = datetime.datetime.fromtimestamp(timestamp / 1000, tz=datetime.timezone.utc)
+        return utc_time.astimezone(pytz.timezone(timezone_str)).strftime('%Y-%m-%d %H:%M:%S %Z')
+
+    @staticmethod
+    def pytz_date_to_timestamp(local_dt, timezone_str):
+        localized = pytz.timezone(timezone_str).localize(local_dt)
+        return int(localized.astimezone(pytz.utc).timestamp() * 1000)
+
+    def sample_seconds(self, timezone_str):
+        """每个转换时刻附近的若干秒，以及若干随机时刻"""
+        table = get_zone_table(timezone_str)
+        rng = random.Random(timezone_str)
+        for transition in table.transitions:
+            if self.RANGE_START < transition < self.RANGE_END:
+                for delta in (-3600, -1, 0, 1, 1800, 3600):
+                    yield transition + delta
+        for _ in range(200):
+            yield rng.randrange(self.RANGE_START, self.RANGE_END)
+
+    def test_timestamp_to_date_matches_pytz(self):
+        """测试时间戳转日期与 pytz 一致（含转换时刻前后）"""
+        for tz_info in TIME_ZONES.values():
+            timezone_str = tz_info['tz']
+            for seconds in self.sample_seconds(timezone_str):
+                for timestamp in (seconds * 1000, seconds * 1000 + 999, seconds * 1000 + 0.5):
+                    self.assertEqual(timestamp_to_date(timestamp, timezone_str),
+                                     self.pytz_timestamp_to_date(timestamp, timezone_str),
+                                     (timezone_str, timestamp))
+
+    def test_date_to_timestamp_matches_pytz(self):
+        """测试日期转时间戳与 pytz.localize 一致（含夏令时空档和重复时间）"""
+        for tz_info in TIME_ZONES.values():
+            timezone_str = tz_info['tz']
+            for seconds in self.sample_seconds(timezone_str):
+                local_dt = datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds=seconds)
+                date_str = local_dt.strftime('%Y-%m-%d %H:%M:%S')
+                self.assertEqual(date_to_timestamp(date_str, timezone_str),
+                                 self.pytz_date_to_timestamp(local_dt, timezone_str),
+                                 (timezone_str, date_str))
+
+    def test_dst_gap_and_overlap(self):
+        """测试夏令时空档和重复时间的处理与 pytz 默认 is_dst=False 一致"""
+        table = get_zone_table('America/Los_Angeles')
+        gap = datetime.datetime(2023, 3, 12, 2, 30)       # 不存在的本地时间
+        overlap = datetime.datetime(2023, 11, 5, 1, 30)   # 出现两次的本地时间
+        for local_dt in (gap, overlap):
+            local_seconds = int((local_dt - datetime.datetime(1970, 1, 1)).total_seconds())
+            expected = self.pytz_date_to_timestamp(local_dt, 'America/Los_Angeles') // 1000
+            self.assertEqual(table.local_to_utc(local_seconds), expected)
+            with self.assertRaises(ValueError):
+                table.local_to_utc(local_seconds, is_dst=None)
+        # 重复时间按夏令时处理时取较早的时刻
+        overlap_seconds = int((overlap - datetime.datetime(1970, 1, 1)).total_seconds())
+        self.assertEqual(table.local_to_utc(overlap_seconds, is_dst=True),
+                         table.local_to_utc(overlap_seconds) - 3600)
+
+    def test_zone_outside_time_zones(self):
+        """测试 TIME_ZONES 之外的时区同样可以构建转换表"""
+        self.assertEqual(timestamp_to_date(1697054400000, 'America/Chicago'), '2023-10-11 15:00:00 CDT')
+        self.assertIs(get_zone_table('America/Chicago'), get_zone_table('America/Chicago'))
+
+
+@unittest.skipUnless(numpy, "需要 numpy")
+class TestVectorizedConversion(unittest.TestCase):
+    """测试 numpy 向量化转换接口，结果需与逐个调用标量函数一致"""
+
+    def sample_timestamps(self, timezone_str):
+        """随机时刻加上每个转换时刻前后的毫秒时间戳"""
+        rng = numpy.random.default_rng(7)
+        table = get_zone_table(timezone_str)
+        edges = [t * 1000 + d for t in table.transitions if 0 < t < 4102444800 for d in (-1, 0, 1)]
+        return numpy.concatenate([rng.integers(0, 4102444800000, 500), numpy.array(edges, dtype=numpy.int64)])
+
+    def test_timestamps_to_dates_strings(self):
+        """测试向量化输出字符串与 timestamp_to_date 一致"""
+        for tz_info in TIME_ZONES.values():
+            timezone_str = tz_info['tz']
+            timestamps = self.sample_timestamps(timezone_str)
+            result = timestamps_to_dates(timestamps, timezone_str)
+            expected = [timestamp_to_date(int(ts), timezone_str) for ts in timestamps]
+            self.assertEqual(result.tolist(), expected, timezone_str)
+
+    def test_missing_numpy_error(self):
+        """测试未安装 numpy 时向量化接口给出安装提示，标量接口不受影响"""
+        with patch.dict(sys.modules, {'numpy': None}):
+            with self.assertRaisesRegex(ImportError, 'vectorize'):
+                timestamps_to_dates([0], 'UTC')
+            with self.assertRaisesRegex(ImportError, 'vectorize'):
+                dates_to_timestamps(['1970-01-01 00:00:00'], 'UTC')
+            self.assertEqual(timestamp_to_date(0, 'UTC'), '1970-01-01 00:00:00 UTC')
+
+    def test_timestamps_to_dates_datetime64(self):
+        """测试 datetime64 输出为本地墙上时间"""
+        result = timestamps_to_dates(numpy.array([1697054400123]), 'Asia/Shanghai', output='datetime64')
+        self.assertEqual(result.dtype, numpy.dtype('datetime64[ms]'))
+        self.assertEqual(str(result[0]), '2023-10-12T04:00:00.123')
+
+    def test_shape_preserved(self):
+        """测试输出形状与输入一致"""
+        timestamps = numpy.array([[0, 1697054400000], [1000, 2000]])
+        self.assertEqual(timestamps_to_dates(timestamps, 'UTC').shape, (2, 2))
+        self.assertEqual(timestamps_to_dates(numpy.array([], dtype=numpy.int64), 'UTC').shape, (0,))
+
+    def test_dates_to_timestamps_round_trip(self):
+        """测试本地时间转回时间戳与 date_to_timestamp 一致"""
+        for tz_info in TIME_ZONES.values():
+            timezone_str = tz_info['tz']
+            local_times = timestamps_to_dates(self.sample_timestamps(timezone_str), timezone_str,
+                                              output='datetime64').astype('datetime64[s]')
+            result = dates_to_timestamps(local_times, timezone_str)
+            expected = [date_to_timestamp(str(value).replace('T', ' '), timezone_str) for value in local_times]
+            self.assertEqual(result.tolist(), expected, timezone_str)
+
+    def test_dates_to_timestamps_from_fields(self):
+        """测试由字段数组转换，夏令时空档和重复时间与标量规则一致"""
+        fields = (numpy.array([2023, 2023, 2024]), numpy.array([3, 11, 2]), numpy.array([12, 5, 29]),
+                  numpy.array([2, 1, 12]), numpy.array([30, 30, 0]), numpy.array([0, 0, 0]))
+        result = dates_to_timestamps(fields, 'America/Los_Angeles')
+        expected = [date_to_timestamp(date_str, 'America/Los_Angeles')
+                    for date_str in ("2023-03-12 02:30:00", "2023-11-05 01:30:00", "2024-02-29 12:00:00")]
+        self.assertEqual(result.tolist(), expected)
+
+
 class TestGetCurrentTimeInfo(unittest.TestCase):
     """测试 get_current_time_info 函数"""
 
@@ -323,6 +662,33 @@ class TestGetCurrentTimeInfo(unittest.TestCase):
         self.assertEqual(len(lines), len(TIME_ZONES) + 1)
 
 
+class TestAllZones(unittest.TestCase):
+    """测试同一时刻的多时区转换"""
+
+    def test_matches_single_zone_conversion(self):
+        """测试与逐个时区调用 timestamp_to_date 结果一致（含跨日与夏令时切换）"""
+        zones = [tz_info['tz'] for tz_info in TIME_ZONES.values()]
+        for timestamp in (1697049600000, 1699164000000 - 1, 1699164000000, 1711846799999, 0):
+            with self.subTest(timestamp=timestamp):
+                self.assertEqual(render_all_zones(timestamp),
+                                 {tz: timestamp_to_date(timestamp, tz) for tz in zones})
+
+    def test_custom_zones_and_unit(self):
+        """测试指定时区列表与时间戳单位"""
+        result = render_all_zones(1697049600, ['Asia/Kolkata', 'UTC'], unit='s')
+        self.assertEqual(list(result), ['Asia/Kolkata', 'UTC'])
+        self.assertEqual(result['Asia/Kolkata'], "2023-10-12 00:10:00 IST")
+        with self.assertRaises(ValueError):
+            render_all_zones(1697049600000, ['Not/AZone'])
+
+    def test_format_all_zones(self):
+        """测试多时区列表格式"""
+        lines = format_all_zones(1697049600000).split('\n')
+        self.assertEqual(lines[0], "时间戳: 1697049600000")
+        self.assertEqual(lines[1], f"1. {TIME_ZONES['1']['name']}: 2023-10-12 02:40:00 CST")
+        self.assertEqual(len(lines), len(TIME_ZONES) + 1)
+
+
 class TestConstants(unittest.TestCase):
     """测试常量定义"""
 
@@ -414,6 +780,871 @@ class TestEdgeCases(unittest.TestCase):
             validate_timestamp("")
 
 
+class TestTimestampUnits(unittest.TestCase):
+    """测试秒/毫秒/微秒/纳秒时间戳的整数换算"""
+
+    def test_integer_input_stays_integer(self):
+        """测试整数时间戳不经过浮点"""
+        self.assertIsInstance(validate_timestamp("1697049600123"), int)
+        self.assertIsInstance(validate_timestamp("1697049600.5"), float)
+        self.assertEqual(validate_timestamp("1697049600123456789", 'ns'), 1697049600123456789)
+        with self.assertRaises(ValueError):
+            validate_timestamp("4102444801", 's')
+        with self.assertRaises(ValueError):
+            validate_timestamp("1", 'minutes')
+
+    def test_detect_unit(self):
+        """测试按数量级识别单位"""
+        for value, unit in ((1697049600, 's'), (1697049600123, 'ms'),
+                            (1697049600123456, 'us'), (1697049600123456789, 'ns')):
+            with self.subTest(value=value):
+                self.assertEqual(detect_timestamp_unit(value), unit)
+                self.assertEqual(timestamp_to_date(value, "UTC", 'auto'), "2023-10-11 18:40:00 UTC")
+
+    def test_no_rounding_at_second_boundary(self):
+        """测试大数值纳秒时间戳不会因浮点舍入进到下一秒"""
+        self.assertEqual(timestamp_to_date(1697049600999999999, "UTC", 'ns'), "2023-10-11 18:40:00 UTC")
+        self.assertEqual(timestamp_to_date(1697049600999999, "UTC", 'us'), "2023-10-11 18:40:00 UTC")
+
+    def test_round_trip_all_units(self):
+        """测试各单位日期转时间戳再转回日期结果不变（含夏令时切换前后）"""
+        for text in ("2023-03-12 01:59:59", "2023-03-12 03:00:00", "2023-11-05 01:30:00", "2023-10-11 12:34:56"):
+            expected = timestamp_to_date(date_to_timestamp(text, "America/New_York"), "America/New_York")
+            for unit in ('s', 'ms', 'us', 'ns'):
+                with self.subTest(text=text, unit=unit):
+                    timestamp = date_to_timestamp(text, "America/New_York", unit)
+                    self.assertIsInstance(timestamp, int)
+                    self.assertEqual(timestamp_to_date(timestamp, "America/New_York", unit), expected)
+
+    def test_sub_millisecond_precision(self):
+        """测试日期转时间戳保留微秒"""
+        text = "2023-10-11T12:34:56.123456"
+        self.assertEqual(date_to_timestamp(text, "UTC", 'us'), 1697027696123456)
+        self.assertEqual(date_to_timestamp(text, "UTC", 'ns'), 1697027696123456000)
+        self.assertEqual(date_to_timestamp(text, "UTC"), 1697027696123)
+        self.assertEqual(date_to_timestamp(text, "UTC", 's'), 1697027696)
+
+    def test_unit_in_batch_and_requests(self):
+        """测试批量转换与服务请求支持 unit"""
+        self.assertEqual(convert_value("1697049600", 'to_date', "UTC", 's'), "2023-10-11 18:40:00 UTC")
+        output = io.StringIO()
+        run_batch(io.StringIO("1697049600000000\n"), output, 'to_date', "UTC", 'tsv', unit='us')
+        self.assertEqual(output.getvalue(), "1697049600000000\t2023-10-11 18:40:00 UTC\t\n")
+        response = asyncio.run(handle_request({'mode': 'to_timestamp', 'timezone': 'UTC', 'unit': 's',
+                                               'value': '2023-10-11 18:40:00'}))
+        self.assertEqual(response['output'], 1697049600)
+        with self.assertRaises(ValueError):
+            asyncio.run(handle_request({'mode': 'to_date', 'timezone': 'UTC', 'unit': 'x', 'value': '1'}))
+
+
+class TestCaching(unittest.TestCase):
+    """测试 LRU 缓存及其统计"""
+
+    def setUp(self):
+        clear_caches()
+        self.addCleanup(clear_caches)
+
+    def test_lru_eviction_order(self):
+        """测试超出容量时淘汰最久未使用的条目"""
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)  # a 变为最近使用
+        cache.put('c', 3)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions']), (3, 1, 1))
+        self.assertEqual(stats['size'], 2)
+
+    def test_zero_size_disables_cache(self):
+        """测试容量为 0 时不缓存"""
+        cache = LRUCache(0)
+        cache.put('a', 1)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+        with self.assertRaises(ValueError):
+            LRUCache(-1)
+
+    def test_repeated_dates_hit_cache(self):
+        """测试重复输入命中缓存且结果不变"""
+        first = date_to_timestamp("2023-10-11 12:34:56 PST", "America/Los_Angeles")
+        second = date_to_timestamp("2023-10-11 12:34:56 PST", "America/Los_Angeles")
+
+        self.assertEqual(first, second)
+        stats = get_cache_stats()['timestamp']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_cache_key_includes_timezone_and_abbr(self):
+        """测试缓存键区分目标时区和时区缩写"""
+        shanghai = date_to_timestamp("2023-10-11 12:00:00", "Asia/Shanghai")
+        utc = date_to_timestamp("2023-10-11 12:00:00", "UTC")
+        self.assertEqual(utc - shanghai, 8 * 3600 * 1000)
+
+        # CST 在美中时区下解释为芝加哥时间，不能复用上海时区的结果
+        cst_shanghai = date_to_timestamp("2023-10-11 12:00:00 CST", "Asia/Shanghai")
+        cst_chicago = date_to_timestamp("2023-10-11 12:00:00 CST", "America/Chicago")
+        self.assertEqual(cst_shanghai, shanghai)
+        self.assertEqual(cst_chicago - cst_shanghai, 13 * 3600 * 1000)
+
+    def test_parse_cache_and_resize(self):
+        """测试解析缓存命中及缩容淘汰"""
+        for value in ("10/11/2023 12:34", "10/12/2023 12:34", "10/11/2023 12:34"):
+            parse_date_string(value)
+        stats = get_cache_stats()['parse']
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (1, 2, 2))
+
+        configure_cache(1)
+        self.addCleanup(configure_cache, DEFAULT_CACHE_SIZE)
+        stats = get_cache_stats()['parse']
+        self.assertEqual((stats['size'], stats['evictions']), (1, 1))
+
+    def test_format_cache_reuses_same_second(self):
+        """测试同一秒内的毫秒时间戳复用格式化结果"""
+        results = {timestamp_to_date(1697054400000 + ms, "Asia/Shanghai") for ms in range(0, 1000, 7)}
+
+        self.assertEqual(results, {"2023-10-12 04:00:00 CST"})
+        stats = get_cache_stats()['format']
+        self.assertEqual(stats['misses'], 1)
+        self.assertGreater(stats['hits'], 100)
+
+    def test_format_cache_across_dst(self):
+        """测试连续秒跨越夏令时切换时偏移和缩写随之更新"""
+        tz = pytz.timezone("America/New_York")
+        # 2023-11-05 06:00:00 UTC 为美东夏令时结束时刻
+        transition = 1699164000
+        for second in range(transition - 3, transition + 3):
+            for ms in (0, 500, 999):
+                expected = datetime.datetime.fromtimestamp(second, tz).strftime('%Y-%m-%d %H:%M:%S %Z')
+                self.assertEqual(timestamp_to_date(second * 1000 + ms, "America/New_York"), expected)
+
+    def test_format_cache_is_bounded(self):
+        """测试格式化缓存不超过容量上限"""
+        configure_cache(16)
+        self.addCleanup(configure_cache, DEFAULT_CACHE_SIZE)
+        for second in range(100):
+            timestamp_to_date((1697054400 + second) * 1000, "UTC")
+
+        stats = get_cache_stats()['format']
+        self.assertEqual(stats['size'], 16)
+        self.assertEqual(stats['evictions'], 84)
+        self.assertEqual(timestamp_to_date(1697054400000, "UTC"), "2023-10-11 20:00:00 UTC")
+
+    def test_abbr_map_is_module_constant(self):
+        """测试时区缩写映射为模块级常量"""
+        self.assertEqual(TZ_ABBR_MAP['CST'][0], 'Asia/Shanghai')
+        self.assertEqual(detect_timezone_from_abbr('CST', 'America/Chicago'), 'America/Chicago')
+
+
+class TestStats(unittest.TestCase):
+    """测试热点路径统计"""
+
+    def setUp(self):
+        clear_caches()
+        self.addCleanup(clear_caches)
+        self.addCleanup(disable_stats)
+
+    def test_disabled_by_default(self):
+        """测试未开启时不记录统计"""
+        date_to_timestamp("13/10/2023 08:00", "Asia/Shanghai")
+        self.assertIsNone(get_stats())
+
+    def test_parse_and_zone_counters(self):
+        """测试记录命中的格式、尝试次数、缓存命中和时区换算"""
+        enable_stats()
+        for value in ("2023-10-11 12:34:56", "13/10/2023 08:00", "13/10/2023 08:00", "10/11/2023 08:00"):
+            parse_date_string(value)
+        with self.assertRaises(ValueError):
+            parse_date_string("garbage")
+        date_to_timestamp("2023-10-11 12:34:56", "UTC")
+        timestamp_to_date(1697049600000, "UTC")
+
+        stats = get_stats()
+        counters = stats['counters']
+        self.assertEqual(counters['parse.fast_path'], 2)
+        self.assertEqual(counters['parse.cache_hits'], 1)
+        self.assertEqual(counters['parse.probes'], 3)
+        self.assertEqual(counters['parse.unparsable'], 1)
+        # 欧式日期要先尝试 %Y/%m/%d 和 %m/%d/%Y 两个格式
+        self.assertEqual(counters['parse.attempts'] - counters['parse.failed_attempts'], 2)
+        self.assertGreaterEqual(counters['parse.failed_attempts'], 2)
+        self.assertEqual(stats['formats']['%d/%m/%Y %H:%M'], 1)
+        self.assertEqual(stats['formats']['%m/%d/%Y %H:%M'], 1)
+        self.assertEqual(stats['timers']['zone.local_to_utc']['calls'], 1)
+        self.assertEqual(stats['timers']['zone.render']['calls'], 1)
+        self.assertIn('timestamp', stats['caches'])
+
+    def test_abbreviation_rules(self):
+        """测试记录时区缩写的推断方式"""
+        enable_stats()
+        date_to_timestamp("2023-10-11 12:34:56 CST", "America/Chicago")
+        date_to_timestamp("2023-10-11 12:34:56 PST", "Asia/Shanghai")
+        date_to_timestamp("2023-10-11 12:34:56 XYZ", "Asia/Tokyo")
+        rules = {(item['abbr'], item['timezone'], item['rule']) for item in get_stats()['abbreviations']}
+        self.assertEqual(rules, {('CST', 'America/Chicago', 'target'),
+                                 ('PST', 'America/Los_Angeles', 'first'),
+                                 ('XYZ', 'Asia/Tokyo', 'unknown')})
+
+    def test_merge_and_report(self):
+        """测试合并工作进程统计及文本报告"""
+        enable_stats()
+        date_to_timestamp("2023-10-11 12:34:56 CST", "Asia/Shanghai")
+        snapshot = get_stats()
+        import tools.time_transfer as module
+        module._STATS.merge(snapshot)
+        stats = get_stats()
+        self.assertEqual(stats['counters']['parse.probes'], 2 * snapshot['counters']['parse.probes'])
+        self.assertEqual(stats['abbreviations'][0]['count'], 2)
+        report = format_stats(stats)
+        self.assertIn('%Y-%m-%d %H:%M:%S %Z', report)
+        self.assertIn('CST -> Asia/Shanghai (目标时区)', report)
+
+    def test_parallel_workers_are_merged(self):
+        """测试并行模式汇总各工作进程的统计"""
+        # 关闭缓存，使每一行都经过日期解析
+        configure_cache(0)
+        self.addCleanup(configure_cache, DEFAULT_CACHE_SIZE)
+        enable_stats()
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+            f.write('13/10/2023 08:00\n' * 50 + '2023-10-11 12:34:56\n' * 50)
+        self.addCleanup(os.remove, f.name)
+        run_parallel_batch(f.name, io.StringIO(), 'to_timestamp', 'UTC', workers=2, chunk_size=256)
+        formats = get_stats()['formats']
+        self.assertEqual(formats['快速路径'], 50)
+        self.assertEqual(formats['%d/%m/%Y %H:%M'], 50)
+
+
+class TestBatchMode(unittest.TestCase):
+    """测试批量转换模式"""
+
+    def test_iter_input_lines_skips_blank_lines(self):
+        """测试空行被跳过且行号保持原始位置"""
+        lines = list(iter_input_lines(["1697054400000\n", "\n", "  0  \n"]))
+        self.assertEqual(lines, [(1, "1697054400000"), (3, "0")])
+
+    def test_convert_stream_is_lazy(self):
+        """测试转换流按需产出结果"""
+        def source():
+            yield 1, "1697054400000"
+            raise AssertionError("不应读取第二行")
+
+        stream = convert_stream(source(), 'to_date', 'UTC')
+        line_no, value, result, error = next(stream)
+        self.assertEqual(line_no, 1)
+        self.assertIn("2023-10-11 20:00:00", result)
+        self.assertIsNone(error)
+
+    def test_ndjson_output_with_bad_line(self):
+        """测试 NDJSON 输出，错误行不会中断后续转换"""
+        source = io.StringIO("2023-10-11 20:00:00\ninvalid_date\n2023-10-12 04:00:00 CST\n")
+        output = io.StringIO()
+        errors = io.StringIO()
+
+        summary = run_batch(source, output, 'to_timestamp', 'UTC', 'ndjson', error_stream=errors)
+
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(records[0], {'input': '2023-10-11 20:00:00', 'output': 1697054400000})
+        self.assertIn('error', records[1])
+        self.assertEqual(records[2]['output'], 1697054400000)
+        self.assertEqual(summary['lines'], 3)
+        self.assertEqual(summary['errors'], 1)
+        self.assertIn("第 2 行", errors.getvalue())
+
+    def test_tsv_output(self):
+        """测试 TSV 输出格式"""
+        source = io.StringIO("1697054400000\nabc\n")
+        output = io.StringIO()
+
+        run_batch(source, output, 'to_date', 'Asia/Shanghai', 'tsv')
+
+        ok_line, bad_line = output.getvalue().splitlines()
+        self.assertEqual(ok_line, "1697054400000\t2023-10-12 04:00:00 CST\t")
+        value, result, error = bad_line.split('\t')
+        self.assertEqual((value, result), ("abc", ""))
+        self.assertIn("无效的时间戳格式", error)
+
+    def _write_temp_file(self, content):
+        handle = tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8')
+        with handle:
+            handle.write(content)
+        self.addCleanup(os.unlink, handle.name)
+        return handle.name
+
+    def test_file_chunks_are_newline_aligned(self):
+        """测试文件分块覆盖整个文件且每块以换行符结尾"""
+        content = ''.join(f"{1697054400000 + i * 1000}\n" for i in range(50)) + "1697054400000"
+        path = self._write_temp_file(content)
+        data = content.encode('utf-8')
+
+        chunks = list(iter_file_chunks(path, 40))
+
+        self.assertEqual(chunks[0][0], 0)
+        self.assertEqual(chunks[-1][1], len(data))
+        for (_, end), (next_start, _) in zip(chunks, chunks[1:]):
+            self.assertEqual(end, next_start)
+            self.assertEqual(data[end - 1:end], b'\n')
+        self.assertEqual(list(iter_file_chunks(self._write_temp_file(''), 40)), [])
+
+    def test_parallel_batch_matches_serial(self):
+        """测试并行模式的输出、错误行号与串行模式完全一致"""
+        rows = []
+        for i in range(300):
+            rows.append(str(1697054400000 + i * 3600 * 1000))
+            if i % 37 == 0:
+                rows.append("bad_value")
+            if i % 53 == 0:
+                rows.append("")
+        path = self._write_temp_file('\n'.join(rows) + '\n')
+
+        for output_format in ('ndjson', 'tsv'):
+            serial_out, serial_err = io.StringIO(), io.StringIO()
+            with open(path, encoding='utf-8') as f:
+                serial = run_batch(f, serial_out, 'to_date', 'America/Los_Angeles',
+                                   output_format, error_stream=serial_err)
+            parallel_out, parallel_err = io.StringIO(), io.StringIO()
+            parallel = run_parallel_batch(path, parallel_out, 'to_date', 'America/Los_Angeles',
+                                          output_format, workers=2, chunk_size=256,
+                                          error_stream=parallel_err)
+
+            self.assertEqual(parallel_out.getvalue(), serial_out.getvalue())
+            self.assertEqual(parallel_err.getvalue(), serial_err.getvalue())
+            self.assertEqual((parallel['lines'], parallel['errors']),
+                             (serial['lines'], serial['errors']))
+
+    def test_parse_size(self):
+        """测试分块大小参数解析"""
+        self.assertEqual(parse_size("65536"), 65536)
+        self.assertEqual(parse_size("512K"), 512 * 1024)
+        self.assertEqual(parse_size("4m"), 4 * 1024 * 1024)
+        with self.assertRaises(ValueError):
+            parse_size("0")
+        with self.assertRaises(ValueError):
+            parse_size("abc")
+
+
+class TestServeMode(unittest.TestCase):
+    """测试常驻服务模式"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.socket_path = os.path.join(cls.tmpdir, 'time_transfer.sock')
+        cls.loop = asyncio.new_event_loop()
+        cls.thread = threading.Thread(target=cls.loop.run_forever, daemon=True)
+        cls.thread.start()
+        cls.servers = asyncio.run_coroutine_threadsafe(
+            start_servers(cls.socket_path, '127.0.0.1', 0), cls.loop).result(timeout=30)
+        cls.http_address = 'http://127.0.0.1:%d' % cls.servers[1].sockets[0].getsockname()[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        async def shutdown():
+            for server in cls.servers:
+                server.close()
+                await server.wait_closed()
+        asyncio.run_coroutine_threadsafe(shutdown(), cls.loop).result(timeout=30)
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.thread.join()
+        cls.loop.close()
+        if os.path.exists(cls.socket_path):
+            os.unlink(cls.socket_path)
+        os.rmdir(cls.tmpdir)
+
+    def test_handle_request_validation(self):
+        """测试请求级错误"""
+        for request in ([], {'mode': 'x', 'timezone': '1', 'value': 0},
+                        {'mode': 'to_date', 'value': 0},
+                        {'mode': 'to_date', 'timezone': 'Mars/Base', 'value': 0},
+                        {'mode': 'to_date', 'timezone': '1'}):
+            with self.subTest(request=request):
+                with self.assertRaises(ValueError):
+                    asyncio.run(handle_request(request))
+        self.assertEqual(resolve_timezone('7'), 'Asia/Tokyo')
+        self.assertEqual(resolve_timezone('Europe/Paris'), 'Europe/Paris')
+
+    def test_single_and_batch_over_both_transports(self):
+        """测试 Unix socket 与 HTTP 上的单个及批量请求"""
+        for address in (self.socket_path, self.http_address):
+            with self.subTest(address=address), ConversionClient(address) as client:
+                single = client.request({'mode': 'to_date', 'timezone': '1', 'value': 1697054400000})
+                self.assertEqual(single, {'input': '1697054400000', 'output': '2023-10-12 04:00:00 CST'})
+
+                batch = client.request({'mode': 'to_timestamp', 'timezone': 'UTC',
+                                        'values': ['2023-10-11 20:00:00', 'invalid']})
+                self.assertEqual(batch['results'][0]['output'], 1697054400000)
+                self.assertIn('error', batch['results'][1])
+
+                self.assertIn('error', client.request({'mode': 'to_date'}))
+
+    def test_concurrent_clients(self):
+        """测试多个客户端并发请求"""
+        errors = []
+
+        def worker(offset):
+            try:
+                with ConversionClient(self.socket_path) as client:
+                    for i in range(20):
+                        timestamp = 1697054400000 + (offset * 20 + i) * 1000
+                        response = client.request({'mode': 'to_date', 'timezone': '5', 'value': timestamp})
+                        if response['output'] != timestamp_to_date(timestamp, 'UTC'):
+                            errors.append(response)
+            except Exception as e:  # 线程中的异常需要带回主线程断言
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+
+class TestRewriteMode(unittest.TestCase):
+    """测试日志时间改写"""
+
+    def setUp(self):
+        self.rewriter = TimestampRewriter('Asia/Riyadh', 'Europe/Madrid')
+
+    def test_rewrites_each_format_family(self):
+        """测试常见格式改写后保持原格式"""
+        cases = {
+            '[2023-10-11 12:34:56] ok': '[2023-10-11 11:34:56] ok',
+            'at 2023/10/11 12:34 done': 'at 2023/10/11 11:34 done',
+            '10/11/2023 01:02:03 PM': '10/11/2023 12:02:03 PM',
+            '2023-10-11T12:34:56.123 x': '2023-10-11T11:34:56.123 x',
+            '2023年10月11日 12:34:56': '2023年10月11日 11:34:56',
+            '25/10/2023 12:00': '25/10/2023 11:00',
+            '2023-10-11 20:00:00,123 INFO': '2023-10-11 19:00:00,123 INFO',
+        }
+        for source, expected in cases.items():
+            with self.subTest(source=source):
+                self.assertEqual(self.rewriter.rewrite(source), expected)
+
+    def test_keeps_field_widths(self):
+        """测试没有补零的字段改写后同样不补零，AM/PM 保持原大小写"""
+        cases = {
+            '1.2.2023 12:00': '1.2.2023 10:00',
+            '1.2.2023 9:05': '1.2.2023 7:05',
+            '01.02.2023 12:00': '01.02.2023 10:00',
+            '2023-1-1 1:30:00': '2022-12-31 23:30:00',
+            '2023-10-11 1:02:03 pm': '2023-10-11 12:02:03 pm',
+        }
+        for source, expected in cases.items():
+            with self.subTest(source=source):
+                self.assertEqual(self.rewriter.rewrite(source), expected)
+
+    def test_matches_pytz_across_dst(self):
+        """测试目标时区夏令时切换前后的换算与 pytz 一致"""
+        riyadh, madrid = pytz.timezone('Asia/Riyadh'), pytz.timezone('Europe/Madrid')
+        for text in ('2023-03-26 03:30:00', '2023-03-26 05:30:00', '2023-10-29 03:30:00', '2023-10-29 04:30:00'):
+            local = riyadh.localize(datetime.datetime.strptime(text, '%Y-%m-%d %H:%M:%S'))
+            expected = local.astimezone(madrid).strftime('%Y-%m-%d %H:%M:%S')
+            with self.subTest(text=text):
+                self.assertEqual(self.rewriter.rewrite(text), expected)
+
+    def test_abbreviation_is_honoured_and_replaced(self):
+        """测试带时区缩写的时间按缩写换算并替换缩写"""
+        self.assertEqual(self.rewriter.rewrite('2023-10-11 12:34:56 CST.'), '2023-10-11 06:34:56 CEST.')
+        # 不是时区缩写的单词不会被当作缩写
+        self.assertEqual(self.rewriter.rewrite('2023-10-11 12:34:56 ESTABLISHED'),
+                         '2023-10-11 11:34:56 ESTABLISHED')
+
+    def test_leaves_non_matching_text_untouched(self):
+        """测试带偏移、Z、无效日期、长数字串及紧凑格式保持原样"""
+        for text in ('2023-10-11T12:34:56Z', '2023-10-11 12:34:56 +0300', '2023-10-11 12:34:56 -03:00',
+                     '2023-10-11T12:34:56.123Z', '2023-10-11T12:34:56.123+08:00', '2023-10-11 12:34:56.5Z',
+                     '2023-10-11 20:00:00,123 +0300', '02/30/2023 10:00', 'id=120231011123456', '20231011123456', '2023-10-11 12:34:567',
+                     '2023-10-11', 'no timestamps here'):
+            with self.subTest(text=text):
+                self.assertEqual(self.rewriter.rewrite(text), text)
+        compact = TimestampRewriter('Asia/Riyadh', 'Europe/Madrid', include_compact=True)
+        self.assertEqual(compact.rewrite('ts 20231011123456 end'), 'ts 20231011113456 end')
+
+    def test_stream_matches_whole_text(self):
+        """测试分块流式改写与整体改写结果一致，并保留 \r\n"""
+        lines = [f'2023-10-{day:02d} {hour:02d}:15:00 event {day * hour}\r\n'
+                 for day in range(1, 29) for hour in range(24)]
+        lines.insert(5, 'line without time\r\n')
+        text = ''.join(lines) + 'tail 2023-10-11 12:00'
+        output = io.StringIO()
+
+        summary = rewrite_stream(io.StringIO(text), output, 'Asia/Riyadh', 'Europe/Madrid', block_size=97)
+
+        self.assertEqual(output.getvalue(), TimestampRewriter('Asia/Riyadh', 'Europe/Madrid').rewrite(text))
+        self.assertEqual(output.getvalue().count('\r\n'), text.count('\r\n'))
+        self.assertEqual(summary['matches'], 28 * 24 + 1)
+        self.assertEqual(summary['failures'], 0)
+
+
+class TestTimeIndex(unittest.TestCase):
+    """测试日志稀疏时间索引"""
+
+    BASE = 1697054400  # 2023-10-11 20:00:00 UTC
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.log_path = os.path.join(self.tmpdir, 'app.log')
+        self.addCleanup(self._cleanup)
+
+    def _cleanup(self):
+        for name in os.listdir(self.tmpdir):
+            os.unlink(os.path.join(self.tmpdir, name))
+        os.rmdir(self.tmpdir)
+
+    def _log_lines(self, start, count):
+        lines = []
+        for i in range(start, start + count):
+            stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(self.BASE + i // 4))
+            lines.append(f'{stamp},{(i % 4) * 250:03d} INFO event {i}\n')
+            if i % 37 == 0:
+                lines.append('Traceback (most recent call last):\n')
+        return lines
+
+    def _brute_force(self, start_ms, end_ms):
+        result, current = [], None
+        with open(self.log_path, 'rb') as f:
+            for line in f:
+                timestamp = extract_line_timestamp(line.decode(), 'UTC')
+                current = timestamp if timestamp is not None else current
+                if current is not None and start_ms <= current < end_ms:
+                    result.append(line)
+        return result
+
+    def test_extract_line_timestamp(self):
+        """测试从日志行首提取时间"""
+        self.assertEqual(extract_line_timestamp('2023-10-11 20:00:00,250 INFO x', 'UTC'), 1697054400250)
+        self.assertEqual(extract_line_timestamp('2023-10-11 20:00:00.5 x', 'UTC'), 1697054400500)
+        self.assertEqual(extract_line_timestamp('2023-10-12 04:00:00 CST boot', 'UTC'), 1697054400000)
+        self.assertEqual(extract_line_timestamp('2023-10-11T20:00:00Z done', 'UTC'), 1697054400000)
+        self.assertIsNone(extract_line_timestamp('  File "x.py", line 1', 'UTC'))
+        self.assertIsNone(extract_line_timestamp('', 'UTC'))
+
+    def test_range_query_matches_full_scan(self):
+        """测试范围查询结果与全量扫描一致，续行归属前一条日志"""
+        with open(self.log_path, 'w') as f:
+            f.writelines(self._log_lines(0, 2000))
+
+        index = build_time_index(self.log_path, 'UTC', every=50)
+        self.assertEqual(len(index.offsets), 42)  # 2055 行（含续行），每 50 行一个索引点
+        for start, end in ((0, 10), (17, 123), (123.25, 123.5), (499, 600), (-5, 1)):
+            start_ms, end_ms = int((self.BASE + start) * 1000), int((self.BASE + end) * 1000)
+            with self.subTest(start=start, end=end):
+                self.assertEqual(list(query_time_range(self.log_path, start_ms, end_ms, 'UTC', every=50)),
+                                 self._brute_force(start_ms, end_ms))
+
+    def test_incremental_update(self):
+        """测试追加写入后增量更新，未写完的行留到下次"""
+        with open(self.log_path, 'w') as f:
+            f.writelines(self._log_lines(0, 500))
+        first = build_time_index(self.log_path, 'UTC', every=100)
+        size = first.indexed_size
+
+        with open(self.log_path, 'a') as f:
+            f.writelines(self._log_lines(500, 500))
+            f.write('2023-10-11 20:05:00,000 INFO partial')
+
+        index = TimeIndex(self.log_path, 'UTC', every=100)
+        self.assertTrue(index.load())
+        self.assertEqual(index.indexed_size, size)
+        index.update()
+        self.assertEqual(index.indexed_size, os.path.getsize(self.log_path) - len('2023-10-11 20:05:00,000 INFO partial'))
+
+        rebuilt = TimeIndex(self.log_path, 'UTC', every=100, index_path=self.log_path + '.full')
+        rebuilt.update()
+        self.assertEqual(index.offsets, rebuilt.offsets)
+        self.assertEqual(index.timestamps, rebuilt.timestamps)
+
+    def test_small_file_append_is_incremental(self):
+        """测试不足 4KB 的小日志追加后仍增量更新，摘要只覆盖已索引的部分"""
+        with open(self.log_path, 'w') as f:
+            f.writelines(self._log_lines(0, 10))
+        first = build_time_index(self.log_path, 'UTC', every=3)
+        self.assertEqual(first.head_size, os.path.getsize(self.log_path))
+
+        with open(self.log_path, 'a') as f:
+            f.writelines(self._log_lines(10, 5))
+        index = TimeIndex(self.log_path, 'UTC', every=3)
+        self.assertTrue(index.load())
+        self.assertFalse(index._is_stale())
+        with patch('tools.time_transfer_index.extract_line_timestamp', wraps=extract_line_timestamp) as extract:
+            index.update()
+        self.assertEqual(extract.call_count, 2)  # 只解析新追加部分的索引点
+        rebuilt = build_time_index(self.log_path, 'UTC', every=3, index_path=self.log_path + '.full')
+        self.assertEqual((index.offsets, index.timestamps), (rebuilt.offsets, rebuilt.timestamps))
+
+    def test_time_bound_prefers_millisecond_timestamp(self):
+        """测试范围边界中的纯数字毫秒时间戳不会被当作紧凑日期格式解析"""
+        self.assertEqual(_parse_time_bound('1712101010101', 'UTC'), 1712101010101)
+        self.assertEqual(_parse_time_bound(' 1712121212120 ', 'Asia/Shanghai'), 1712121212120)
+        # 超出时间戳范围的 14 位数字仍按 %Y%m%d%H%M%S 解析
+        self.assertEqual(_parse_time_bound('20231011123456', 'UTC'), 1697027696000)
+        self.assertEqual(_parse_time_bound('2023-10-11 12:34:56', 'UTC'), 1697027696000)
+
+    def test_rebuild_after_rotation(self):
+        """测试日志被替换或截断后重新构建索引"""
+        with open(self.log_path, 'w') as f:
+            f.writelines(self._log_lines(0, 400))
+        build_time_index(self.log_path, 'UTC', every=10)
+
+        with open(self.log_path, 'w') as f:
+            f.writelines(self._log_lines(1000, 50))
+        index = build_time_index(self.log_path, 'UTC', every=10)
+
+        self.assertEqual(index.indexed_size, os.path.getsize(self.log_path))
+        self.assertEqual(index.timestamps[0], (self.BASE + 250) * 1000)
+        self.assertFalse(TimeIndex(self.log_path, 'Asia/Tokyo', every=10).load())
+
+
+class TestCsvMode(unittest.TestCase):
+    """测试 CSV 时间列转换"""
+
+    def convert(self, text, columns, mode='to_timestamp', **kwargs):
+        output = io.StringIO()
+        summary = convert_csv(io.StringIO(text, newline=''), output, columns, mode, 'Asia/Shanghai', **kwargs)
+        return output.getvalue(), summary
+
+    def test_converts_named_column_and_keeps_others(self):
+        """测试只转换指定列，表头和带引号的字段原样保留"""
+        text = 'id,ts,note\n1,2023-10-11 12:34:56,"a, b"\n2,,plain\n'
+        output, summary = self.convert(text, ['ts'])
+        self.assertEqual(output, 'id,ts,note\n1,1696998896000,"a, b"\n2,,plain\n')
+        self.assertEqual(summary['rows'], 2)
+        self.assertEqual(summary['columns'], {'ts': {'converted': 1, 'errors': 0}})
+
+    def test_failures_become_empty_and_are_counted(self):
+        """测试无法解析的单元格输出为空，并按列计数"""
+        text = 'a;b\n1697049600000;2023-10-11\nbad;x\n'
+        output, summary = self.convert(text, ['a', '1'], mode='to_date', delimiter=';')
+        self.assertEqual(output.splitlines(), ['a;b', '2023-10-12 02:40:00 CST;', ';'])
+        self.assertEqual(summary['columns']['a'], {'converted': 1, 'errors': 1})
+        self.assertEqual(summary['columns']['b'], {'converted': 0, 'errors': 2})
+
+    def test_cached_format_matches_date_to_timestamp(self):
+        """测试列格式缓存不改变解析结果（欧式列中出现可按美式解析的值）"""
+        values = ['13/10/2023 08:00:00', '25/12/2023 23:59:59', '10/11/2023 12:34:56', '31/01/2024 00:00:00',
+                  '10/11/2023 01:02:03 PM', '10/11/2023 12:00:00 AM', '2023-10-11T12:34:56.5',
+                  '2023-10-11 12:34:56 PST', '2023/10/11 12:34:56 +0530', '20231011', '02/30/2023 10:00',
+                  '13/1/2023 9:05', '1/2/2023 9:05', '10/11/2023 1:02:03 pm']
+        for tz in ('Asia/Shanghai', 'America/New_York'):
+            output = io.StringIO()
+            convert_csv(io.StringIO('\n'.join(values) + '\n'), output, ['0'], 'to_timestamp', tz,
+                        has_header=False)
+            expected = []
+            for value in values:
+                try:
+                    expected.append(str(date_to_timestamp(value, tz)))
+                except ValueError:
+                    expected.append('')
+            with self.subTest(tz=tz):
+                self.assertEqual([line.strip('"') for line in output.getvalue().splitlines()], expected)
+
+    def test_unknown_column(self):
+        """测试不存在的列名抛出 ValueError"""
+        with self.assertRaises(ValueError):
+            self.convert('id,ts\n1,2\n', ['missing'])
+
+    def test_cli_subcommand(self):
+        """测试 csv 子命令从标准输入读取并输出各列统计"""
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'tools', 'time_transfer.py')
+        result = subprocess.run([sys.executable, script, 'csv', '-c', 'ts', '-m', 'to_timestamp', '-t', '2'],
+                                input='ts\n2023-10-11 12:34:56\n', capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout, 'ts\n1697052896000\n')
+        self.assertIn('转换 1 个，失败 0 个', result.stderr)
+
+    def test_cli_stats_shared_with_script(self):
+        """测试作为脚本运行时，按需导入的 csv 模块与命令行共用同一份统计"""
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'tools', 'time_transfer.py')
+        result = subprocess.run([sys.executable, script, 'csv', '-c', 'ts', '-m', 'to_timestamp', '-t', '2', '--stats'],
+                                input='ts\n2023-10-11 12:34:56 PST\n', capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout, 'ts\n1697052896000\n')
+        self.assertIn('%Y-%m-%d %H:%M:%S %Z', result.stderr)
+
+
+class TestAggregateMode(unittest.TestCase):
+    """测试按本地时间分桶计数"""
+
+    def aggregate(self, values, mode='to_date', timezone_str='America/New_York', bucket='hour', unit='ms'):
+        counter, summary = aggregate_stream(iter_input_lines(values), mode, timezone_str, bucket, unit)
+        return counter.buckets(unit), summary
+
+    def test_repeated_hour_split_at_fall_back(self):
+        """测试夏令时结束时重复的 01:00 分成 EDT 和 EST 两个桶"""
+        start = 1699153200  # 2023-11-04 23:00 EDT
+        rows, summary = self.aggregate([str(start + i * 600) for i in range(36)], unit='s')
+        self.assertEqual([row['bucket'] for row in rows], [
+            '2023-11-04 23:00 EDT', '2023-11-05 00:00 EDT', '2023-11-05 01:00 EDT',
+            '2023-11-05 01:00 EST', '2023-11-05 02:00 EST', '2023-11-05 03:00 EST'])
+        self.assertEqual([row['start'] - start for row in rows], [i * 3600 for i in range(6)])
+        self.assertTrue(all(row['count'] == 6 for row in rows))
+        self.assertEqual(summary['lines'], 36)
+
+    def test_day_buckets_follow_local_dates(self):
+        """测试夏令时开始的一天只有 23 个小时，跳过的 02:00 没有小时桶"""
+        start = 1679785200  # 2023-03-26 00:00 CET
+        values = [str((start + i * 3600) * 1000) for i in range(48)]
+        days, _ = self.aggregate(values, timezone_str='Europe/Madrid', bucket='day')
+        self.assertEqual(days, [
+            {'bucket': '2023-03-26', 'start': start * 1000, 'count': 23},
+            {'bucket': '2023-03-27', 'start': (start + 23 * 3600) * 1000, 'count': 24},
+            {'bucket': '2023-03-28', 'start': (start + 47 * 3600) * 1000, 'count': 1},
+        ])
+        hours, _ = self.aggregate(values, timezone_str='Europe/Madrid')
+        self.assertEqual(hours[1]['bucket'], '2023-03-26 01:00 CET')
+        self.assertEqual(hours[2]['bucket'], '2023-03-26 03:00 CEST')
+        self.assertEqual(len(hours), 48)
+
+    def test_matches_per_event_conversion(self):
+        """测试分桶结果与逐条转换为本地时间后分组一致"""
+        rng = random.Random(18)
+        timestamps = [rng.randrange(0, 2000000000) * 1000 for _ in range(2000)]
+        for timezone_str in ('America/Los_Angeles', 'Asia/Riyadh', 'Europe/London'):
+            expected = {}
+            for timestamp in timestamps:
+                local = timestamp_to_date(timestamp, timezone_str)
+                key = local[:13] + ':00' + local[19:]
+                expected[key] = expected.get(key, 0) + 1
+            rows, _ = self.aggregate([str(t) for t in timestamps], timezone_str=timezone_str)
+            with self.subTest(timezone_str=timezone_str):
+                self.assertEqual({row['bucket']: row['count'] for row in rows}, expected)
+
+    def test_date_input_and_errors(self):
+        """测试日期输入按缩写换算后分桶，无法解析的行计入失败"""
+        values = ['2023-10-11 12:34:56', '2023-10-11 12:59:59', '2023-10-11 12:00:00 PDT', 'bad', '']
+        rows, summary = self.aggregate(values, mode='to_timestamp', timezone_str='Asia/Shanghai',
+                                       bucket='minute')
+        self.assertEqual([(row['bucket'], row['count']) for row in rows], [
+            ('2023-10-11 12:34 CST', 1), ('2023-10-11 12:59 CST', 1), ('2023-10-12 03:00 CST', 1)])
+        self.assertEqual((summary['lines'], summary['errors']), (4, 1))
+
+    def test_invalid_arguments(self):
+        """测试不支持的分桶、模式和单位"""
+        for kwargs in ({'bucket': 'week'}, {'mode': 'to_utc'}, {'unit': 'ps'}):
+            with self.subTest(**kwargs), self.assertRaises(ValueError):
+                self.aggregate(['1697049600000'], **kwargs)
+
+    def test_cli(self):
+        """测试 --aggregate 以 TSV 输出各桶计数"""
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'tools', 'time_transfer.py')
+        result = subprocess.run([sys.executable, script, '--aggregate', 'day', '-m', 'to_date', '-t', '1',
+                                 '--output-format', 'tsv'],
+                                input='1697049600000\n1697040000000\nx\n1697126400000\n',
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout, '2023-10-12\t1697040000000\t2\n2023-10-13\t1697126400000\t1\n')
+        self.assertIn('失败 1 行，共 2 个桶', result.stderr)
+
+
+class TestTimeRange(unittest.TestCase):
+    """测试按间隔展开时间范围"""
+
+    def dates(self, start, end, interval, timezone_str='America/Los_Angeles', **kwargs):
+        return [timestamp_to_date(value, timezone_str)[11:]
+                for value in generate_time_range(start, end, interval, timezone_str, **kwargs)]
+
+    def test_wall_clock_skips_gap_and_overlap(self):
+        """测试墙上时间跳过不存在的时刻，重复的时刻只生成一次"""
+        self.assertEqual(self.dates('2024-03-10 00:00', '2024-03-10 04:00', '30m'), [
+            '00:00:00 PST', '00:30:00 PST', '01:00:00 PST', '01:30:00 PST', '03:00:00 PDT', '03:30:00 PDT'])
+        self.assertEqual(self.dates('2024-11-03 00:00', '2024-11-03 03:00', '30m'), [
+            '00:00:00 PDT', '00:30:00 PDT', '01:00:00 PDT', '01:30:00 PDT', '02:00:00 PST', '02:30:00 PST'])
+
+    def test_absolute_keeps_fixed_spacing(self):
+        """测试绝对时间递进时夏令时结束的重复小时出现两次"""
+        self.assertEqual(self.dates('2024-11-03 00:00', '2024-11-03 02:00', '1h', wall_clock=False), [
+            '00:00:00 PDT', '01:00:00 PDT', '01:00:00 PST'])
+        values = list(generate_time_range(0, 10000, 3, 'UTC', wall_clock=False))
+        self.assertEqual(values, [0, 3000, 6000, 9000])
+
+    def test_daily_wall_clock_and_units(self):
+        """测试按天递进保持本地时刻，并按单位输出"""
+        self.assertEqual(self.dates('2024-03-09 09:00', '2024-03-12', '1d'),
+                         ['09:00:00 PST', '09:00:00 PDT', '09:00:00 PDT'])
+        expected = [1710003600, 1710086400, 1710172800]
+        for unit, scale in (('s', 1), ('ms', 1000), ('us', 10**6), ('ns', 10**9)):
+            with self.subTest(unit=unit):
+                self.assertEqual(list(generate_time_range('2024-03-09 09:00', '2024-03-12', 86400,
+                                                          'America/Los_Angeles', unit=unit)),
+                                 [value * scale for value in expected])
+
+    def test_matches_localize(self):
+        """测试与逐个按 pytz 本地化的结果一致（重复时刻取夏令时，不存在的时刻跳过）"""
+        zone = pytz.timezone('Europe/London')
+        expected = []
+        moment = datetime.datetime(2023, 1, 1)
+        while moment < datetime.datetime(2024, 1, 1):
+            try:
+                expected.append(int(zone.localize(moment, is_dst=None).timestamp()) * 1000)
+            except pytz.AmbiguousTimeError:
+                expected.append(int(zone.localize(moment, is_dst=True).timestamp()) * 1000)
+            except pytz.NonExistentTimeError:
+                pass
+            moment += datetime.timedelta(minutes=20)
+        self.assertEqual(list(generate_time_range('2023-01-01', '2024-01-01', '20m', 'Europe/London')), expected)
+
+    def test_millisecond_string_bounds(self):
+        """测试字符串形式的毫秒时间戳起止点按时间戳解析，不被当作紧凑日期"""
+        self.assertEqual(list(generate_time_range('1712101010101', '1712108210101', '1h', 'UTC')),
+                         [1712101010101, 1712104610101])
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'tools', 'time_transfer.py')
+        result = subprocess.run([sys.executable, script, '--expand', '30m', '-t', '1', '--from', '1712101010101',
+                                 '--to', '1712104610101'],
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout, '1712101010101\n1712102810101\n')
+
+    def test_empty_and_invalid(self):
+        """测试空范围、无效间隔和单位"""
+        self.assertEqual(list(generate_time_range(1000, 1000, 1, 'UTC')), [])
+        self.assertEqual(parse_interval('90'), 90)
+        self.assertEqual(parse_interval('2h'), 7200)
+        for interval in ('0m', 'abc', '1w'):
+            with self.subTest(interval=interval), self.assertRaises(ValueError):
+                parse_interval(interval)
+        with self.assertRaises(ValueError):
+            list(generate_time_range(0, 1000, 1, 'UTC', unit='ps'))
+
+    def test_cli(self):
+        """测试 --expand 每行输出一个时间戳"""
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'tools', 'time_transfer.py')
+        result = subprocess.run([sys.executable, script, '--expand', '1h', '-t', '1', '--from', '2023-10-11 00:00',
+                                 '--to', '2023-10-11 03:00', '--unit', 's'],
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout, '1696953600\n1696957200\n1696960800\n')
+        self.assertIn('已生成 3 个时间点', result.stderr)
+
+
+class TestStartup(unittest.TestCase):
+    """测试启动路径不加载重量级模块"""
+
+    SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+    HEAVY_MODULES = ('pytz', 'argparse', 'asyncio', 'json', 're', 'concurrent.futures', 'socket',
+                     'tools.time_transfer_aggregate', 'tools.time_transfer_backends', 'tools.time_transfer_batch',
+                     'tools.time_transfer_cli', 'tools.time_transfer_csv', 'tools.time_transfer_expand',
+                     'tools.time_transfer_index', 'tools.time_transfer_rewrite', 'tools.time_transfer_serve',
+                     'tools.time_transfer_vectorize')
+
+    def test_import_is_lightweight(self):
+        """测试导入模块时不加载 pytz、re、argparse 等，也不加载各功能模块"""
+        code = ('import sys; sys.path.insert(0, sys.argv[1]); import tools.time_transfer; '
+                'print(",".join(m for m in sys.argv[2:] if m in sys.modules))')
+        result = subprocess.run([sys.executable, '-c', code, self.SRC_DIR, *self.HEAVY_MODULES],
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), '')
+
+    def test_no_args_fast_path(self):
+        """测试无参数调用直接输出毫秒时间戳"""
+        script = os.path.join(self.SRC_DIR, 'tools', 'time_transfer.py')
+        before = int(time.time() * 1000)
+        result = subprocess.run([sys.executable, script], capture_output=True, text=True, check=True)
+        self.assertGreaterEqual(int(result.stdout), before)
+
+    def test_tz_patterns_compiled_lazily(self):
+        """测试 TZ_PATTERNS 作为模块属性仍可访问"""
+        import tools.time_transfer as module
+        self.assertIs(module.TZ_PATTERNS, module.get_tz_patterns())
+        self.assertTrue(module.TZ_PATTERNS[0].match("2023-10-11 12:34:56 CST"))
+
+
 if __name__ == '__main__':
     # 配置测试运行器
     unittest.main(verbosity=2, buffer=True)
\ No newline at end of file
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+时区后端的一致性测试
+
+test_time_transfer.py 中的测试用例使用默认的 table 后端；这里把其中与时区计算相关的
+测试类在 pytz 和 zoneinfo 后端下各运行一遍，并测试后端本身的选择与边界行为。
+"""
+
+import unittest
+import datetime
+import os
+import sys
+from unittest.mock import patch
+
+# 添加 src 目录和测试目录到 Python 路径，以便导入被测试的模块和已有测试用例
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import test_time_transfer as base
+from tools.time_transfer import (
+    TZ_BACKENDS,
+    DEFAULT_TZ_BACKEND,
+    TZ_BACKEND_ENV,
+    get_tz_backend,
+    set_tz_backend,
+    get_zone,
+    get_zone_table,
+    resolve_timezone,
+    timestamp_to_date,
+    date_to_timestamp,
+)
+import tools.time_transfer as time_transfer
+
+# 与时区后端无关的测试类：启动路径只检查导入，向量化接口始终使用转换表
+BACKEND_INDEPENDENT = {'TestStartup', 'TestVectorizedConversion'}
+
+# pytz 的转换数据止于 2037 年，之后一直使用标准时间；zoneinfo 按 POSIX 规则继续计算夏令时，
+# 因此以 pytz 为参照的用例在 zoneinfo 后端下只比较 2038 年以前
+CASE_OVERRIDES = {
+    ('zoneinfo', 'TestZoneTable'): {'RANGE_END': 2145916800},
+}
+
+
+class _BackendMixin:
+    """在整个测试类运行期间切换到指定的时区后端"""
+
+    TZ_BACKEND = DEFAULT_TZ_BACKEND
+
+    @classmethod
+    def setUpClass(cls):
+        cls._previous_backend = get_tz_backend()
+        set_tz_backend(cls.TZ_BACKEND)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        set_tz_backend(cls._previous_backend)
+
+
+def _backend_cases():
+    """为每个非默认后端生成 test_time_transfer.py 中测试类的子类"""
+    for backend in TZ_BACKENDS:
+        if backend == DEFAULT_TZ_BACKEND:
+            continue
+        for name, case in vars(base).items():
+            if (isinstance(case, type) and issubclass(case, unittest.TestCase)
+                    and name not in BACKEND_INDEPENDENT):
+                case_name = f'{name}_{backend}'
+                attrs = {'TZ_BACKEND': backend, **CASE_OVERRIDES.get((backend, name), {})}
+                yield case_name, type(case_name, (_BackendMixin, case), attrs)
+
+
+globals().update(_backend_cases())
+
+
+class TestTzBackendSelection(unittest.TestCase):
+    """测试时区后端的选择"""
+
+    def setUp(self):
+        previous = get_tz_backend()
+        self.addCleanup(set_tz_backend, previous)
+
+    def test_zone_types(self):
+        """测试各后端返回对应的时区对象"""
+        set_tz_backend('table')
+        self.assertIs(get_zone('Asia/Tokyo'), get_zone_table('Asia/Tokyo'))
+        for backend in ('pytz', 'zoneinfo'):
+            set_tz_backend(backend)
+            zone = get_zone('Asia/Tokyo')
+            self.assertIsNot(zone, get_zone_table('Asia/Tokyo'))
+            self.assertEqual(zone.utc_offset(1697049600), (9 * 3600, 'JST'))
+
+    def test_unknown_backend_and_timezone(self):
+        """测试不支持的后端和不存在的时区"""
+        with self.assertRaises(ValueError):
+            set_tz_backend('dateutil')
+        for backend in TZ_BACKENDS:
+            set_tz_backend(backend)
+            with self.subTest(backend=backend), self.assertRaises(ValueError):
+                resolve_timezone('Mars/Olympus_Mons')
+
+    def test_environment_variable(self):
+        """测试未显式设置时读取环境变量"""
+        with patch.object(time_transfer, '_TZ_BACKEND', None), \
+                patch.dict(os.environ, {TZ_BACKEND_ENV: 'zoneinfo'}):
+            self.assertEqual(get_tz_backend(), 'zoneinfo')
+        with patch.object(time_transfer, '_TZ_BACKEND', None), \
+                patch.dict(os.environ, {TZ_BACKEND_ENV: 'nope'}), self.assertRaises(ValueError):
+            get_tz_backend()
+
+
+class TestTzBackendAgreement(unittest.TestCase):
+    """测试各后端在边界情况下的结果"""
+
+    def setUp(self):
+        previous = get_tz_backend()
+        self.addCleanup(set_tz_backend, previous)
+
+    def each_backend(self):
+        for backend in TZ_BACKENDS:
+            set_tz_backend(backend)
+            with self.subTest(backend=backend):
+                yield backend
+
+    def test_gap_and_overlap(self):
+        """测试夏令时空档和重复时间在各后端下的处理相同"""
+        epoch = datetime.datetime(1970, 1, 1)
+        gap = int((datetime.datetime(2023, 3, 12, 2, 30) - epoch).total_seconds())
+        overlap = int((datetime.datetime(2023, 11, 5, 1, 30) - epoch).total_seconds())
+        expected = {}
+        for backend in self.each_backend():
+            zone = get_zone('America/Los_Angeles')
+            result = (zone.local_to_utc(gap), zone.local_to_utc(gap, True),
+                      zone.local_to_utc(overlap), zone.local_to_utc(overlap, True))
+            expected.setdefault('result', result)
+            self.assertEqual(result, expected['result'])
+            for local_seconds in (gap, overlap):
+                with self.assertRaises(ValueError):
+                    zone.local_to_utc(local_seconds, is_dst=None)
+
+    def test_round_trip(self):
+        """测试各后端日期与时间戳互转一致"""
+        for _ in self.each_backend():
+            self.assertEqual(date_to_timestamp('2023-10-11 12:34:56', 'Europe/Madrid'), 1697020496000)
+            self.assertEqual(timestamp_to_date(1697020496000, 'Europe/Madrid'), '2023-10-11 12:34:56 CEST')
+
+    def test_zoneinfo_after_2037(self):
+        """测试 zoneinfo 在 2037 年之后仍计算夏令时，table/pytz 沿用 pytz 数据为标准时间"""
+        timestamp = 2850739353000  # 2060-05-02 16:02:33 UTC
+        results = {backend: timestamp_to_date(timestamp, 'America/Los_Angeles')
+                   for backend in self.each_backend()}
+        self.assertEqual(results['zoneinfo'], '2060-05-02 09:02:33 PDT')
+        self.assertEqual(results['pytz'], '2060-05-02 08:02:33 PST')
+        self.assertEqual(results['table'], results['pytz'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2, buffer=True)